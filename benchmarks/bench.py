@@ -0,0 +1,230 @@
+"""Time coordinator refreshes on synthetic data, split into stages.
+
+Each repeat starts from an empty Home Assistant (cold caches) and runs three
+refreshes of every entry: a cold one, a warm one 30 min later with the
+samples recorded in between, and an idle one another 30 min later without
+new samples or forecast changes. Stage times are the coordinator's own
+refresh diagnostics (see `NodeEnergyCoordinator.refresh_stats`), averaged
+over entries, medians over the repeats:
+
+    fetch          recorder and forecast queries, including the history
+                   broker's coalescing delay
+    intervals      interval store build
+    fit            load / solar peak estimator
+    backtest       24 h holdout and rolling-origin folds
+    quantiles      empirical weather sketch and quantiles
+    simulation     forecast grid and scenario curves
+    payload        chart groups and attributes; the heavy series are only
+                   built when requested
+    serialize      JSON size of each attribute and series, only measured
+                   with debug logging (`--payload-sizes`)
+    project        moving the projection to now when no input changed
+    executor_wait  executor queueing around the compute job
+    publish        storing results and scheduling the snapshot
+
+With several entries the refreshes overlap, so stage times can add up to
+more than the `wall` time.
+
+Golden outputs guard optimizations against changing results:
+
+    python benchmarks/bench.py --save-golden /tmp/golden.json   # before the change
+    python benchmarks/bench.py --golden /tmp/golden.json        # after it
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import UTC, datetime, timedelta
+import json
+import logging
+import math
+from pathlib import Path
+import statistics
+import sys
+import time
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import hass_stub  # noqa: E402
+import synthetic  # noqa: E402
+
+NOW = datetime(2026, 6, 20, 12, 7, 13, tzinfo=UTC)
+WARM_STEP = timedelta(minutes=30)
+WEATHER_ENTITY = "weather.home"
+PHASES = ("cold", "warm", "idle")
+
+clock = hass_stub.Clock(NOW)
+recorder = hass_stub.Recorder(clock)
+hass_stub.install(clock, recorder)
+
+from custom_components.node_energy import coordinator as co  # noqa: E402
+from custom_components.node_energy.const import ATTR_META, SERIES_KEYS  # noqa: E402
+
+
+def _nodes(entries: int) -> list[synthetic.Node]:
+    return [synthetic.Node(f"sensor.node{k}_battery", f"sensor.node{k}_voltage") for k in range(entries)]
+
+
+def _populate(args: argparse.Namespace) -> int:
+    start = NOW - timedelta(days=args.days)
+    end = NOW + WARM_STEP
+    weather = synthetic.weather_states(WEATHER_ENTITY, start, end, args.seed)
+    recorder.add(WEATHER_ENTITY, weather)
+    rows = 0
+    for node in _nodes(args.entries):
+        battery, voltage = synthetic.node_states(node, weather, start, end, args.rate, args.seed)
+        recorder.add(node.battery_entity, battery)
+        recorder.add(node.voltage_entity, voltage)
+        rows += len(battery)
+    return rows // args.entries
+
+
+def _entry(k: int, node: synthetic.Node, args: argparse.Namespace) -> hass_stub.ConfigEntry:
+    data = {
+        "name": f"Node {k}",
+        "battery_entity": node.battery_entity,
+        "voltage_entity": node.voltage_entity,
+        "weather_entity": WEATHER_ENTITY,
+        "cells_current": 2,
+        "cell_mah": 3500,
+        "cell_v": 3.7,
+        "horizon_days": args.horizon,
+    }
+    return hass_stub.ConfigEntry(f"entry{k}", data, dict(args.options))
+
+
+async def _refresh(hass: hass_stub.HomeAssistant, coordinators: list[Any], new_forecast: bool = True) -> tuple[dict[str, Any], dict[str, Any]]:
+    if new_forecast:
+        hass.services.forecasts[WEATHER_ENTITY] = synthetic.hourly_forecast(clock.now, 0)
+    queried = recorder.rows_returned
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(c._async_update_data() for c in coordinators))
+    wall = time.perf_counter() - t0
+    for c, data in zip(coordinators, results, strict=True):
+        c.data = data
+    n = len(coordinators)
+    stats = [c.refresh_stats[-1] for c in coordinators]
+    sizes = {"payload_bytes": sum(sum(st["payload_bytes"].values()) for st in stats) / n} if "payload_bytes" in stats[0] else {}
+    return {
+        "stages_ms": {name: sum(st["stages_ms"][name] for st in stats) / n for name in stats[0]["stages_ms"]},
+        "total_ms": {"total": sum(st["total_ms"] for st in stats) / n, "wall": wall * 1000.0 / n},
+        "rows": {
+            "states_fetched": (recorder.rows_returned - queried) / n,
+            **{name: sum(st["rows"][name] for st in stats) / n for name in stats[0].get("rows", {})},
+            **sizes,
+        },
+    }, _normalized(coordinators[0])
+
+
+async def _run_once(args: argparse.Namespace) -> tuple[dict[str, dict[str, Any]], dict[str, Any]]:
+    clock.now = NOW
+    recorder.rows_returned = 0
+    hass = hass_stub.HomeAssistant()
+    coordinators = [co.NodeEnergyCoordinator(hass, _entry(k, node, args)) for k, node in enumerate(_nodes(args.entries))]
+    cold, cold_out = await _refresh(hass, coordinators)
+    clock.now = NOW + WARM_STEP
+    warm, warm_out = await _refresh(hass, coordinators)
+    clock.now = NOW + 2 * WARM_STEP
+    idle, idle_out = await _refresh(hass, coordinators, new_forecast=False)
+    return {"cold": cold, "warm": warm, "idle": idle}, {"cold": cold_out, "warm": warm_out, "idle": idle_out}
+
+
+def _normalized(coordinator: Any) -> dict[str, Any]:
+    # Meta holds cache and fetch bookkeeping, not model results; heavy series
+    # are only built on request.
+    data = {**coordinator.data, **{key: coordinator.get_series(key)[1] for key in SERIES_KEYS}}
+    return {k: v for k, v in json.loads(json.dumps(data, default=str)).items() if k != ATTR_META}
+
+
+def _diff(a: Any, b: Any, tol: float, path: str, out: list[str]) -> None:
+    if isinstance(a, dict) and isinstance(b, dict):
+        for key in sorted(set(a) | set(b)):
+            if key not in a or key not in b:
+                out.append(f"{path}.{key}: only in {'golden' if key in a else 'current'}")
+            else:
+                _diff(a[key], b[key], tol, f"{path}.{key}", out)
+    elif isinstance(a, list) and isinstance(b, list):
+        if len(a) != len(b):
+            out.append(f"{path}: length {len(a)} != {len(b)}")
+            return
+        for i, (x, y) in enumerate(zip(a, b, strict=True)):
+            _diff(x, y, tol, f"{path}[{i}]", out)
+    elif isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool) and not isinstance(b, bool):
+        if not math.isclose(a, b, rel_tol=tol, abs_tol=tol):
+            out.append(f"{path}: {a!r} != {b!r}")
+    elif a != b:
+        out.append(f"{path}: {a!r} != {b!r}")
+
+
+def _report(args: argparse.Namespace, battery_rows: int, runs: list[dict[str, dict[str, Any]]]) -> None:
+    print(
+        f"{args.entries} entr{'y' if args.entries == 1 else 'ies'}, {args.days} days at ~{args.rate:g} s "
+        f"({battery_rows} battery states per entry), {args.repeat} repeats"
+    )
+    print(f"{'':24}" + "".join(f"{phase:>12}" for phase in PHASES))
+    for group, unit, fmt in (("stages_ms", " ms", "12.1f"), ("total_ms", " ms", "12.1f"), ("rows", "", "12.0f")):
+        for name in dict.fromkeys(name for phase in PHASES for name in runs[0][phase][group]):
+            cells = [statistics.median(run[phase][group].get(name, 0.0) for run in runs) for phase in PHASES]
+            print(f"{name + unit:24}" + "".join(format(v, fmt) for v in cells))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=30, help="history length in days")
+    parser.add_argument("--rate", type=float, default=300.0, help="battery sample interval in seconds (10..900)")
+    parser.add_argument("--entries", type=int, default=1, help="config entries refreshed concurrently")
+    parser.add_argument("--horizon", type=int, default=7, help="forecast horizon in days")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--options", type=json.loads, default={}, help="entry options as JSON")
+    parser.add_argument("--payload-sizes", action="store_true", help="measure serialized payload sizes (debug logging)")
+    parser.add_argument("--json", action="store_true", help="print raw per-repeat results as JSON")
+    parser.add_argument("--save-golden", type=Path, help="write the first entry's results to this file")
+    parser.add_argument("--golden", type=Path, help="compare the first entry's results with this file")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="relative tolerance of the golden comparison")
+    args = parser.parse_args()
+    if not 10 <= args.rate <= 900:
+        parser.error("--rate must be between 10 and 900 seconds")
+    logging.basicConfig(level=logging.WARNING)
+    if args.payload_sizes:
+        # The coordinator only serializes its payload to measure it for debug logging.
+        logger = logging.getLogger(co.__name__)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+
+    battery_rows = _populate(args)
+    runs: list[dict[str, dict[str, Any]]] = []
+    outputs: dict[str, Any] = {}
+    for k in range(args.repeat):
+        run, out = asyncio.run(_run_once(args))
+        runs.append(run)
+        if k == 0:
+            outputs = out
+
+    if args.json:
+        print(json.dumps(runs, indent=2))
+    else:
+        _report(args, battery_rows, runs)
+
+    params = {key: getattr(args, key) for key in ("days", "rate", "entries", "horizon", "seed", "options")}
+    if args.save_golden:
+        args.save_golden.write_text(json.dumps({"params": params, **outputs}))
+    if args.golden:
+        golden = json.loads(args.golden.read_text())
+        if golden.get("params") != params:
+            print(f"golden was recorded with {golden.get('params')}, not {params}", file=sys.stderr)
+            return 2
+        diffs: list[str] = []
+        for phase in PHASES:
+            _diff(golden[phase], outputs[phase], args.tolerance, phase, diffs)
+        for line in diffs[:20]:
+            print(line, file=sys.stderr)
+        print(f"golden: {len(diffs)} differences", file=sys.stderr)
+        return 1 if diffs else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""Minimal stand-ins for the Home Assistant modules the integration imports.
+
+Only what `custom_components.node_energy` touches during a refresh is
+provided: a clock, a recorder holding synthetic states, a `weather`
+forecast responder and an in-memory snapshot store. `install()` must run
+before the integration is imported.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable
+from datetime import UTC, date, datetime, timedelta
+import json
+import sys
+import types
+from typing import Any
+from zoneinfo import ZoneInfo
+
+
+class State:
+    def __init__(self, entity_id: str, state: str, ts: datetime, attributes: dict[str, Any] | None = None) -> None:
+        self.entity_id = entity_id
+        self.state = state
+        self.last_updated = ts
+        self.last_changed = ts
+        self.attributes = attributes or {}
+
+
+class Clock:
+    def __init__(self, now: datetime) -> None:
+        self.now = now
+
+
+class Recorder:
+    """States per entity, ordered by time; rows after `clock.now` are not visible yet."""
+
+    def __init__(self, clock: Clock) -> None:
+        self.clock = clock
+        self.states: dict[str, list[State]] = {}
+        self.queries = 0
+        self.rows_returned = 0
+
+    def add(self, entity_id: str, rows: list[State]) -> None:
+        self.states[entity_id] = sorted(rows, key=lambda s: s.last_updated)
+
+    def _visible(self, entity_id: str, start: datetime, end: datetime | None) -> tuple[list[State], int, int]:
+        rows = self.states.get(entity_id, [])
+        stop = min(self.clock.now, end) if end is not None else self.clock.now
+        return rows, bisect_right(rows, start, key=_state_ts), bisect_right(rows, stop, key=_state_ts)
+
+    def get_significant_states(
+        self,
+        hass: Any,
+        start_time: datetime,
+        end_time: datetime | None = None,
+        entity_ids: list[str] | None = None,
+        filters: Any = None,
+        include_start_time_state: bool = True,
+        significant_changes_only: bool = True,
+        minimal_response: bool = False,
+        no_attributes: bool = False,
+        compressed_state_format: bool = False,
+    ) -> dict[str, list[State]]:
+        self.queries += 1
+        out: dict[str, list[State]] = {}
+        for entity_id in entity_ids or []:
+            rows, lo, hi = self._visible(entity_id, start_time, end_time)
+            res: list[State] = []
+            if include_start_time_state and lo > 0:
+                b = rows[lo - 1]
+                res.append(State(entity_id, b.state, start_time, b.attributes))
+            res.extend(rows[lo:hi])
+            if res:
+                out[entity_id] = res
+                self.rows_returned += len(res)
+        return out
+
+    def statistics_during_period(
+        self,
+        hass: Any,
+        start_time: datetime,
+        end_time: datetime,
+        statistic_ids: set[str],
+        period: str,
+        units: Any,
+        types_: set[str],
+    ) -> dict[str, list[dict[str, Any]]]:
+        self.queries += 1
+        out: dict[str, list[dict[str, Any]]] = {}
+        for entity_id in statistic_ids:
+            rows = self.states.get(entity_id, [])
+            lo = bisect_left(rows, start_time, key=_state_ts)
+            hi = bisect_left(rows, min(end_time, self.clock.now), key=_state_ts)
+            hours: dict[datetime, list[float]] = {}
+            for s in rows[lo:hi]:
+                try:
+                    v = float(s.state)
+                except ValueError:
+                    continue
+                hours.setdefault(s.last_updated.replace(minute=0, second=0, microsecond=0), []).append(v)
+            if hours:
+                out[entity_id] = [
+                    {"start": h.timestamp(), "end": h.timestamp() + 3600, "mean": sum(v) / len(v)} for h, v in sorted(hours.items())
+                ]
+                self.rows_returned += len(out[entity_id])
+        return out
+
+
+def _state_ts(s: State) -> datetime:
+    return s.last_updated
+
+
+class Services:
+    """Answers `weather.get_forecasts` from `forecasts`."""
+
+    def __init__(self) -> None:
+        self.forecasts: dict[str, list[dict[str, Any]]] = {}
+        self.calls = 0
+        self._registered: dict[tuple[str, str], Callable[..., Any]] = {}
+
+    async def async_call(
+        self, domain: str, service: str, data: dict[str, Any], blocking: bool = False, return_response: bool = False
+    ) -> dict[str, Any]:
+        self.calls += 1
+        if (domain, service) != ("weather", "get_forecasts"):
+            raise ValueError(f"Unknown service {domain}.{service}")
+        entity_id = data["entity_id"]
+        return {entity_id: {"forecast": self.forecasts.get(entity_id, [])}}
+
+    def has_service(self, domain: str, service: str) -> bool:
+        return (domain, service) in self._registered
+
+    def async_register(self, domain: str, service: str, func: Callable[..., Any], schema: Any = None, supports_response: Any = None) -> None:
+        self._registered[(domain, service)] = func
+
+
+class Config:
+    def __init__(self, latitude: float, longitude: float) -> None:
+        self.latitude = latitude
+        self.longitude = longitude
+
+
+class HomeAssistant:
+    def __init__(self, latitude: float = 59.91, longitude: float = 10.75) -> None:
+        self.config = Config(latitude, longitude)
+        self.services = Services()
+        self.data: dict[str, Any] = {}
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return asyncio.get_running_loop()
+
+    async def async_add_executor_job(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def async_create_task(self, coro: Any, name: str | None = None, eager_start: bool = False) -> asyncio.Task:
+        return asyncio.get_running_loop().create_task(coro)
+
+    def async_create_background_task(self, coro: Any, name: str | None = None, eager_start: bool = False) -> asyncio.Task:
+        return asyncio.get_running_loop().create_task(coro)
+
+
+class ConfigEntry:
+    def __init__(self, entry_id: str, data: dict[str, Any], options: dict[str, Any] | None = None) -> None:
+        self.entry_id = entry_id
+        self.title = data.get("name", entry_id)
+        self.data = data
+        self.options = options or {}
+
+    def async_on_unload(self, func: Callable[[], None]) -> None:
+        pass
+
+    def async_create_background_task(self, hass: HomeAssistant, coro: Any, name: str | None = None, eager_start: bool = False) -> asyncio.Task:
+        return hass.async_create_background_task(coro, name)
+
+
+class HomeAssistantError(Exception):
+    pass
+
+
+class ServiceValidationError(HomeAssistantError):
+    pass
+
+
+class UpdateFailed(Exception):
+    pass
+
+
+class DataUpdateCoordinator:
+    def __class_getitem__(cls, item: Any) -> type:
+        return cls
+
+    def __init__(self, hass: HomeAssistant, logger: Any, *, name: str, update_interval: timedelta | None = None, always_update: bool = True) -> None:
+        self.hass = hass
+        self.logger = logger
+        self.name = name
+        self.update_interval = update_interval
+        self.always_update = always_update
+        self.data: Any = None
+        self.last_update_success = True
+
+    async def async_refresh(self) -> None:
+        self.data = await self._async_update_data()
+
+    async def async_request_refresh(self) -> None:
+        await self.async_refresh()
+
+    def async_set_updated_data(self, data: Any) -> None:
+        self.data = data
+
+    def async_update_listeners(self) -> None:
+        pass
+
+
+class Store:
+    def __class_getitem__(cls, item: Any) -> type:
+        return cls
+
+    def __init__(self, hass: HomeAssistant, version: int, key: str, private: bool = False, **kwargs: Any) -> None:
+        self.key = key
+
+    async def async_load(self) -> Any:
+        return None
+
+    def async_delay_save(self, func: Callable[[], Any], delay: float = 0) -> None:
+        pass
+
+    async def async_save(self, data: Any) -> None:
+        pass
+
+    async def async_remove(self) -> None:
+        pass
+
+
+class Debouncer:
+    def __init__(self, hass: HomeAssistant, logger: Any, *, cooldown: float, immediate: bool, function: Callable[[], Any] | None = None) -> None:
+        self.function = function
+
+    def async_schedule_call(self) -> None:
+        pass
+
+    async def async_call(self) -> None:
+        if self.function is not None:
+            await self.function()
+
+    def async_cancel(self) -> None:
+        pass
+
+
+def _module(name: str, **attrs: Any) -> types.ModuleType:
+    mod = sys.modules.get(name)
+    if mod is None:
+        mod = types.ModuleType(name)
+        sys.modules[name] = mod
+        parent, _, child = name.rpartition(".")
+        if parent:
+            setattr(_module(parent), child, mod)
+    for key, value in attrs.items():
+        setattr(mod, key, value)
+    return mod
+
+
+def _parse_datetime(value: str) -> datetime | None:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_date(value: str) -> date | None:
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def install(clock: Clock, recorder: Recorder, time_zone: str = "Europe/Oslo") -> None:
+    """Register the stub modules under `homeassistant.*`."""
+    tz = ZoneInfo(time_zone)
+    _module(
+        "homeassistant.util.dt",
+        DEFAULT_TIME_ZONE=tz,
+        UTC=UTC,
+        utcnow=lambda: clock.now,
+        now=lambda: clock.now.astimezone(tz),
+        parse_datetime=_parse_datetime,
+        parse_date=_parse_date,
+        as_utc=lambda d: d.astimezone(UTC),
+        utc_from_timestamp=lambda ts: datetime.fromtimestamp(ts, UTC),
+    )
+    _module("homeassistant.config_entries", ConfigEntry=ConfigEntry)
+    _module(
+        "homeassistant.core",
+        HomeAssistant=HomeAssistant,
+        Event=types.SimpleNamespace,
+        ServiceCall=object,
+        ServiceResponse=dict,
+        SupportsResponse=types.SimpleNamespace(NONE="none", OPTIONAL="optional", ONLY="only"),
+        callback=lambda func: func,
+    )
+    _module("homeassistant.exceptions", HomeAssistantError=HomeAssistantError, ServiceValidationError=ServiceValidationError)
+    _module("homeassistant.helpers.config_validation", string=str, ensure_list=lambda v: v if isinstance(v, list) else [v])
+    _module("homeassistant.helpers.update_coordinator", DataUpdateCoordinator=DataUpdateCoordinator, UpdateFailed=UpdateFailed)
+    _module("homeassistant.helpers.storage", Store=Store)
+    _module("homeassistant.helpers.json", json_bytes=lambda obj: json.dumps(obj, default=str).encode())
+    _module("homeassistant.helpers.debounce", Debouncer=Debouncer)
+    _module("homeassistant.helpers.entity_registry", async_get=lambda hass: types.SimpleNamespace(async_get=lambda entity_id: None))
+    _module(
+        "homeassistant.helpers.event",
+        EventStateChangedData=dict,
+        async_track_state_change_event=lambda hass, entity_ids, action: lambda: None,
+    )
+    _module(
+        "homeassistant.components.websocket_api",
+        ERR_NOT_FOUND="not_found",
+        ERR_INVALID_FORMAT="invalid_format",
+        ActiveConnection=object,
+        websocket_command=lambda schema: lambda func: func,
+        async_response=lambda func: func,
+        async_register_command=lambda hass, func: None,
+    )
+
+    class _Instance:
+        async def async_add_executor_job(self, func: Callable[..., Any], *args: Any) -> Any:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    _module("homeassistant.components.recorder", get_instance=lambda hass: _Instance())
+    _module("homeassistant.components.recorder.history", get_significant_states=recorder.get_significant_states)
+    _module("homeassistant.components.recorder.statistics", statistics_during_period=recorder.statistics_during_period)
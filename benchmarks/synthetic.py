@@ -0,0 +1,92 @@
+"""Deterministic synthetic histories for a solar-charged battery node.
+
+SoC integrates a constant load against a clipped-sine solar day scaled by
+a per-hour weather factor, so the model has a real signal to fit. All
+generators take a seed and produce the same rows for the same arguments.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+import math
+import random
+from typing import Any
+
+from hass_stub import State
+
+CONDITIONS = (
+    ("sunny", 10, 0, 1.0),
+    ("partlycloudy", 45, 10, 0.7),
+    ("cloudy", 85, 20, 0.35),
+    ("rainy", 100, 80, 0.15),
+)
+
+
+@dataclass(frozen=True)
+class Node:
+    battery_entity: str
+    voltage_entity: str
+    cap_wh: float = 2 * 3.5 * 3.7
+    load_w: float = 0.45
+    solar_peak_w: float = 1.6
+
+
+def _sun(ts: datetime, utc_offset_h: float = 1.0) -> float:
+    h = (ts.hour + ts.minute / 60.0 + utc_offset_h) % 24.0
+    return max(0.0, math.sin((h - 4.0) / 16.0 * math.pi)) if 4.0 < h < 20.0 else 0.0
+
+
+def weather_states(entity_id: str, start: datetime, end: datetime, seed: int, step_s: float = 3600.0) -> list[State]:
+    """Hourly (by default) weather entity states with condition, cloud and rain attributes."""
+    rnd = random.Random(f"{seed}:{entity_id}")
+    rows: list[State] = []
+    t = start
+    while t <= end:
+        cond, cloud, rain, _ = rnd.choice(CONDITIONS)
+        rows.append(State(entity_id, cond, t, {"cloud_coverage": cloud, "precipitation_probability": rain}))
+        t += timedelta(seconds=step_s)
+    return rows
+
+
+def node_states(
+    node: Node, weather: list[State], start: datetime, end: datetime, step_s: float, seed: int
+) -> tuple[list[State], list[State]]:
+    """Battery SoC states every ~`step_s` (±10 % jitter) and voltage states every third sample."""
+    rnd = random.Random(f"{seed}:{node.battery_entity}")
+    factors = {cond: f for cond, _, _, f in CONDITIONS}
+    soc = 60.0
+    battery: list[State] = []
+    voltage: list[State] = []
+    k = 0
+    t = start
+    while t <= end:
+        while k + 1 < len(weather) and weather[k + 1].last_updated <= t:
+            k += 1
+        wf = factors.get(weather[k].state, 1.0) if weather else 1.0
+        dt = step_s * rnd.uniform(0.9, 1.1)
+        p_net = -node.load_w + node.solar_peak_w * _sun(t) * wf
+        soc = max(0.0, min(100.0, soc + p_net * (dt / 3600.0) / node.cap_wh * 100.0 + rnd.gauss(0.0, 0.05)))
+        battery.append(State(node.battery_entity, f"{soc:.2f}", t))
+        if len(battery) % 3 == 1:
+            voltage.append(State(node.voltage_entity, f"{3.3 + soc / 100.0 * 0.9:.3f}", t + timedelta(seconds=step_s / 2)))
+        t += timedelta(seconds=dt)
+    return battery, voltage
+
+
+def hourly_forecast(now: datetime, seed: int, hours: int = 48) -> list[dict[str, Any]]:
+    """`weather.get_forecasts` rows for the next `hours` hours."""
+    rnd = random.Random(f"{seed}:forecast:{now.isoformat()}")
+    base = now.replace(minute=0, second=0, microsecond=0)
+    out: list[dict[str, Any]] = []
+    for h in range(1, hours + 1):
+        cond, cloud, rain, _ = rnd.choice(CONDITIONS)
+        out.append(
+            {
+                "datetime": (base + timedelta(hours=h)).isoformat(),
+                "condition": cond,
+                "cloud_coverage": cloud,
+                "precipitation_probability": rain,
+            }
+        )
+    return out
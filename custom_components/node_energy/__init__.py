@@ -1,20 +1,48 @@
 from __future__ import annotations
 
+import voluptuous as vol
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
 
-from .const import DOMAIN, PLATFORMS
+from .const import CONF_INCREMENTAL_UPDATES, DATA_WEBSOCKET_REGISTERED, DEFAULT_INCREMENTAL_UPDATES, DOMAIN, MAX_CELLS, PLATFORMS
 from .coordinator import NodeEnergyCoordinator
+from .scenarios import SCENARIO_VARIANTS
+from .storage import async_remove_snapshot
+from .websocket_api import async_register_websocket_commands
+
+SCENARIOS_SCHEMA = vol.Schema(
+    {
+        vol.Required("entry_id"): cv.string,
+        vol.Required("cells"): vol.All(
+            cv.ensure_list, vol.Length(min=1, max=MAX_CELLS), [vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_CELLS))]
+        ),
+        vol.Optional("variants", default=list(SCENARIO_VARIANTS)): vol.All(cv.ensure_list, [vol.In(SCENARIO_VARIANTS)]),
+    }
+)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     coordinator = NodeEnergyCoordinator(hass, entry)
-    # Keep entry load resilient even if recorder/weather is not ready yet.
-    await coordinator.async_refresh()
+    if await coordinator.async_restore_snapshot():
+        # Entities start from the snapshot while the first refresh reads the window from the recorder again.
+        entry.async_create_background_task(hass, coordinator.async_refresh(), f"{DOMAIN}-{entry.entry_id}-refresh")
+    else:
+        # Keep entry load resilient even if recorder/weather is not ready yet.
+        await coordinator.async_refresh()
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    domain_data[entry.entry_id] = coordinator
+    if not domain_data.get(DATA_WEBSOCKET_REGISTERED):
+        async_register_websocket_commands(hass)
+        domain_data[DATA_WEBSOCKET_REGISTERED] = True
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if coordinator.cfg.get(CONF_INCREMENTAL_UPDATES, DEFAULT_INCREMENTAL_UPDATES):
+        entry.async_on_unload(coordinator.async_track_live_updates())
+
     if not hass.services.has_service(DOMAIN, "refresh"):
         async def _refresh_service(call):
             target = call.data.get("entry_id")
@@ -31,6 +59,20 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
         hass.services.async_register(DOMAIN, "refresh", _refresh_service)
 
+    if not hass.services.has_service(DOMAIN, "scenarios"):
+        async def _scenarios_service(call: ServiceCall) -> ServiceResponse:
+            coord = hass.data.get(DOMAIN, {}).get(call.data["entry_id"])
+            if not isinstance(coord, NodeEnergyCoordinator):
+                raise ServiceValidationError(f"Unknown entry_id: {call.data['entry_id']}")
+            result = coord.get_scenarios(call.data["cells"], call.data["variants"])
+            if result is None:
+                raise HomeAssistantError("No forecast has been computed yet")
+            return result
+
+        hass.services.async_register(
+            DOMAIN, "scenarios", _scenarios_service, schema=SCENARIOS_SCHEMA, supports_response=SupportsResponse.ONLY
+        )
+
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
     return True
 
@@ -40,12 +82,26 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         domain_data = hass.data.get(DOMAIN)
         if isinstance(domain_data, dict):
-            domain_data.pop(entry.entry_id, None)
-        if isinstance(domain_data, dict) and (not domain_data) and hass.services.has_service(DOMAIN, "refresh"):
-            hass.services.async_remove(DOMAIN, "refresh")
+            coord = domain_data.pop(entry.entry_id, None)
+            if isinstance(coord, NodeEnergyCoordinator):
+                coord.async_release_shared()
+                # Written through the entry's shared store, so a later
+                # async_remove_entry cannot be undone by a delayed save.
+                await coord.async_flush_snapshot()
+        has_coordinators = isinstance(domain_data, dict) and any(
+            isinstance(v, NodeEnergyCoordinator) for v in domain_data.values()
+        )
+        if not has_coordinators:
+            for service in ("refresh", "scenarios"):
+                if hass.services.has_service(DOMAIN, service):
+                    hass.services.async_remove(DOMAIN, service)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await async_remove_snapshot(hass, entry.entry_id)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     unload_ok = await async_unload_entry(hass, entry)
     if unload_ok:
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass
+import math
+from typing import Any
+
+from .estimator import NIGHT_SUN_PROXY, LoadSolarEstimator
+from .intervals import IntervalStore
+
+
+@dataclass(frozen=True)
+class Fold:
+    """Errors of one holdout: fit as of `anchor`, then free-run SoC over the test intervals."""
+
+    anchor: float
+    n_train: int
+    n_test: int
+    n_err: int
+    first_t: float
+    last_t: float
+    abs_sum: float
+    sq_sum: float
+    err_sum: float
+    end_err: float
+    obs_day_wh: float
+    pred_day_wh: float
+    day_samples: int
+
+
+def run_fold(
+    store: IntervalStore, estimator: LoadSolarEstimator, cap_wh: float, anchor: float, until: float | None = None
+) -> Fold | None:
+    """Holdout on the intervals after `anchor` (up to `until`); None when either side is too short."""
+    split = store.index_after(anchor)
+    end = len(store) if until is None else store.index_after(until)
+    if split < 6 or end - split < 4 or cap_wh <= 0:
+        return None
+
+    load_w, solar_peak_w = estimator.fit(split)
+    soc = store.soc0[split]
+    errs: list[float] = []
+    obs_day_wh = 0.0
+    pred_day_wh = 0.0
+    day_samples = 0
+    for i in range(split, end):
+        dt_h = store.dt_h[i]
+        if dt_h <= 0:
+            continue
+        sproxy = store.sun_proxy[i]
+        sx = sproxy * store.wf[i]
+        p_net_pred = -load_w + solar_peak_w * sx
+        soc += (p_net_pred * dt_h / cap_wh) * 100.0
+        soc = max(0.0, min(100.0, soc))
+        errs.append(soc - store.soc1[i])
+
+        if sproxy > NIGHT_SUN_PROXY:
+            p_obs = cap_wh * (store.dsoc[i] / 100.0) / dt_h
+            obs_day_wh += max(0.0, p_obs + load_w) * dt_h
+            pred_day_wh += max(0.0, solar_peak_w * sx) * dt_h
+            day_samples += 1
+
+    if not errs:
+        return None
+    return Fold(
+        anchor=anchor,
+        n_train=split,
+        n_test=end - split,
+        n_err=len(errs),
+        first_t=store.t[split],
+        last_t=store.t[end - 1],
+        abs_sum=sum(abs(e) for e in errs),
+        sq_sum=sum(e * e for e in errs),
+        err_sum=sum(errs),
+        end_err=errs[-1],
+        obs_day_wh=obs_day_wh,
+        pred_day_wh=pred_day_wh,
+        day_samples=day_samples,
+    )
+
+
+class RollingBacktest:
+    """Rolling-origin backtest over anchors every `anchor_hours` within the last `window_days`.
+
+    Folds are cached by (anchor, horizon) and only recomputed when their test
+    intervals changed, so a refresh evaluates just the anchors that became
+    complete since the previous one. The training side of a cached fold is
+    not revalidated: the fit as of an old anchor only moves when the start of
+    the model window slides, which is negligible next to the test error.
+    """
+
+    def __init__(self, anchor_hours: int, window_days: int, horizons_h: tuple[int, ...]) -> None:
+        self.anchor_s = anchor_hours * 3600.0
+        self.window_s = window_days * 86400.0
+        self.horizons_h = horizons_h
+        self._folds: dict[tuple[float, int], Fold | None] = {}
+        self.computed = 0
+
+    def copy(self) -> RollingBacktest:
+        out = copy.copy(self)
+        out._folds = dict(self._folds)
+        return out
+
+    def _current(self, key: tuple[float, int], store: IntervalStore) -> bool:
+        if key not in self._folds:
+            return False
+        fold = self._folds[key]
+        if fold is None:
+            # Too short when first seen; retry in case history was backfilled.
+            return False
+        split = store.index_after(fold.anchor)
+        end = split + fold.n_test
+        return end <= len(store) and store.t[split] == fold.first_t and store.t[end - 1] == fold.last_t
+
+    def update(self, store: IntervalStore, estimator: LoadSolarEstimator, cap_wh: float) -> dict[int, dict[str, Any]]:
+        """Bring the folds up to date with `store`; returns aggregates per horizon (hours)."""
+        self.computed = 0
+        if not len(store):
+            self._folds.clear()
+            return {}
+        last = store.t[-1]
+        oldest = last - self.window_s
+        self._folds = {key: fold for key, fold in self._folds.items() if key[0] >= oldest}
+
+        out: dict[int, dict[str, Any]] = {}
+        for h in self.horizons_h:
+            horizon_s = h * 3600.0
+            anchor = math.floor((last - horizon_s) / self.anchor_s) * self.anchor_s
+            folds: list[Fold] = []
+            while anchor >= oldest:
+                key = (anchor, h)
+                if not self._current(key, store):
+                    self._folds[key] = run_fold(store, estimator, cap_wh, anchor, anchor + horizon_s)
+                    self.computed += 1
+                if (fold := self._folds[key]) is not None:
+                    folds.append(fold)
+                anchor -= self.anchor_s
+            out[h] = _aggregate(folds)
+        return out
+
+    def __len__(self) -> int:
+        return len(self._folds)
+
+
+def _aggregate(folds: list[Fold]) -> dict[str, Any]:
+    n = sum(f.n_err for f in folds)
+    if not folds or not n:
+        return {"folds": 0}
+    pred_day_wh = sum(f.pred_day_wh for f in folds)
+    return {
+        "folds": len(folds),
+        "samples": n,
+        "mae_soc": sum(f.abs_sum for f in folds) / n,
+        "rmse_soc": math.sqrt(sum(f.sq_sum for f in folds) / n),
+        "bias_soc": sum(f.err_sum for f in folds) / n,
+        "end_mae_soc": sum(abs(f.end_err) for f in folds) / len(folds),
+        "solar_scale_raw": sum(f.obs_day_wh for f in folds) / pred_day_wh if pred_day_wh > 1e-6 else 1.0,
+        "daylight_samples": sum(f.day_samples for f in folds) / len(folds),
+    }
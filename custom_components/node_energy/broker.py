@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_right
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN, HISTORY_COALESCE_SECONDS, HISTORY_COALESCE_START_SPREAD_MINUTES
+
+
+def _state_ts(st: Any) -> datetime:
+    return getattr(st, "last_updated", None) or getattr(st, "last_changed", None)
+
+
+@dataclass
+class _Request:
+    entity_id: str
+    start: datetime
+    include_start_time_state: bool
+    parse: Callable[[list[Any]], Any]
+    future: asyncio.Future[Any] = field(repr=False)
+
+
+class HistoryBroker:
+    """Coalesces recorder history requests of all entries into one executor job.
+
+    Requests arriving within HISTORY_COALESCE_SECONDS of the first one are
+    answered together in one executor job. Within it, requests with the same
+    start-time-state flag whose starts lie within
+    HISTORY_COALESCE_START_SPREAD_MINUTES of each other share one
+    multi-entity get_significant_states call from the oldest of those starts,
+    so one stale buffer does not turn every incremental query into a window
+    scan. Each request then gets the states of its own entity after its own
+    start (plus, when asked for, the newest state at or before it, which
+    callers retime), parsed by its own `parse` inside the same job.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._pending: list[_Request] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self.requests = 0
+        self.queries = 0
+        self.jobs = 0
+
+    async def async_get(
+        self,
+        entity_id: str,
+        start_utc: datetime,
+        include_start_time_state: bool,
+        parse: Callable[[list[Any]], Any],
+    ) -> Any:
+        future = self._hass.loop.create_future()
+        self._pending.append(_Request(entity_id, start_utc, include_start_time_state, parse, future))
+        self.requests += 1
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(HISTORY_COALESCE_SECONDS, self._flush)
+        return await future
+
+    @callback
+    def _flush(self) -> None:
+        self._flush_handle = None
+        batch, self._pending = self._pending, []
+        self._hass.async_create_background_task(self._async_run(batch), f"{DOMAIN}-history-broker")
+
+    async def _async_run(self, batch: list[_Request]) -> None:
+        from homeassistant.components.recorder import get_instance
+
+        self.jobs += 1
+        try:
+            # Database work belongs on the recorder's executor, not the shared one.
+            results = await get_instance(self._hass).async_add_executor_job(self._query, batch)
+        except Exception as err:
+            for req in batch:
+                if not req.future.done():
+                    req.future.set_exception(err)
+            return
+        for req, result in zip(batch, results, strict=True):
+            if req.future.done():
+                continue
+            if isinstance(result, Exception):
+                req.future.set_exception(result)
+            else:
+                req.future.set_result(result)
+
+    def _query(self, batch: list[_Request]) -> list[Any]:
+        # recorder helper API varies by HA versions; keep fallback-safe.
+        from homeassistant.components.recorder.history import get_significant_states
+
+        spread = timedelta(minutes=HISTORY_COALESCE_START_SPREAD_MINUTES)
+        groups: list[list[_Request]] = []
+        for req in sorted(batch, key=lambda r: (r.include_start_time_state, r.start)):
+            group = groups[-1] if groups else None
+            if (
+                group is not None
+                and group[0].include_start_time_state == req.include_start_time_state
+                and req.start - group[0].start <= spread
+            ):
+                group.append(req)
+            else:
+                groups.append([req])
+
+        states: dict[int, list[Any]] = {}
+        for group in groups:
+            res = get_significant_states(
+                self._hass,
+                group[0].start,
+                None,
+                list(dict.fromkeys(req.entity_id for req in group)),
+                include_start_time_state=group[0].include_start_time_state,
+                significant_changes_only=False,
+                minimal_response=False,
+                no_attributes=False,
+            )
+            self.queries += 1
+            res = res if isinstance(res, dict) else {}
+            for req in group:
+                states[id(req)] = res.get(req.entity_id, [])
+
+        out: list[Any] = []
+        for req in batch:
+            items = states[id(req)]
+            idx = bisect_right(items, req.start, key=_state_ts)
+            if req.include_start_time_state and idx > 0:
+                idx -= 1
+            try:
+                out.append(req.parse(items[idx:]))
+            except Exception as err:
+                out.append(err)
+        return out
+
+    def stats(self) -> dict[str, Any]:
+        return {"requests": self.requests, "queries": self.queries, "jobs": self.jobs}
@@ -10,23 +10,40 @@ from homeassistant.helpers import selector
 from homeassistant.util import dt as dt_util
 
 from .const import (
+    CONF_ALL_SCENARIOS,
     CONF_ANALYSIS_START,
     CONF_BATTERY_ENTITY,
     CONF_CELL_MAH,
     CONF_CELL_V,
     CONF_CELLS_CURRENT,
+    CONF_CHART_POINTS,
+    CONF_CHART_PRECISION,
     CONF_HORIZON_DAYS,
+    CONF_INCREMENTAL_UPDATES,
+    CONF_MODEL_HALF_LIFE_DAYS,
     CONF_NAME,
+    CONF_RAW_HISTORY_DAYS,
+    CONF_SERIES_ATTRIBUTES,
     CONF_START_DATE,
     CONF_START_HOUR,
     CONF_VOLTAGE_ENTITY,
+    CONF_WEATHER_CACHE_MINUTES,
     CONF_WEATHER_ENTITY,
+    DEFAULT_ALL_SCENARIOS,
     DEFAULT_CELL_MAH,
     DEFAULT_CELL_V,
     DEFAULT_CELLS_CURRENT,
+    DEFAULT_CHART_POINTS,
+    DEFAULT_CHART_PRECISION,
     DEFAULT_HORIZON_DAYS,
+    DEFAULT_INCREMENTAL_UPDATES,
+    DEFAULT_MODEL_HALF_LIFE_DAYS,
     DEFAULT_NAME,
+    DEFAULT_RAW_HISTORY_DAYS,
+    DEFAULT_SERIES_ATTRIBUTES,
+    DEFAULT_WEATHER_CACHE_MINUTES,
     DOMAIN,
+    MAX_CELLS,
 )
 
 
@@ -74,7 +91,7 @@ def _schema(defaults: dict[str, Any]) -> vol.Schema:
 
     fields[vol.Optional(CONF_ANALYSIS_START, default=analysis_start_default)] = str
     fields[vol.Required(CONF_CELLS_CURRENT, default=defaults.get(CONF_CELLS_CURRENT, DEFAULT_CELLS_CURRENT))] = selector.NumberSelector(
-        selector.NumberSelectorConfig(min=1, max=12, step=1, mode=selector.NumberSelectorMode.BOX)
+        selector.NumberSelectorConfig(min=1, max=MAX_CELLS, step=1, mode=selector.NumberSelectorMode.BOX)
     )
     fields[vol.Required(CONF_CELL_MAH, default=defaults.get(CONF_CELL_MAH, DEFAULT_CELL_MAH))] = selector.NumberSelector(
         selector.NumberSelectorConfig(min=200, max=10000, step=50, mode=selector.NumberSelectorMode.BOX)
@@ -88,6 +105,33 @@ def _schema(defaults: dict[str, Any]) -> vol.Schema:
     return vol.Schema(fields)
 
 
+def _options_schema(defaults: dict[str, Any]) -> vol.Schema:
+    return _schema(defaults).extend(
+        {
+            vol.Optional(CONF_SERIES_ATTRIBUTES, default=defaults.get(CONF_SERIES_ATTRIBUTES, DEFAULT_SERIES_ATTRIBUTES)): selector.BooleanSelector(),
+            vol.Optional(CONF_CHART_POINTS, default=defaults.get(CONF_CHART_POINTS, DEFAULT_CHART_POINTS)): selector.NumberSelector(
+                selector.NumberSelectorConfig(min=0, max=20000, step=100, mode=selector.NumberSelectorMode.BOX)
+            ),
+            vol.Optional(CONF_CHART_PRECISION, default=defaults.get(CONF_CHART_PRECISION, DEFAULT_CHART_PRECISION)): selector.NumberSelector(
+                selector.NumberSelectorConfig(min=0, max=6, step=1, mode=selector.NumberSelectorMode.BOX)
+            ),
+            vol.Optional(CONF_ALL_SCENARIOS, default=defaults.get(CONF_ALL_SCENARIOS, DEFAULT_ALL_SCENARIOS)): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_WEATHER_CACHE_MINUTES, default=defaults.get(CONF_WEATHER_CACHE_MINUTES, DEFAULT_WEATHER_CACHE_MINUTES)
+            ): selector.NumberSelector(selector.NumberSelectorConfig(min=0, max=120, step=1, mode=selector.NumberSelectorMode.BOX)),
+            vol.Optional(CONF_RAW_HISTORY_DAYS, default=defaults.get(CONF_RAW_HISTORY_DAYS, DEFAULT_RAW_HISTORY_DAYS)): selector.NumberSelector(
+                selector.NumberSelectorConfig(min=0, max=90, step=1, mode=selector.NumberSelectorMode.BOX)
+            ),
+            vol.Optional(
+                CONF_INCREMENTAL_UPDATES, default=defaults.get(CONF_INCREMENTAL_UPDATES, DEFAULT_INCREMENTAL_UPDATES)
+            ): selector.BooleanSelector(),
+            vol.Optional(
+                CONF_MODEL_HALF_LIFE_DAYS, default=defaults.get(CONF_MODEL_HALF_LIFE_DAYS, DEFAULT_MODEL_HALF_LIFE_DAYS)
+            ): selector.NumberSelector(selector.NumberSelectorConfig(min=0, max=365, step=1, mode=selector.NumberSelectorMode.BOX)),
+        }
+    )
+
+
 class NodeEnergyConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
@@ -114,4 +158,4 @@ class NodeEnergyOptionsFlow(config_entries.OptionsFlow):
             return self.async_create_entry(title="", data=user_input)
 
         defaults = {**self._entry.data, **self._entry.options}
-        return self.async_show_form(step_id="init", data_schema=_schema(defaults), errors={})
+        return self.async_show_form(step_id="init", data_schema=_options_schema(defaults), errors={})
@@ -1,6 +1,13 @@
 DOMAIN = "node_energy"
 PLATFORMS = ["sensor"]
 
+# Shared, non-entry objects kept next to the coordinators in hass.data[DOMAIN].
+DATA_SOLAR_TABLE = "solar_table"
+DATA_WEBSOCKET_REGISTERED = "websocket_registered"
+DATA_WEATHER_CACHE = "weather_cache"
+DATA_HISTORY_BROKER = "history_broker"
+DATA_SNAPSHOT_STORES = "snapshot_stores"
+
 CONF_NAME = "name"
 CONF_BATTERY_ENTITY = "battery_entity"
 CONF_VOLTAGE_ENTITY = "voltage_entity"
@@ -12,16 +19,64 @@ CONF_CELLS_CURRENT = "cells_current"
 CONF_CELL_MAH = "cell_mah"
 CONF_CELL_V = "cell_v"
 CONF_HORIZON_DAYS = "horizon_days"
+CONF_SERIES_ATTRIBUTES = "series_attributes"
+CONF_CHART_POINTS = "chart_points"
+CONF_CHART_PRECISION = "chart_precision"
+CONF_ALL_SCENARIOS = "all_scenarios"
+CONF_WEATHER_CACHE_MINUTES = "weather_cache_minutes"
+CONF_RAW_HISTORY_DAYS = "raw_history_days"
+CONF_INCREMENTAL_UPDATES = "incremental_updates"
+CONF_MODEL_HALF_LIFE_DAYS = "model_half_life_days"
 
 DEFAULT_NAME = "Battery Telemetry Forecast"
 DEFAULT_START_HOUR = 16
 DEFAULT_CELLS_CURRENT = 2
 DEFAULT_CELL_MAH = 3500
 DEFAULT_CELL_V = 3.7
+# Largest cell count accepted by the config flow, the scenarios service and the websocket API.
+MAX_CELLS = 12
 DEFAULT_HORIZON_DAYS = 7
+DEFAULT_SERIES_ATTRIBUTES = False
+DEFAULT_CHART_POINTS = 1000
+DEFAULT_CHART_PRECISION = 3
+DEFAULT_ALL_SCENARIOS = False
+DEFAULT_WEATHER_CACHE_MINUTES = 10
+DEFAULT_RAW_HISTORY_DAYS = 0
+DEFAULT_INCREMENTAL_UPDATES = False
+DEFAULT_MODEL_HALF_LIFE_DAYS = 0
 DEFAULT_MODEL_WINDOW_DAYS = 90
 DEFAULT_PAYLOAD_WINDOW_DAYS = 30
 UPDATE_INTERVAL_MINUTES = 30
+# With incremental updates the full recompute only runs as a periodic consistency check.
+INCREMENTAL_UPDATE_INTERVAL_MINUTES = 180
+# Minimum spacing between two incremental updates triggered by state changes.
+LIVE_UPDATE_COOLDOWN_SECONDS = 30
+# While no input changed, refreshes only advance the projection; the model is still
+# recomputed this often so the forecast grid keeps its horizon and the window slides.
+UNCHANGED_INPUTS_MAX_AGE_MINUTES = 180
+# Relative change of the load/solar fit after which the empirical weather sketch is rebuilt.
+WEATHER_SKETCH_DRIFT = 0.02
+# Rolling-origin backtest: anchor spacing, how far back anchors go and the evaluated horizons.
+BACKTEST_ANCHOR_HOURS = 6
+BACKTEST_WINDOW_DAYS = 14
+BACKTEST_HORIZON_HOURS = (6, 24, 72)
+# Extra chart views (hours before and after now) next to the full payload window.
+CHART_VIEW_HOURS = (72,)
+# Bump when the layout of the compact `chart` payload changes.
+CHART_FORMAT_VERSION = 1
+
+STORAGE_VERSION = 2
+SNAPSHOT_SAVE_DELAY_SECONDS = 60
+FETCH_TIMEOUT_HISTORY_SECONDS = 120
+FETCH_TIMEOUT_FORECAST_SECONDS = 30
+# Recorder requests from all entries arriving within this window share one query.
+HISTORY_COALESCE_SECONDS = 0.05
+# Only requests whose starts lie this close together share one query; the rest are queried separately.
+HISTORY_COALESCE_START_SPREAD_MINUTES = 60
+# Entities whose statistics query came back empty read raw history until this long has passed.
+NO_STATISTICS_RETRY_MINUTES = 60
+# Refreshes kept for diagnostics (stage timings, row counts, payload sizes).
+DIAGNOSTICS_REFRESHES = 20
 
 ATTR_HISTORY_SOC = "history_soc"
 ATTR_HISTORY_VOLTAGE = "history_voltage"
@@ -31,6 +86,8 @@ ATTR_FORECAST = "forecast"
 ATTR_MODEL = "model"
 ATTR_META = "meta"
 ATTR_APEX_SERIES = "apex_series"
+ATTR_APEX_VIEWS = "apex_views"
+ATTR_CHART = "chart"
 ATTR_NO_SUN_RUNTIME_DAYS = "no_sun_runtime_days"
 ATTR_NET_POWER_NOW_W = "net_power_now_w"
 ATTR_NET_POWER_AVG_24H_W = "net_power_avg_24h_w"
@@ -40,3 +97,15 @@ ATTR_ENERGY_CHARGED_KWH_TOTAL = "energy_charged_kwh_total"
 ATTR_ENERGY_DISCHARGED_KWH_TOTAL = "energy_discharged_kwh_total"
 ATTR_FULL_CHARGE_ETA_HOURS = "full_charge_eta_hours"
 ATTR_FULL_CHARGE_AT = "full_charge_at"
+
+# Heavy payload served through the websocket data API instead of state attributes.
+SERIES_KEYS = (
+    ATTR_HISTORY_SOC,
+    ATTR_HISTORY_VOLTAGE,
+    ATTR_HISTORY_WEATHER,
+    ATTR_INTERVALS,
+    ATTR_FORECAST,
+    ATTR_APEX_SERIES,
+    ATTR_APEX_VIEWS,
+    ATTR_CHART,
+)
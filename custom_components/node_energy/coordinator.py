@@ -1,17 +1,28 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from datetime import UTC, datetime, timedelta
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from dataclasses import dataclass, replace
+from datetime import UTC, datetime, timedelta, tzinfo
 import math
-from typing import Any
+import time
+from types import MappingProxyType
+from typing import Any, TypeVar
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import EventStateChangedData, async_track_state_change_event
+from homeassistant.helpers.json import json_bytes
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from homeassistant.util import dt as dt_util
 
 from .const import (
     ATTR_APEX_SERIES,
+    ATTR_APEX_VIEWS,
+    ATTR_CHART,
     ATTR_CHARGE_POWER_NOW_W,
     ATTR_DISCHARGE_POWER_NOW_W,
     ATTR_ENERGY_CHARGED_KWH_TOTAL,
@@ -28,37 +39,88 @@ from .const import (
     ATTR_NET_POWER_AVG_24H_W,
     ATTR_NET_POWER_NOW_W,
     ATTR_NO_SUN_RUNTIME_DAYS,
+    BACKTEST_ANCHOR_HOURS,
+    BACKTEST_HORIZON_HOURS,
+    BACKTEST_WINDOW_DAYS,
+    CHART_FORMAT_VERSION,
+    CHART_VIEW_HOURS,
+    CONF_ALL_SCENARIOS,
     CONF_ANALYSIS_START,
     CONF_BATTERY_ENTITY,
     CONF_CELL_MAH,
     CONF_CELL_V,
     CONF_CELLS_CURRENT,
+    CONF_CHART_POINTS,
+    CONF_CHART_PRECISION,
     CONF_HORIZON_DAYS,
+    CONF_INCREMENTAL_UPDATES,
+    CONF_MODEL_HALF_LIFE_DAYS,
     CONF_NAME,
+    CONF_RAW_HISTORY_DAYS,
+    CONF_SERIES_ATTRIBUTES,
     CONF_START_DATE,
     CONF_START_HOUR,
     CONF_VOLTAGE_ENTITY,
+    CONF_WEATHER_CACHE_MINUTES,
     CONF_WEATHER_ENTITY,
+    DEFAULT_ALL_SCENARIOS,
     DEFAULT_CELL_MAH,
     DEFAULT_CELL_V,
     DEFAULT_CELLS_CURRENT,
+    DEFAULT_CHART_POINTS,
+    DEFAULT_CHART_PRECISION,
     DEFAULT_HORIZON_DAYS,
+    DEFAULT_INCREMENTAL_UPDATES,
+    DEFAULT_MODEL_HALF_LIFE_DAYS,
     DEFAULT_MODEL_WINDOW_DAYS,
     DEFAULT_PAYLOAD_WINDOW_DAYS,
+    DEFAULT_RAW_HISTORY_DAYS,
+    DEFAULT_SERIES_ATTRIBUTES,
     DEFAULT_START_HOUR,
+    DEFAULT_WEATHER_CACHE_MINUTES,
+    DATA_HISTORY_BROKER,
+    DATA_SOLAR_TABLE,
+    DATA_WEATHER_CACHE,
+    DIAGNOSTICS_REFRESHES,
     DOMAIN,
+    FETCH_TIMEOUT_FORECAST_SECONDS,
+    FETCH_TIMEOUT_HISTORY_SECONDS,
+    INCREMENTAL_UPDATE_INTERVAL_MINUTES,
+    LIVE_UPDATE_COOLDOWN_SECONDS,
+    MAX_CELLS,
+    NO_STATISTICS_RETRY_MINUTES,
+    SERIES_KEYS,
+    SNAPSHOT_SAVE_DELAY_SECONDS,
+    UNCHANGED_INPUTS_MAX_AGE_MINUTES,
     UPDATE_INTERVAL_MINUTES,
+    WEATHER_SKETCH_DRIFT,
+)
+from .backtest import RollingBacktest, run_fold
+from .broker import HistoryBroker
+from .scenarios import SCENARIO_VARIANTS, ScenarioEngine
+from .sketch import WeatherSketch
+from .solar import SolarTable, solar_positions, sun_proxy
+from .timeseries import ChartGroup, align_asof
+from .weather import WeatherCache, WeatherTimeline, weather_factor
+from .estimator import LoadSolarEstimator
+from .intervals import EnergyTotals, IntervalStore, iso_utc
+from .history import HistoryBuffer, Sample, StatisticsBuffer, sample_ts, sample_with_ts
+from .storage import (
+    dump_energy_totals,
+    dump_interval_store,
+    dump_weather_sketch,
+    load_energy_totals,
+    load_interval_store,
+    load_weather_sketch,
+    snapshot_store,
 )
 
-
-@dataclass
-class Sample:
-    ts: datetime
-    value: float
+T = TypeVar("T")
 
 
-def _mean(xs: list[float]) -> float:
-    return sum(xs) / len(xs) if xs else 0.0
+def _weighted_mean(xs: Sequence[float], ws: Sequence[float]) -> float:
+    total = sum(ws)
+    return sum(w * x for x, w in zip(xs, ws, strict=True)) / total if total > 0 else 0.0
 
 
 def _parse_float(v: Any) -> float | None:
@@ -68,22 +130,6 @@ def _parse_float(v: Any) -> float | None:
         return None
 
 
-def _quantile(xs: list[float], q: float) -> float:
-    if not xs:
-        return 0.0
-    ys = sorted(float(v) for v in xs)
-    if len(ys) == 1:
-        return ys[0]
-    q = max(0.0, min(1.0, float(q)))
-    pos = q * (len(ys) - 1)
-    lo = int(math.floor(pos))
-    hi = int(math.ceil(pos))
-    if lo == hi:
-        return ys[lo]
-    k = pos - lo
-    return ys[lo] * (1.0 - k) + ys[hi] * k
-
-
 def _clamp(v: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, v))
 
@@ -111,442 +157,1359 @@ def _clip_dict_rows_after(rows: list[dict[str, Any]], key: str, cutoff: datetime
     return out
 
 
-def _fit_load_and_solar(intervals: list[dict[str, Any]], cap_wh: float) -> tuple[float, float]:
-    if not intervals or cap_wh <= 0:
-        return 0.0, 0.0
+def _empirical_weather_factor(store: IntervalStore, i: int, load_w: float, solar_peak_w_raw: float) -> float | None:
+    sproxy = store.sun_proxy[i]
+    if sproxy <= 0.01 or store.dt_h[i] <= 0:
+        return None
+    p_obs = store.net_obs[i]
+    if not math.isfinite(p_obs):
+        p_obs = 0.0
+    obs_prod = max(0.0, p_obs + load_w)
+    clear_prod = max(1e-6, solar_peak_w_raw * sproxy)
+    return max(0.05, min(1.0, obs_prod / clear_prod))
+
+
+def _sync_weather_sketch(
+    sketch: WeatherSketch | None, store: IntervalStore, load_w: float, solar_peak_w_raw: float
+) -> WeatherSketch:
+    # Slide the previous sketch onto this store and add only the intervals it
+    # lacks; rebuild when the fit drifted or earlier intervals were revised.
+    covered = None
+    if sketch is not None and not sketch.drifted(load_w, solar_peak_w_raw, WEATHER_SKETCH_DRIFT):
+        covered = sketch.align(store.t)
+    if sketch is None or covered is None:
+        sketch = WeatherSketch(load_w, solar_peak_w_raw)
+        covered = (0, 0)
+    start, end = covered
+
+    def _add(i: int, front: bool = False) -> None:
+        value = _empirical_weather_factor(store, i, sketch.load_w, sketch.solar_peak_w_raw)
+        sketch.add(store.t[i], store.local_hour[i], value, store.weight[i], front)
+
+    for i in range(start - 1, -1, -1):
+        _add(i, front=True)
+    for i in range(end, len(store)):
+        _add(i)
+    return sketch
+
+
+def _empirical_weather_quantiles(sketch: WeatherSketch, store: IntervalStore) -> dict[str, Any]:
+    # Fallback to historic weather factors if production-derived values are too sparse.
+    if sketch.samples < 6:
+        sketch = sketch.copy()
+        for i in range(len(store)):
+            if store.sun_proxy[i] > 0.01:
+                sketch.add(store.t[i], store.local_hour[i], max(0.05, min(1.0, store.wf[i])), store.weight[i])
+
+    out: dict[str, Any] = {}
+    for name, q, default in (("p10", 0.1, None), ("p20", 0.2, 0.45), ("p50", 0.5, 0.65), ("p90", 0.9, None)):
+        g = sketch.quantile(q)
+        g = _clamp(g, 0.05, 1.0) if g is not None else default
+        hourly = [sketch.quantile(q, h) for h in range(24)]
+        out[f"hourly_{name}"] = [_clamp(v, 0.05, 1.0) if v is not None else g for v in hourly]
+        out[f"global_{name}"] = g
+    out["samples"] = sketch.samples
+    return out
 
-    x: list[float] = []
-    y: list[float] = []
-    for it in intervals:
-        dt_h = float(it.get("dt_h", 0.0))
-        dsoc = float(it.get("dsoc", 0.0))
-        if dt_h <= 0:
-            continue
-        sx = float(it.get("sun_proxy", 0.0)) * float(it.get("weather_factor_hist", 1.0))
-        p_obs = cap_wh * (dsoc / 100.0) / dt_h
-        x.append(sx)
-        y.append(p_obs)
 
-    if not y:
-        return 0.0, 0.0
+def _compute_backtest_24h(store: IntervalStore, estimator: LoadSolarEstimator, cap_wh: float) -> dict[str, float | int] | None:
+    if len(store) < 10:
+        return None
+    fold = run_fold(store, estimator, cap_wh, store.t[-1] - 24 * 3600.0)
+    if fold is None:
+        return None
+    return {
+        "samples_train": fold.n_train,
+        "samples_test": fold.n_test,
+        "mae_soc": fold.abs_sum / fold.n_err,
+        "bias_soc": fold.err_sum / fold.n_err,
+        "rmse_soc": math.sqrt(fold.sq_sum / fold.n_err),
+        "horizon_error_soc": fold.end_err,
+        "solar_scale_raw": (fold.obs_day_wh / fold.pred_day_wh) if fold.pred_day_wh > 1e-6 else 1.0,
+        "daylight_samples_test": fold.day_samples,
+    }
 
-    night_obs = [p for p, sx in zip(y, x, strict=False) if sx <= 0.01]
-    if night_obs:
-        load_w = max(0.0, -_mean(night_obs))
-    else:
-        load_w = max(0.0, -_mean(y))
 
-    day_xy = [(sx, p + load_w) for p, sx in zip(y, x, strict=False) if sx > 0.01]
-    if day_xy:
-        num = sum(sx * yp for sx, yp in day_xy)
-        den = sum(sx * sx for sx, _ in day_xy)
-        solar_peak_w = max(0.0, num / den) if den > 0 else 0.0
-    else:
-        solar_peak_w = max(0.0, _mean(y) + load_w)
-    return load_w, solar_peak_w
-
-
-def _build_empirical_weather_quantiles_by_hour(
-    intervals: list[dict[str, Any]],
-    load_w: float,
-    solar_peak_w_raw: float,
-    q_low: float = 0.2,
-    q_mid: float = 0.5,
-) -> dict[str, Any]:
-    buckets: list[list[float]] = [[] for _ in range(24)]
-    all_vals: list[float] = []
-
-    for it in intervals:
-        sproxy = float(it.get("sun_proxy", 0.0))
-        if sproxy <= 0.01:
-            continue
-        tm = dt_util.parse_datetime(str(it.get("tm", "")))
-        if tm is None:
-            continue
-        dt_h = float(it.get("dt_h", 0.0))
-        dsoc = float(it.get("dsoc", 0.0))
-        if dt_h <= 0:
-            continue
-        p_obs = float(it.get("net_power_obs_w", 0.0))
-        if not math.isfinite(p_obs):
-            p_obs = 0.0
-        obs_prod = max(0.0, p_obs + load_w)
-        clear_prod = max(1e-6, solar_peak_w_raw * sproxy)
-        wf_emp = max(0.05, min(1.0, obs_prod / clear_prod))
-        h = tm.astimezone(dt_util.DEFAULT_TIME_ZONE).hour
-        buckets[h].append(wf_emp)
-        all_vals.append(wf_emp)
+# Bulky series are rebuilt by the first refresh after startup.
+_SNAPSHOT_SKIP_KEYS = frozenset(SERIES_KEYS)
+
+
+# Legacy `apex_series` layout: (chart group, series name) in the original key order.
+_APEX_SERIES_LAYOUT = (
+    ("soc", "soc_actual"),
+    ("forecast", "soc_projection_weather"),
+    ("forecast", "soc_projection_weather_p20"),
+    ("forecast", "soc_projection_clear"),
+    ("forecast", "soc_projection_no_sun"),
+    ("sun", "sun_history"),
+    ("forecast", "sun_forecast"),
+    ("power", "power_observed"),
+    ("power", "power_modeled"),
+    ("power", "power_production_weather"),
+    ("power", "power_production_clear"),
+    ("power", "power_consumption"),
+)
 
-    # Fallback to historic weather factors if production-derived values are too sparse.
-    if len(all_vals) < 6:
-        for it in intervals:
-            sproxy = float(it.get("sun_proxy", 0.0))
-            if sproxy <= 0.01:
-                continue
-            tm = dt_util.parse_datetime(str(it.get("tm", "")))
-            if tm is None:
-                continue
-            wf = float(it.get("weather_factor_hist", 1.0))
-            wf = max(0.05, min(1.0, wf))
-            h = tm.astimezone(dt_util.DEFAULT_TIME_ZONE).hour
-            buckets[h].append(wf)
-            all_vals.append(wf)
-
-    g_low = _clamp(_quantile(all_vals, q_low), 0.05, 1.0) if all_vals else 0.45
-    g_mid = _clamp(_quantile(all_vals, q_mid), 0.05, 1.0) if all_vals else 0.65
-    h_low = [g_low for _ in range(24)]
-    h_mid = [g_mid for _ in range(24)]
-    for h in range(24):
-        if buckets[h]:
-            h_low[h] = _clamp(_quantile(buckets[h], q_low), 0.05, 1.0)
-            h_mid[h] = _clamp(_quantile(buckets[h], q_mid), 0.05, 1.0)
+
+def _interval_extra(store: IntervalStore, start: int, load_w: float, solar_peak_w: float) -> dict[str, list[float]]:
+    """Modeled power columns of the intervals from `start` on, as published with them."""
+    production_clear_w = [solar_peak_w * v for v in store.sun_proxy[start:]]
+    production_w = [p_clear * wf for p_clear, wf in zip(production_clear_w, store.wf[start:], strict=True)]
     return {
-        "hourly_p20": h_low,
-        "hourly_p50": h_mid,
-        "global_p20": g_low,
-        "global_p50": g_mid,
-        "samples": len(all_vals),
+        "production_clear_w": production_clear_w,
+        "production_w": production_w,
+        "consumption_w": [load_w] * len(production_w),
+        "net_power_model_w": [-load_w + p_prod for p_prod in production_w],
     }
 
 
-def _weather_factor_interpolated(points: list[dict[str, Any]], ts: datetime) -> float | None:
-    if not points:
-        return None
-    if ts.tzinfo is None:
-        ts = ts.replace(tzinfo=UTC)
-    else:
-        ts = ts.astimezone(UTC)
+def _net_power_avg_w(store: IntervalStore, since_utc: datetime) -> float | None:
+    energy_wh = 0.0
+    dur_h = 0.0
+    for i in range(store.index_at_or_after(since_utc.timestamp()), len(store)):
+        dt_h = store.dt_h[i]
+        energy_wh += store.net_obs[i] * dt_h
+        dur_h += dt_h
+    return (energy_wh / dur_h) if dur_h > 0 else None
+
+
+def _json_safe(cfg: dict[str, Any]) -> dict[str, Any]:
+    return {k: (v if isinstance(v, (str, int, float, bool)) or v is None else str(v)) for k, v in cfg.items()}
+
+
+def _input_fingerprint(
+    cfg: dict[str, Any],
+    batt_rows: Sequence[Sample],
+    volt_rows: Sequence[Sample],
+    weather_hist_points: Sequence[dict[str, Any]],
+    weather_forecast_points: Sequence[dict[str, Any]],
+) -> tuple[Any, ...]:
+    """What a full recompute depends on apart from the clock: config, newest row per entity and the forecast."""
+    return (
+        hash(tuple(sorted(_json_safe(cfg).items()))),
+        batt_rows[-1].ts if batt_rows else None,
+        volt_rows[-1].ts if volt_rows else None,
+        weather_hist_points[-1]["ts"] if weather_hist_points else None,
+        hash(
+            tuple(
+                (p["ts"], p.get("condition"), p.get("cloud_coverage"), p.get("precipitation_probability"))
+                for p in weather_forecast_points
+            )
+        ),
+    )
 
-    p0 = points[0]["ts"]
-    pN = points[-1]["ts"]
-    if p0.tzinfo is None:
-        p0 = p0.replace(tzinfo=UTC)
-    else:
-        p0 = p0.astimezone(UTC)
-    if pN.tzinfo is None:
-        pN = pN.replace(tzinfo=UTC)
-    else:
-        pN = pN.astimezone(UTC)
-    if ts < p0 or ts > pN:
-        return None
-    if ts == p0:
-        return float(points[0]["factor"])
-    if ts == pN:
-        return float(points[-1]["factor"])
-    for i in range(1, len(points)):
-        a = points[i - 1]
-        b = points[i]
-        ta = a["ts"].replace(tzinfo=UTC) if a["ts"].tzinfo is None else a["ts"].astimezone(UTC)
-        tb = b["ts"].replace(tzinfo=UTC) if b["ts"].tzinfo is None else b["ts"].astimezone(UTC)
-        if ta <= ts <= tb:
-            span = (tb - ta).total_seconds()
-            if span <= 0:
-                return float(a["factor"])
-            k = (ts - ta).total_seconds() / span
-            return float(a["factor"]) + (float(b["factor"]) - float(a["factor"])) * k
-    return None
-
-
-def _compute_backtest_24h(intervals: list[dict[str, Any]], cap_wh: float) -> dict[str, float | int] | None:
-    if len(intervals) < 10 or cap_wh <= 0:
-        return None
 
-    def _tm(it: dict[str, Any]) -> datetime | None:
-        return dt_util.parse_datetime(str(it.get("tm", "")))
+def _parse_statistics(rows: list[dict[str, Any]]) -> list[Sample]:
+    # Hourly means become samples at the hour centre; `start` is an epoch
+    # float on current HA and a datetime on older releases.
+    out: list[Sample] = []
+    for row in rows:
+        mean = _parse_float(row.get("mean"))
+        start = row.get("start")
+        if isinstance(start, (int, float)):
+            start = datetime.fromtimestamp(start, UTC)
+        start = _ensure_utc(start)
+        if mean is None or not math.isfinite(mean) or start is None:
+            continue
+        out.append(Sample(ts=start + timedelta(minutes=30), value=mean))
+    out.sort(key=lambda x: x.ts)
+    return out
+
 
-    enriched: list[dict[str, Any]] = []
-    for it in intervals:
-        tm = _tm(it)
-        if tm is None:
+def _parse_sample_states(items: list[Any]) -> list[Sample]:
+    out: list[Sample] = []
+    for st in items:
+        v = _parse_float(getattr(st, "state", None))
+        if v is None:
             continue
-        e = dict(it)
-        e["_tm"] = tm
-        enriched.append(e)
-    if len(enriched) < 10:
-        return None
-    enriched.sort(key=lambda it: it["_tm"])
+        t = getattr(st, "last_updated", None) or getattr(st, "last_changed", None)
+        t = _ensure_utc(t)
+        if t is None:
+            continue
+        out.append(Sample(ts=t, value=v))
+    out.sort(key=lambda x: x.ts)
+    return out
+
+
+def _parse_weather_states(items: list[Any]) -> list[dict[str, Any]]:
+    out: list[dict[str, Any]] = []
+    for st in items:
+        t = getattr(st, "last_updated", None) or getattr(st, "last_changed", None)
+        t = _ensure_utc(t)
+        if t is None:
+            continue
+        attrs = getattr(st, "attributes", {}) or {}
+        cond = (getattr(st, "state", "") or "").lower()
+        cloud = _parse_float(attrs.get("cloud_coverage"))
+        prob = _parse_float(attrs.get("precipitation_probability"))
+        out.append(
+            {
+                "ts": t,
+                "condition": cond,
+                "cloud_coverage": cloud,
+                "precipitation_probability": prob,
+                "factor": weather_factor(cond, cloud, prob),
+            }
+        )
+    out.sort(key=lambda x: x["ts"])
+    return out
+
 
-    latest_tm = enriched[-1]["_tm"]
-    anchor = latest_tm - timedelta(hours=24)
-    train = [it for it in enriched if it["_tm"] <= anchor]
-    test = [it for it in enriched if it["_tm"] > anchor]
-    if len(train) < 6 or len(test) < 4:
+@dataclass(frozen=True)
+class _ModelInputs:
+    """Everything the model computation reads, captured on the event loop."""
+
+    cfg: Mapping[str, Any]
+    battery_entity: str
+    voltage_entity: str | None
+    weather_entity: str | None
+    start_hour: int
+    start_local: datetime
+    start_utc: datetime
+    explicit_start: bool
+    cells_current: int
+    cell_mah: float
+    cell_v: float
+    horizon_days: int
+    now_utc: datetime
+    tz: tzinfo
+    lat: float
+    lon: float
+    batt_rows: tuple[Sample, ...]
+    coarse_until: datetime | None
+    volt_rows: tuple[Sample, ...]
+    weather_hist_points: tuple[dict[str, Any], ...]
+    weather_forecast_points: tuple[dict[str, Any], ...]
+    # Private copies of state carried between refreshes, updated in place.
+    weather_sketch: WeatherSketch | None
+    estimator: LoadSolarEstimator | None
+    backtest: RollingBacktest
+    energy: EnergyTotals
+    # Serialize the payload to report its size; only done for debug logging.
+    measure_payload: bool = False
+
+
+class _SeriesPayload:
+    """Heavy series of one refresh, each built on its first request and then kept.
+
+    Only `get_series` asks for them, so a refresh nobody looks at builds none
+    of the row dicts, ISO strings or downsampled charts. Building one can
+    take hundreds of ms and is done in the executor: on request by the
+    websocket API, or right after the refresh when the legacy option
+    publishes them as state attributes.
+    """
+
+    def __init__(
+        self,
+        store: IntervalStore,
+        start: int,
+        end: int,
+        interval_extra: dict[str, Sequence[float]],
+        history: dict[str, Sequence[Sample]] | None = None,
+        weather_points: Sequence[dict[str, Any]] | None = None,
+        payload_start_utc: datetime | None = None,
+        charts: dict[str, ChartGroup] | None = None,
+        chart_points: int = DEFAULT_CHART_POINTS,
+        chart_precision: int = DEFAULT_CHART_PRECISION,
+        now_epoch: float = 0.0,
+    ) -> None:
+        self.store = store
+        self.start = start
+        self.end = end
+        self.interval_extra = interval_extra
+        self.history = history
+        self.weather_points = weather_points
+        self.payload_start_utc = payload_start_utc
+        self.charts = charts or {}
+        self.chart_points = chart_points
+        self.chart_precision = chart_precision
+        self.now_epoch = now_epoch
+        self.chart_windows: dict[str, tuple[float | None, float | None]] = {"all": (None, None)}
+        for span_h in CHART_VIEW_HOURS:
+            self.chart_windows[f"{span_h}h"] = (now_epoch - span_h * 3600.0, now_epoch + span_h * 3600.0)
+        self._values: dict[str, Any] = {}
+        self._selection: dict[str, dict[str, list[int]]] = {}
+
+    def get(self, key: str, build: bool = True) -> Any:
+        """Series `key`; None when it is not built yet and `build` is False."""
+        if key not in self._values:
+            if not build:
+                return None
+            self._values[key] = self._build(key)
+        return self._values[key]
+
+    def built(self, key: str) -> bool:
+        return key in self._values
+
+    def build_all(self) -> None:
+        for key in SERIES_KEYS:
+            if key != ATTR_FORECAST:
+                self.get(key)
+
+    def _build(self, key: str) -> Any:
+        if key == ATTR_INTERVALS:
+            return self.store.to_rows(self.start, self.end, extra=self.interval_extra)
+        if key in (ATTR_HISTORY_SOC, ATTR_HISTORY_VOLTAGE):
+            rows = self.history.get(key) if self.history is not None else None
+            return None if rows is None else [{"t": s.ts.isoformat(), "v": s.value} for s in rows]
+        if key == ATTR_HISTORY_WEATHER:
+            if self.weather_points is None or self.payload_start_utc is None:
+                return None
+            return [
+                {
+                    "t": p["ts"].isoformat(),
+                    "condition": p.get("condition", ""),
+                    "cloud_coverage": p.get("cloud_coverage"),
+                    "factor": p.get("factor", 1.0),
+                }
+                for p in _clip_dict_rows_after(list(self.weather_points), "ts", self.payload_start_utc)
+            ]
+        if not self.charts:
+            return None
+        if key == ATTR_CHART:
+            precision = self.chart_precision
+            return {
+                "format": CHART_FORMAT_VERSION,
+                "now": round(self.now_epoch * 1000),
+                "precision": precision,
+                "groups": {name: group.compact(self._select("all")[name], precision) for name, group in self.charts.items()},
+                "views": {
+                    view: {name: group.compact(self._select(view)[name], precision) for name, group in self.charts.items()}
+                    for view in self.chart_windows
+                    if view != "all"
+                },
+            }
+        if key == ATTR_APEX_SERIES:
+            return self._apex_points("all")
+        if key == ATTR_APEX_VIEWS:
+            return {f"{span_h}h": self._apex_points(f"{span_h}h") for span_h in CHART_VIEW_HOURS}
         return None
 
-    load_train, solar_train = _fit_load_and_solar(train, cap_wh)
-    soc = float(test[0].get("soc0", 0.0))
-    errs: list[float] = []
-    obs_day_e = 0.0
-    pred_day_e = 0.0
-    day_count = 0
+    def _select(self, view: str) -> dict[str, list[int]]:
+        """Downsampled indices per chart group inside the view's time window."""
+        if view not in self._selection:
+            t_min, t_max = self.chart_windows[view]
+            self._selection[view] = {name: group.select(self.chart_points, t_min, t_max) for name, group in self.charts.items()}
+        return self._selection[view]
+
+    def _apex_points(self, view: str) -> dict[str, Any]:
+        selection = self._select(view)
+        points = {group: self.charts[group].points(selection[group]) for group in {g for g, _ in _APEX_SERIES_LAYOUT}}
+        return {"now": iso_utc(self.now_epoch), **{name: points[group][name] for group, name in _APEX_SERIES_LAYOUT}}
+
+
+def _sub_series(value: Any, sub: str) -> tuple[bool, Any]:
+    """(found, value) of a whole series (`sub` empty) or one of its named members."""
+    if not sub:
+        return True, value
+    if not isinstance(value, dict) or sub not in value:
+        return False, None
+    return True, value[sub]
+
+
+def _payload_sizes(data: Mapping[str, Any], series: _SeriesPayload | None) -> dict[str, int]:
+    """Serialized size in bytes of each attribute and heavy series."""
+    values = dict(data)
+    if series is not None:
+        values.update({key: series.get(key) for key in SERIES_KEYS if key not in data})
+    return {key: len(json_bytes(value)) for key, value in values.items()}
 
-    for it in test:
-        dt_h = float(it.get("dt_h", 0.0))
+
+class _StageTimer:
+    """Wall time in ms between consecutive marks, accumulated per stage."""
+
+    def __init__(self) -> None:
+        self.ms: dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def mark(self, stage: str) -> None:
+        now = time.perf_counter()
+        self.ms[stage] = self.ms.get(stage, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+
+@dataclass
+class _ModelResult:
+    data: dict[str, Any]
+    model_state: dict[str, Any]
+    scenario_engine: ScenarioEngine
+    scenario_times: list[str]
+    series: _SeriesPayload
+    store: IntervalStore
+    # Historic weather of the inputs; live updates look up new intervals in it.
+    weather_timeline: WeatherTimeline
+    estimator: LoadSolarEstimator
+    weather_sketch: WeatherSketch
+    backtest: RollingBacktest
+    energy: EnergyTotals
+    step_t: list[float]
+    # Stage timings (ms), row counts and, when measured, serialized size of each attribute.
+    stats: dict[str, Any]
+
+
+def _build_interval_store(
+    inputs: _ModelInputs, solar_table: SolarTable, cap_wh: float, weather_timeline: WeatherTimeline
+) -> IntervalStore:
+    """One interval per pair of consecutive battery samples, with sun, weather and voltage at its midpoint."""
+    batt_rows = inputs.batt_rows
+    coarse_until = inputs.coarse_until
+    volt_rows = inputs.volt_rows
+    pairs: list[tuple[Sample, Sample, float, datetime]] = []
+    for i in range(1, len(batt_rows)):
+        p = batt_rows[i - 1]
+        c = batt_rows[i]
+        dt_h = (c.ts - p.ts).total_seconds() / 3600.0
         if dt_h <= 0:
             continue
-        sx = float(it.get("sun_proxy", 0.0)) * float(it.get("weather_factor_hist", 1.0))
-        p_net_pred = -load_train + solar_train * sx
-        soc += (p_net_pred * dt_h / cap_wh) * 100.0
-        soc = max(0.0, min(100.0, soc))
-        actual = float(it.get("soc1", soc))
-        errs.append(soc - actual)
-
-        if float(it.get("sun_proxy", 0.0)) > 0.01:
-            dsoc = float(it.get("dsoc", 0.0))
-            p_obs = cap_wh * (dsoc / 100.0) / dt_h
-            obs_prod = max(0.0, p_obs + load_train)
-            pred_prod = max(0.0, solar_train * sx)
-            obs_day_e += obs_prod * dt_h
-            pred_day_e += pred_prod * dt_h
-            day_count += 1
-
-    if not errs:
-        return None
-    mae = sum(abs(e) for e in errs) / len(errs)
-    bias = sum(errs) / len(errs)
-    rmse = math.sqrt(sum(e * e for e in errs) / len(errs))
-    solar_scale_raw = (obs_day_e / pred_day_e) if pred_day_e > 1e-6 else 1.0
-    return {
-        "samples_train": len(train),
-        "samples_test": len(test),
-        "mae_soc": mae,
-        "bias_soc": bias,
-        "rmse_soc": rmse,
-        "horizon_error_soc": errs[-1],
-        "solar_scale_raw": solar_scale_raw,
-        "daylight_samples_test": day_count,
-    }
+        pairs.append((p, c, dt_h, p.ts + (c.ts - p.ts) / 2))
+    # Intervals starting on an hourly statistic mean stand for several raw
+    # intervals; weight them by duration relative to the typical raw step.
+    weights = [1.0] * len(pairs)
+    if coarse_until is not None:
+        raw_dt = sorted(dt_h for p, _, dt_h, _ in pairs if p.ts >= coarse_until)
+        raw_step_h = raw_dt[len(raw_dt) // 2] if raw_dt else 1.0
+        for k, (p, _, dt_h, _) in enumerate(pairs):
+            if p.ts < coarse_until:
+                weights[k] = dt_h / raw_step_h
+    mid_epochs = [mid.timestamp() for *_, mid in pairs]
+    mid_elev, mid_az, mid_proxy = solar_table.positions(mid_epochs, inputs.lat, inputs.lon)
+    mid_volt = align_asof(mid_epochs, [s.ts.timestamp() for s in volt_rows], [s.value for s in volt_rows], "nearest")
+    mid_wf, mid_cond = weather_timeline.factors_at(mid_epochs)
+
+    store = IntervalStore()
+    for (p, c, dt_h, mid), elev, az, sproxy, volt, w_hist, w_cond, weight in zip(
+        pairs, mid_elev, mid_az, mid_proxy, mid_volt, mid_wf, mid_cond, weights, strict=True
+    ):
+        store.append(
+            mid.timestamp(),
+            dt_h,
+            p.value,
+            c.value,
+            elev,
+            az,
+            sproxy,
+            w_hist,
+            w_cond,
+            volt,
+            cap_wh,
+            mid.astimezone(inputs.tz).hour,
+            weight,
+        )
+    return store
+
+
+def _compute_model(inputs: _ModelInputs, solar_table: SolarTable) -> _ModelResult:
+    """Interval store, model fit, forecast and payload for one refresh.
+
+    Side-effect free apart from the shared (locked) solar table cache, so it
+    runs in the executor.
+    """
+    cfg = inputs.cfg
+    battery_entity = inputs.battery_entity
+    voltage_entity = inputs.voltage_entity
+    weather_entity = inputs.weather_entity
+    start_hour = inputs.start_hour
+    start_local = inputs.start_local
+    start_utc = inputs.start_utc
+    explicit_start = inputs.explicit_start
+    cells_current = inputs.cells_current
+    cell_mah = inputs.cell_mah
+    cell_v = inputs.cell_v
+    horizon_days = inputs.horizon_days
+    now_utc = inputs.now_utc
+    tz = inputs.tz
+    lat = inputs.lat
+    lon = inputs.lon
+    batt_rows = inputs.batt_rows
+    volt_rows = inputs.volt_rows
+    weather_hist_points = inputs.weather_hist_points
+    weather_forecast_points = inputs.weather_forecast_points
+
+    timer = _StageTimer()
+    cap_wh_current = cells_current * (cell_mah / 1000.0) * cell_v
+    weather_timeline = WeatherTimeline(weather_hist_points)
+    store = _build_interval_store(inputs, solar_table, cap_wh_current, weather_timeline)
+    timer.mark("intervals")
+    if not len(store):
+        raise UpdateFailed("No valid intervals")
+
+    half_life_days = float(cfg.get(CONF_MODEL_HALF_LIFE_DAYS, DEFAULT_MODEL_HALF_LIFE_DAYS))
+    estimator = inputs.estimator
+    if estimator is None or estimator.half_life_s != half_life_days * 86400.0:
+        estimator = LoadSolarEstimator(half_life_days * 86400.0)
+    estimator.align(store)
+    fitted = estimator.update(store)
+    load_w, solar_peak_w_raw = estimator.fit()
+    timer.mark("fit")
+    backtest_24h = _compute_backtest_24h(store, estimator, cap_wh_current)
+    backtest = inputs.backtest
+    rolling = backtest.update(store, estimator, cap_wh_current)
+    timer.mark("backtest")
+    # Calibrate on all complete 24 h folds; the single latest holdout is
+    # only used until the first of them exists.
+    calibration: tuple[float, float] | None = None
+    if rolling.get(24, {}).get("folds"):
+        calibration = (rolling[24]["solar_scale_raw"], rolling[24]["daylight_samples"])
+    elif backtest_24h:
+        calibration = (float(backtest_24h["solar_scale_raw"]), int(backtest_24h["daylight_samples_test"]))
+    solar_scale_24h_raw = 1.0
+    bt_conf = 0.0
+    if calibration is not None:
+        if calibration[1] >= 3:
+            solar_scale_24h_raw = _clamp(calibration[0], 0.5, 1.5)
+        bt_conf = _clamp(calibration[1] / 12.0, 0.0, 1.0)
+    solar_scale_24h = 1.0 + (solar_scale_24h_raw - 1.0) * bt_conf
+    solar_scale_24h = _clamp(solar_scale_24h, 0.5, 1.5)
+    solar_peak_w = solar_peak_w_raw * solar_scale_24h
+
+    weather_sketch = _sync_weather_sketch(inputs.weather_sketch, store, load_w, solar_peak_w_raw)
+    empirical = _empirical_weather_quantiles(weather_sketch, store)
+    timer.mark("quantiles")
+
+    latest_soc = batt_rows[-1].value
+    latest_ts = _ensure_utc(batt_rows[-1].ts) or batt_rows[-1].ts
+
+    step_min = 10
+    step_delta = timedelta(minutes=step_min)
+    steps = int((max(1, min(14, horizon_days)) * 24 * 60) / step_min)
+
+    forecast_timeline = WeatherTimeline(weather_forecast_points)
+    provider_forecast_end = weather_forecast_points[-1]["ts"] if weather_forecast_points else None
+    provider_forecast_start = weather_forecast_points[0]["ts"] if weather_forecast_points else None
+
+    emp_samples = int(empirical.get("samples", 0))
+    emp_conf = _clamp(emp_samples / 36.0, 0.0, 1.0)
+
+    def _weather_factors_for_future(tss: list[datetime]) -> tuple[list[float], list[float]]:
+        f50s: list[float] = []
+        f20s: list[float] = []
+        provider = forecast_timeline.interpolated([ts.timestamp() for ts in tss])
+        for ts, p in zip(tss, provider, strict=True):
+            h = ts.astimezone(tz).hour
+            e50 = empirical["hourly_p50"][h] if 0 <= h < 24 else empirical["global_p50"]
+            e20 = empirical["hourly_p20"][h] if 0 <= h < 24 else empirical["global_p20"]
 
+            if p is None and provider_forecast_start and ts < provider_forecast_start:
+                p = float(weather_forecast_points[0]["factor"])
 
-# NOAA-style approximation; same model as the standalone script.
-def _solar_position_utc(ts_utc: datetime, lat_deg: float, lon_deg: float) -> tuple[float, float]:
-    ts_utc = ts_utc.astimezone(UTC)
-    y = ts_utc.year
-    m = ts_utc.month
-    d = ts_utc.day
-    hr = ts_utc.hour + ts_utc.minute / 60.0 + ts_utc.second / 3600.0
-
-    if m <= 2:
-        y -= 1
-        m += 12
-    a = math.floor(y / 100)
-    b = 2 - a + math.floor(a / 4)
-    jd = math.floor(365.25 * (y + 4716)) + math.floor(30.6001 * (m + 1)) + d + b - 1524.5 + hr / 24.0
-    t = (jd - 2451545.0) / 36525.0
-
-    l0 = (280.46646 + t * (36000.76983 + t * 0.0003032)) % 360.0
-    m_sun = 357.52911 + t * (35999.05029 - 0.0001537 * t)
-    m_rad = math.radians(m_sun % 360.0)
-    c = (
-        math.sin(m_rad) * (1.914602 - t * (0.004817 + 0.000014 * t))
-        + math.sin(2 * m_rad) * (0.019993 - 0.000101 * t)
-        + math.sin(3 * m_rad) * 0.000289
-    )
-    true_long = l0 + c
-    omega = 125.04 - 1934.136 * t
-    lam = true_long - 0.00569 - 0.00478 * math.sin(math.radians(omega))
-    eps0 = 23.0 + (26.0 + ((21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0)) / 60.0
-    eps = eps0 + 0.00256 * math.cos(math.radians(omega))
-
-    lam_r = math.radians(lam)
-    eps_r = math.radians(eps)
-    decl = math.asin(math.sin(eps_r) * math.sin(lam_r))
-    ra = math.atan2(math.cos(eps_r) * math.sin(lam_r), math.cos(lam_r))
-
-    gmst = (
-        280.46061837
-        + 360.98564736629 * (jd - 2451545.0)
-        + 0.000387933 * t * t
-        - (t * t * t) / 38710000.0
-    ) % 360.0
-    lst = math.radians((gmst + lon_deg) % 360.0)
-    ha = (lst - ra + math.pi) % (2 * math.pi) - math.pi
-
-    lat_r = math.radians(lat_deg)
-    elev = math.asin(math.sin(lat_r) * math.sin(decl) + math.cos(lat_r) * math.cos(decl) * math.cos(ha))
-    az = math.atan2(
-        math.sin(ha),
-        math.cos(ha) * math.sin(lat_r) - math.tan(decl) * math.cos(lat_r),
+            if p is None:
+                # No provider point at this timestamp: use empirical directly.
+                f50s.append(_clamp(e50, 0.05, 1.0))
+                f20s.append(_clamp(min(e20, e50), 0.05, 1.0))
+                continue
+
+            p = _clamp(float(p), 0.05, 1.0)
+            if provider_forecast_end and ts > provider_forecast_end:
+                hrs = (ts - provider_forecast_end).total_seconds() / 3600.0
+                # fade provider to empirical after forecast horizon
+                alpha = math.exp(-max(0.0, hrs) / 12.0)
+                provider_w = alpha
+            else:
+                provider_w = 1.0
+
+            # Even inside provider horizon, blend with empirical to avoid systemic bias.
+            # Empirical influence increases with sample count.
+            emp_w_base = 0.15 + 0.35 * emp_conf
+            provider_w *= (1.0 - emp_w_base)
+            empirical_w = 1.0 - provider_w
+            f50 = _clamp(provider_w * p + empirical_w * e50, 0.05, 1.0)
+            f20 = _clamp(provider_w * p + empirical_w * e20, 0.05, 1.0)
+            f50s.append(f50)
+            f20s.append(min(f20, f50))
+        return f50s, f20s
+
+    def _simulate_soc_between(start_ts: datetime, end_ts: datetime, start_soc: float, use_weather: bool) -> float:
+        if end_ts <= start_ts:
+            return start_soc
+        cap_wh = cells_current * (cell_mah / 1000.0) * cell_v
+        steps_between: list[tuple[float, datetime]] = []
+        t = start_ts
+        while t < end_ts:
+            t_next = min(t + step_delta, end_ts)
+            steps_between.append(((t_next - t).total_seconds() / 3600.0, t + (t_next - t) / 2))
+            t = t_next
+        _, _, proxies = solar_table.positions([mid.timestamp() for _, mid in steps_between], lat, lon)
+        wf50s, _ = _weather_factors_for_future([mid for _, mid in steps_between])
+        soc = float(start_soc)
+        for (dt_h, _), sproxy, wf50 in zip(steps_between, proxies, wf50s, strict=True):
+            p_prod = solar_peak_w * sproxy * (wf50 if use_weather else 1.0)
+            p_net = -load_w + p_prod
+            soc += (p_net * dt_h / cap_wh) * 100.0
+            soc = max(0.0, min(100.0, soc))
+        return soc
+
+    soc_now = _simulate_soc_between(latest_ts, now_utc, latest_soc, True)
+
+    times: list[str] = []
+    solar_proxy: list[float] = []
+    solar_elev: list[float] = []
+    weather_factor: list[float] = []
+    weather_factor_p20: list[float] = []
+
+    step_times = [now_utc + timedelta(minutes=i * step_min) for i in range(steps + 1)]
+    step_t = [t.timestamp() for t in step_times]
+    step_elev, _, step_proxy = solar_table.positions(step_t, lat, lon)
+    step_wf50, step_wf20 = _weather_factors_for_future(step_times)
+    for t, elev, sproxy, wf50, wf20 in zip(step_times, step_elev, step_proxy, step_wf50, step_wf20, strict=True):
+        times.append(t.isoformat())
+        solar_proxy.append(sproxy)
+        solar_elev.append(elev)
+        weather_factor.append(wf50)
+        weather_factor_p20.append(wf20)
+
+    scenario_engine = ScenarioEngine(
+        soc_now, load_w, solar_peak_w, solar_proxy, weather_factor, weather_factor_p20, cell_mah, cell_v, step_min / 60.0
     )
-    return math.degrees(elev), (math.degrees(az) + 180.0) % 360.0
-
-
-def _condition_weight(condition: str) -> float:
-    c = (condition or "").lower()
-    table = {
-        "sunny": 1.00,
-        "clear-night": 0.95,
-        "partlycloudy": 0.82,
-        "cloudy": 0.62,
-        "fog": 0.58,
-        "rainy": 0.50,
-        "pouring": 0.42,
-        "snowy": 0.48,
-        "snowy-rainy": 0.44,
-        "hail": 0.35,
-        "lightning": 0.32,
-        "lightning-rainy": 0.28,
-        "windy": 0.78,
-        "windy-variant": 0.72,
+    # Other cell counts are simulated on demand through get_scenarios().
+    if cfg.get(CONF_ALL_SCENARIOS, DEFAULT_ALL_SCENARIOS):
+        scenario_cells = sorted({cells_current, *range(1, MAX_CELLS + 1)})
+    else:
+        scenario_cells = [cells_current]
+
+    forecast = {
+        "times": times,
+        "solar_proxy": solar_proxy,
+        "solar_elev": solar_elev,
+        "weather_factor": weather_factor,
+        "weather_factor_p20": weather_factor_p20,
+        "latest_soc": latest_soc,
+        **scenario_engine.curves(scenario_cells),
     }
-    return table.get(c, 0.70)
+    timer.mark("simulation")
+
+    payload_start_utc = start_utc if explicit_start else now_utc - timedelta(days=DEFAULT_PAYLOAD_WINDOW_DAYS)
+    batt_rows_payload = _clip_samples_after(batt_rows, payload_start_utc)
+    volt_rows_payload = _clip_samples_after(volt_rows, payload_start_utc)
+    payload_idx = store.index_at_or_after(payload_start_utc.timestamp())
+    payload_t = store.t[payload_idx:]
+    interval_extra = _interval_extra(store, payload_idx, load_w, solar_peak_w)
+
+    cap_wh_runtime = cells_current * (cell_mah / 1000.0) * cell_v
+    soc_projection_no_sun: list[float] = []
+    soc_no_sun = float(soc_now)
+    dt_h_step = step_min / 60.0
+    for _ in times:
+        soc_projection_no_sun.append(soc_no_sun)
+        if cap_wh_runtime > 0:
+            soc_no_sun += ((-load_w) * dt_h_step / cap_wh_runtime) * 100.0
+            soc_no_sun = max(0.0, min(100.0, soc_no_sun))
+
+    remain_wh_no_sun = max(0.0, min(100.0, soc_now)) / 100.0 * cap_wh_runtime
+    no_sun_runtime_days = (remain_wh_no_sun / load_w / 24.0) if load_w > 0 else None
+
+    full_charge_at: datetime | None = None
+    full_charge_eta_h: float | None = None
+    for t, y in zip(step_times, forecast["scenarios"].get(str(cells_current), []), strict=False):
+        if y >= 99.9:
+            full_charge_at = t
+            full_charge_eta_h = max(0.0, (t - now_utc).total_seconds() / 3600.0)
+            break
+
+    energy = inputs.energy
+    energy.update(store, cap_wh_current)
+    net_power_avg_24h_w = _net_power_avg_w(store, now_utc - timedelta(hours=24))
+
+    # Computed like _projected_data does, so an unchanged-inputs refresh at the
+    # same time publishes identical data instead of rounding noise.
+    (elev_now,), _ = solar_positions([now_utc.timestamp()], lat, lon)
+    now_solar_proxy = sun_proxy(elev_now)
+    now_weather_factor = weather_factor[0] if weather_factor else 1.0
+    current_prod_weather_w = solar_peak_w * now_solar_proxy * now_weather_factor
+    net_power_now_w = -load_w + current_prod_weather_w
+    charge_power_now_w = max(0.0, net_power_now_w)
+    discharge_power_now_w = max(0.0, -net_power_now_w)
+    now_epoch = now_utc.timestamp()
+    hist_end = bisect_left(payload_t, now_epoch)
+    sun_hist_t = list(payload_t[:hist_end])
+    sun_hist_elev = list(store.sun_elev[payload_idx:payload_idx + hist_end])
+
+    # Interval midpoints lag the newest sample; extend the sun curve up to now.
+    t_hist = (latest_ts if latest_ts > start_utc else start_utc)
+    backfill: list[datetime] = []
+    while t_hist < now_utc:
+        backfill.append(t_hist)
+        t_hist += step_delta
+    backfill_elev, _, _ = solar_table.positions([t.timestamp() for t in backfill], lat, lon)
+    sun_hist_t.extend(t.timestamp() for t in backfill)
+    sun_hist_elev.extend(backfill_elev)
+
+    charts = {
+        "soc": ChartGroup([s.ts.timestamp() for s in batt_rows_payload], {"soc_actual": [s.value for s in batt_rows_payload]}),
+        "voltage": ChartGroup([s.ts.timestamp() for s in volt_rows_payload], {"voltage": [s.value for s in volt_rows_payload]}),
+        "sun": ChartGroup(sun_hist_t, {"sun_history": sun_hist_elev}),
+        "power": ChartGroup(
+            payload_t,
+            {
+                "power_observed": store.net_obs[payload_idx:],
+                "power_modeled": interval_extra["net_power_model_w"],
+                "power_production_weather": interval_extra["production_w"],
+                "power_production_clear": interval_extra["production_clear_w"],
+                "power_consumption": interval_extra["consumption_w"],
+            },
+        ),
+        "forecast": ChartGroup(
+            step_t,
+            {
+                "soc_projection_weather": forecast["scenarios"].get(str(cells_current), []),
+                "soc_projection_weather_p20": forecast["scenarios_p20"].get(str(cells_current), []),
+                "soc_projection_clear": forecast["scenarios_clear"].get(str(cells_current), []),
+                "soc_projection_no_sun": soc_projection_no_sun,
+                "sun_forecast": solar_elev,
+            },
+        ),
+    }
+    series = _SeriesPayload(
+        store,
+        payload_idx,
+        len(store),
+        interval_extra,
+        history={ATTR_HISTORY_SOC: batt_rows_payload, ATTR_HISTORY_VOLTAGE: volt_rows_payload},
+        weather_points=weather_hist_points,
+        payload_start_utc=payload_start_utc,
+        charts=charts,
+        chart_points=int(cfg.get(CONF_CHART_POINTS, DEFAULT_CHART_POINTS)),
+        chart_precision=int(cfg.get(CONF_CHART_PRECISION, DEFAULT_CHART_PRECISION)),
+        now_epoch=now_epoch,
+    )
 
+    model_state = {
+        "load_w": load_w,
+        "solar_peak_w": solar_peak_w,
+        "solar_peak_w_raw": solar_peak_w_raw,
+        "empirical": empirical,
+    }
 
-def _weather_factor(condition: str, cloud_coverage: float | None, precip_probability: float | None) -> float:
-    if cloud_coverage is None:
-        cloud_factor = _condition_weight(condition)
-    else:
-        cloud_frac = max(0.0, min(1.0, cloud_coverage / 100.0))
-        cloud_factor = 1.0 - 0.75 * cloud_frac
-    if precip_probability is None:
-        precip_factor = 1.0
-    else:
-        precip_factor = 1.0 - 0.25 * max(0.0, min(100.0, precip_probability)) / 100.0
-    return max(0.05, min(1.0, cloud_factor * _condition_weight(condition) * precip_factor))
-
-
-def _weather_factor_at(points: list[dict[str, Any]], ts: datetime) -> tuple[float, str]:
-    if not points:
-        return 1.0, ""
-
-    def by_hour_fallback(target_ts: datetime) -> tuple[float, str]:
-        buckets: dict[int, list[dict[str, Any]]] = {}
-        for p in points:
-            h = p["ts"].astimezone(target_ts.tzinfo or UTC).hour
-            buckets.setdefault(h, []).append(p)
-        h = target_ts.astimezone(target_ts.tzinfo or UTC).hour
-        if h in buckets and buckets[h]:
-            vals = buckets[h]
-            return _mean([float(v["factor"]) for v in vals]), vals[-1].get("condition", "")
-        return _mean([float(p["factor"]) for p in points]), points[-1].get("condition", "")
-
-    if ts <= points[0]["ts"] or ts >= points[-1]["ts"]:
-        return by_hour_fallback(ts)
-
-    for i in range(1, len(points)):
-        a = points[i - 1]
-        b = points[i]
-        if a["ts"] <= ts <= b["ts"]:
-            span = (b["ts"] - a["ts"]).total_seconds()
-            if span <= 0:
-                return float(a["factor"]), a.get("condition", "")
-            k = (ts - a["ts"]).total_seconds() / span
-            fac = float(a["factor"]) + (float(b["factor"]) - float(a["factor"])) * k
-            return fac, (a.get("condition", "") if k < 0.5 else b.get("condition", ""))
-
-    return by_hour_fallback(ts)
+    data = {
+        ATTR_META: {
+            "name": cfg.get(CONF_NAME),
+            "battery_entity": battery_entity,
+            "voltage_entity": voltage_entity,
+            "weather_entity": weather_entity,
+            "start_hour": start_hour,
+            "start_date": start_local.date().isoformat(),
+            "analysis_mode": ("manual" if explicit_start else "rolling_default"),
+            "model_window_days": DEFAULT_MODEL_WINDOW_DAYS,
+            "payload_window_days": (None if explicit_start else DEFAULT_PAYLOAD_WINDOW_DAYS),
+            "cells_current": cells_current,
+            "cell_mah": cell_mah,
+            "cell_v": cell_v,
+            "horizon_days": horizon_days,
+            "latest_local": latest_ts.astimezone(tz).isoformat(),
+            "now_local": now_utc.astimezone(tz).isoformat(),
+        },
+        ATTR_MODEL: {
+            "load_w": load_w,
+            "solar_peak_w": solar_peak_w,
+            "solar_peak_w_raw": solar_peak_w_raw,
+            "avg_net_w_observed": _weighted_mean(store.net_obs, store.weight),
+            "current_production_weather_w": current_prod_weather_w,
+            "solar_scale_24h": solar_scale_24h,
+            "solar_scale_24h_raw": solar_scale_24h_raw,
+            "calibration_confidence": bt_conf,
+            "forgetting_half_life_days": half_life_days if half_life_days > 0 else None,
+            "weather_fallback_method": "empirical_quantile_blend",
+            "weather_fallback_quantile_p20": 0.2,
+            "weather_fallback_quantile_p50": 0.5,
+            "weather_empirical_samples": emp_samples,
+            "weather_empirical_confidence": emp_conf,
+            "weather_empirical_p10": empirical["global_p10"],
+            "weather_empirical_p90": empirical["global_p90"],
+            "weather_provider_horizon_hours": (
+                round((provider_forecast_end - now_utc).total_seconds() / 3600.0, 2)
+                if provider_forecast_end
+                else None
+            ),
+            "backtest_24h_mae_soc": (round(float(backtest_24h["mae_soc"]), 3) if backtest_24h else None),
+            "backtest_24h_bias_soc": (round(float(backtest_24h["bias_soc"]), 3) if backtest_24h else None),
+            "backtest_24h_rmse_soc": (round(float(backtest_24h["rmse_soc"]), 3) if backtest_24h else None),
+            "backtest_24h_horizon_error_soc": (round(float(backtest_24h["horizon_error_soc"]), 3) if backtest_24h else None),
+            "backtest_24h_samples_train": (int(backtest_24h["samples_train"]) if backtest_24h else None),
+            "backtest_24h_samples_test": (int(backtest_24h["samples_test"]) if backtest_24h else None),
+            "backtest_rolling": {
+                f"{h}h": {
+                    "folds": agg["folds"],
+                    **(
+                        {key: round(float(agg[key]), 3) for key in ("mae_soc", "rmse_soc", "bias_soc", "end_mae_soc")}
+                        if agg["folds"]
+                        else {}
+                    ),
+                }
+                for h, agg in rolling.items()
+            },
+        },
+        ATTR_FORECAST: forecast,
+        ATTR_NO_SUN_RUNTIME_DAYS: round(no_sun_runtime_days, 3) if no_sun_runtime_days is not None else None,
+        ATTR_NET_POWER_NOW_W: round(net_power_now_w, 3),
+        ATTR_NET_POWER_AVG_24H_W: round(net_power_avg_24h_w, 3) if net_power_avg_24h_w is not None else None,
+        ATTR_CHARGE_POWER_NOW_W: round(charge_power_now_w, 3),
+        ATTR_DISCHARGE_POWER_NOW_W: round(discharge_power_now_w, 3),
+        ATTR_ENERGY_CHARGED_KWH_TOTAL: round(energy.charged_wh / 1000.0, 5),
+        ATTR_ENERGY_DISCHARGED_KWH_TOTAL: round(energy.discharged_wh / 1000.0, 5),
+        ATTR_FULL_CHARGE_ETA_HOURS: (round(full_charge_eta_h, 3) if full_charge_eta_h is not None else None),
+        ATTR_FULL_CHARGE_AT: (full_charge_at.isoformat() if full_charge_at is not None else None),
+        "native_value": round(latest_soc, 2),
+    }
+    timer.mark("payload")
+    stats: dict[str, Any] = {
+        "stages_ms": timer.ms,
+        "rows": {
+            "battery_states": len(batt_rows),
+            "voltage_states": len(volt_rows),
+            "weather_history_points": len(weather_hist_points),
+            "weather_forecast_points": len(weather_forecast_points),
+            "intervals": len(store),
+            "intervals_fitted": fitted,
+            "forecast_steps": len(times),
+        },
+    }
+    if inputs.measure_payload:
+        stats["payload_bytes"] = _payload_sizes(data, series)
+        timer.mark("serialize")
+    return _ModelResult(
+        data=data,
+        model_state=model_state,
+        scenario_engine=scenario_engine,
+        scenario_times=times,
+        series=series,
+        store=store,
+        weather_timeline=weather_timeline,
+        estimator=estimator,
+        weather_sketch=weather_sketch,
+        backtest=backtest,
+        energy=energy,
+        step_t=step_t,
+        stats=stats,
+    )
 
 
 class NodeEnergyCoordinator(DataUpdateCoordinator[dict[str, Any]]):
     def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
         self.hass = hass
         self.entry = entry
+        self._sample_buffers: dict[str, HistoryBuffer[Sample]] = {}
+        self._stat_buffers: dict[str, StatisticsBuffer] = {}
+        # Entity -> when its statistics query last came back empty.
+        self._no_statistics: dict[str, datetime] = {}
+        self._model_state: dict[str, Any] = {}
+        self._weather_sketch: WeatherSketch | None = None
+        self._estimator: LoadSolarEstimator | None = None
+        self._backtest = RollingBacktest(BACKTEST_ANCHOR_HOURS, BACKTEST_WINDOW_DAYS, BACKTEST_HORIZON_HOURS)
+        self._energy = EnergyTotals()
+        self._store = snapshot_store(hass, entry.entry_id)
+        self._snapshot_pending = False
+        self._solar_table: SolarTable = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SOLAR_TABLE, SolarTable())
+        self._weather_cache: WeatherCache = hass.data[DOMAIN].setdefault(DATA_WEATHER_CACHE, WeatherCache())
+        self._history_broker: HistoryBroker = hass.data[DOMAIN].setdefault(DATA_HISTORY_BROKER, HistoryBroker(hass))
+        # Heavy series of the last full refresh, built when first requested.
+        self._series: _SeriesPayload | None = None
+        # Series being built in the executor for async_get_series, by key.
+        self._series_builds: dict[str, tuple[_SeriesPayload, asyncio.Future[Any]]] = {}
+        self._scenario_engine: ScenarioEngine | None = None
+        self._scenario_times: list[str] = []
+        self._fetch_status: dict[str, str] = {}
+        self._fetch_ms: dict[str, float] = {}
+        # Most recent refreshes, newest last; see diagnostics.py.
+        self.refresh_stats: deque[dict[str, Any]] = deque(maxlen=DIAGNOSTICS_REFRESHES)
+        # Inputs and result of the last full refresh, and the newest battery
+        # sample folded into them by incremental updates since.
+        self._live: tuple[_ModelInputs, _ModelResult] | None = None
+        self._live_last: Sample | None = None
+        self._fingerprint: tuple[Any, ...] | None = None
+        self._live_debouncer = Debouncer(
+            hass, _LOGGER, cooldown=LIVE_UPDATE_COOLDOWN_SECONDS, immediate=False, function=self._async_live_update
+        )
+        incremental = bool(self.cfg.get(CONF_INCREMENTAL_UPDATES, DEFAULT_INCREMENTAL_UPDATES))
         super().__init__(
             hass,
             _LOGGER,
             name=f"{DOMAIN}-{entry.entry_id}",
-            update_interval=timedelta(minutes=UPDATE_INTERVAL_MINUTES),
+            update_interval=timedelta(minutes=INCREMENTAL_UPDATE_INTERVAL_MINUTES if incremental else UPDATE_INTERVAL_MINUTES),
+            # Entities are only written when a refresh actually changed the data.
+            always_update=False,
         )
 
     @property
     def cfg(self) -> dict[str, Any]:
         return {**self.entry.data, **self.entry.options}
 
-    async def _async_fetch_history(self, entity_id: str, start_utc: datetime) -> list[Sample]:
-        if not entity_id:
-            return []
+    async def async_restore_snapshot(self) -> bool:
+        try:
+            raw = await self._store.async_load()
+        except Exception:
+            _LOGGER.debug("Discarding unreadable snapshot for %s", self.entry.entry_id, exc_info=True)
+            return False
+        if not raw:
+            return False
+
+        # Energy totals feed TOTAL_INCREASING sensors and must not restart
+        # from the window sum, so they survive config changes.
+        self._energy = load_energy_totals(raw.get("energy")) or self._energy
+
+        state = raw.get("state")
+        if not state or raw.get("config") != _json_safe(self.cfg):
+            return False
+        self._model_state = dict(raw.get("model") or {})
+        # Raw samples are not persisted; the first refresh reads them from the
+        # recorder again and rebuilds everything else.
+        store = load_interval_store(raw.get("intervals"))
+        load_w = _parse_float(self._model_state.get("load_w"))
+        solar_peak_w = _parse_float(self._model_state.get("solar_peak_w"))
+        if store is not None and load_w is not None and solar_peak_w is not None:
+            self._series = _SeriesPayload(store, 0, len(store), _interval_extra(store, 0, load_w, solar_peak_w))
+            if self.cfg.get(CONF_SERIES_ATTRIBUTES, DEFAULT_SERIES_ATTRIBUTES):
+                await self.hass.async_add_executor_job(self._series.build_all)
+        # The first refresh slides the restored sketch instead of rebuilding it.
+        self._weather_sketch = load_weather_sketch(raw.get("weather_sketch"))
+        self.async_set_updated_data(dict(state))
+        return True
+
+    async def async_flush_snapshot(self) -> None:
+        """Write a pending snapshot now instead of after the save delay; called on unload."""
+        if self._snapshot_pending:
+            await self._store.async_save(self._snapshot_data())
+
+    @callback
+    def _snapshot_data(self) -> dict[str, Any]:
+        self._snapshot_pending = False
+        data = self.data or {}
+        # Label the model with the config it was computed from, not the
+        # entry's current options, which may already have changed.
+        inputs = self._live[0] if self._live is not None else None
+        cfg = inputs.cfg if inputs is not None else self.cfg
+        intervals = None
+        if inputs is not None and self._series is not None:
+            cap_wh = inputs.cells_current * (inputs.cell_mah / 1000.0) * inputs.cell_v
+            intervals = dump_interval_store(self._series.store, self._series.start, self._series.end, cap_wh)
+        return {
+            "config": _json_safe(dict(cfg)),
+            "saved_at": dt_util.utcnow().isoformat(),
+            "model": self._model_state,
+            "energy": dump_energy_totals(self._energy),
+            "intervals": intervals,
+            "weather_sketch": dump_weather_sketch(self._weather_sketch) if self._weather_sketch is not None else None,
+            "state": {k: v for k, v in data.items() if k not in _SNAPSHOT_SKIP_KEYS},
+        }
 
-        def _query() -> list[Sample]:
-            # recorder helper API varies by HA versions; keep fallback-safe.
-            from homeassistant.components.recorder.history import get_significant_states
-
-            res = get_significant_states(
-                self.hass,
-                start_utc,
-                None,
-                [entity_id],
-                include_start_time_state=True,
-                significant_changes_only=False,
-                minimal_response=False,
-                no_attributes=False,
+    def get_series(self, selector: str, build: bool = True) -> tuple[bool, Any]:
+        """(found, value) of a heavy series, `key` or `key.<name>`.
+
+        A series not built yet is built here unless `build` is False (then
+        its value is None); on the event loop use `async_get_series` instead.
+        """
+        key, _, sub = selector.partition(".")
+        if key not in SERIES_KEYS:
+            return False, None
+        if key != ATTR_FORECAST and self._series is not None:
+            value = self._series.get(key, build)
+        else:
+            value = (self.data or {}).get(key)
+        return _sub_series(value, sub)
+
+    async def async_get_series(self, selector: str) -> tuple[bool, Any]:
+        """`get_series` for the event loop: a missing series is built in the executor, once for concurrent callers."""
+        key, _, sub = selector.partition(".")
+        series = self._series
+        if key not in SERIES_KEYS or key == ATTR_FORECAST or series is None or series.built(key):
+            return self.get_series(selector, build=False)
+        pending = self._series_builds.get(key)
+        if pending is None or pending[0] is not series:
+            task = asyncio.ensure_future(self.hass.async_add_executor_job(series.get, key))
+            pending = self._series_builds[key] = (series, task)
+
+            def _done(_: asyncio.Future[Any], key: str = key, pending: tuple[_SeriesPayload, asyncio.Future[Any]] = pending) -> None:
+                if self._series_builds.get(key) is pending:
+                    del self._series_builds[key]
+
+            task.add_done_callback(_done)
+        # A caller going away must not cancel the build others wait for.
+        return _sub_series(await asyncio.shield(pending[1]), sub)
+
+    def get_scenarios(self, cells: list[int], variants: list[str] | tuple[str, ...] = SCENARIO_VARIANTS) -> dict[str, Any] | None:
+        """SoC curves of the last forecast for arbitrary cell counts; None before the first refresh."""
+        if self._scenario_engine is None:
+            return None
+        return {"times": self._scenario_times, **self._scenario_engine.curves(cells, variants)}
+
+    def payload_sizes(self) -> dict[str, int]:
+        """Serialized size in bytes of each attribute and heavy series; builds any series not built yet."""
+        return _payload_sizes(self.data or {}, self._series)
+
+    def _compute_job(self, inputs: _ModelInputs, retain_from: float) -> _ModelResult:
+        # Runs in the executor: the shared solar table's lock may be held by
+        # another entry's refresh and must not be waited for on the event loop.
+        self._solar_table.retain(self.entry.entry_id, retain_from)
+        result = _compute_model(inputs, self._solar_table)
+        if inputs.cfg.get(CONF_SERIES_ATTRIBUTES, DEFAULT_SERIES_ATTRIBUTES):
+            # State attributes are read on the event loop; build them here.
+            result.series.build_all()
+        return result
+
+    @callback
+    def async_release_shared(self) -> None:
+        self._solar_table.release(self.entry.entry_id)
+        self._weather_cache.release(self.entry.entry_id)
+
+    @callback
+    def async_track_live_updates(self) -> Callable[[], None]:
+        """Follow state changes of the configured entities; returns the unsubscribe callback."""
+        cfg = self.cfg
+        entities = [e for e in (cfg.get(CONF_BATTERY_ENTITY), cfg.get(CONF_VOLTAGE_ENTITY), cfg.get(CONF_WEATHER_ENTITY)) if e]
+        unsub = async_track_state_change_event(self.hass, entities, self._async_on_state_change)
+
+        @callback
+        def _stop() -> None:
+            unsub()
+            self._live_debouncer.async_cancel()
+
+        return _stop
+
+    @callback
+    def _async_on_state_change(self, event: Event[EventStateChangedData]) -> None:
+        entity_id = event.data["entity_id"]
+        new_state = event.data["new_state"]
+        if new_state is None:
+            return
+        # Append to the history buffers; the next full refresh then only
+        # queries the recorder for what arrived after these.
+        if entity_id == self.cfg.get(CONF_WEATHER_ENTITY):
+            added = self._weather_cache.history_buffer(entity_id).extend(_parse_weather_states([new_state]))
+        else:
+            buffer = self._sample_buffers.get(entity_id)
+            added = buffer.extend(_parse_sample_states([new_state])) if buffer is not None else 0
+        if added:
+            self._live_debouncer.async_schedule_call()
+
+    async def _async_live_update(self) -> None:
+        """Fold battery samples that arrived since the last refresh into the cheap sensors.
+
+        New intervals are appended to the last refresh's interval store and
+        online estimator, and the SoC projection restarts from the newest sample
+        with the refitted load and solar peak on the existing forecast grid.
+        Backtest, weather quantiles and charts wait for the next full refresh.
+        """
+        if self._live is None or self._live_last is None or not self.data:
+            return
+        inputs, result = self._live
+        buffer = self._sample_buffers.get(inputs.battery_entity)
+        if buffer is None:
+            return
+        t_start = time.perf_counter()
+        volt_buffer = self._sample_buffers.get(inputs.voltage_entity) if inputs.voltage_entity else None
+        cap_wh = inputs.cells_current * (inputs.cell_mah / 1000.0) * inputs.cell_v
+        store = result.store
+
+        new_rows = buffer.rows[bisect_right(buffer.rows, self._live_last.ts, key=sample_ts):]
+        if new_rows:
+            pairs = list(zip([self._live_last, *new_rows[:-1]], new_rows, strict=True))
+            mids = [p.ts + (c.ts - p.ts) / 2 for p, c in pairs]
+            mid_epochs = [mid.timestamp() for mid in mids]
+            # Computed directly: the shared table's lock may be held by an
+            # executor refresh for a whole history batch.
+            elev, az = solar_positions(mid_epochs, inputs.lat, inputs.lon)
+            proxy = [sun_proxy(e) for e in elev]
+            volt_rows: list[Sample] = []
+            if volt_buffer is not None:
+                volt_rows = volt_buffer.rows[max(0, bisect_left(volt_buffer.rows, self._live_last.ts, key=sample_ts) - 1):]
+            volt = align_asof(mid_epochs, [s.ts.timestamp() for s in volt_rows], [s.value for s in volt_rows], "nearest")
+            # Same weather as the refresh the intervals are appended to.
+            w_hist, w_cond = result.weather_timeline.factors_at(mid_epochs)
+            for k, ((p, c), mid) in enumerate(zip(pairs, mids, strict=True)):
+                store.append(
+                    mid_epochs[k],
+                    (c.ts - p.ts).total_seconds() / 3600.0,
+                    p.value,
+                    c.value,
+                    elev[k],
+                    az[k],
+                    proxy[k],
+                    w_hist[k],
+                    w_cond[k],
+                    volt[k],
+                    cap_wh,
+                    mid.astimezone(inputs.tz).hour,
+                )
+            self._live_last = new_rows[-1]
+            sketch = result.weather_sketch
+            result.weather_sketch = self._weather_sketch = _sync_weather_sketch(
+                sketch, store, sketch.load_w, sketch.solar_peak_w_raw
             )
-            items = res.get(entity_id, []) if isinstance(res, dict) else []
-            out: list[Sample] = []
-            for st in items:
-                v = _parse_float(getattr(st, "state", None))
-                if v is None:
-                    continue
-                t = getattr(st, "last_updated", None) or getattr(st, "last_changed", None)
-                t = _ensure_utc(t)
-                if t is None:
-                    continue
-                out.append(Sample(ts=t, value=v))
-            out.sort(key=lambda x: x.ts)
-            return out
 
+        self._energy.update(store, cap_wh)
+        now_utc = _ensure_utc(dt_util.utcnow()) or datetime.now(UTC)
+        data = self._projected_data(now_utc)
+        data[ATTR_META] = {**data[ATTR_META], "live_updated_at": now_utc.isoformat(), "live_latest_ts": self._live_last.ts.isoformat()}
+        self.data = data
+        # async_set_updated_data would also push back the next full refresh.
+        self.async_update_listeners()
+        self._record_refresh(
+            "live", now_utc, (time.perf_counter() - t_start) * 1000.0, rows={"intervals": len(store), "new_intervals": len(new_rows)}
+        )
+
+    @callback
+    def _projected_data(self, now_utc: datetime) -> dict[str, Any]:
+        """The last full refresh's data with the cheap, time-dependent sensors moved to `now_utc`.
+
+        Load and solar peak are refitted on the (possibly extended) interval
+        store and the SoC projection restarts on the forecast grid step at or
+        before now: from the newest sample if one arrived since the full
+        refresh, else from where that refresh's projection had got to.
+        """
+        inputs, result = self._live
+        latest = self._live_last
+        weather_buffer = self._weather_cache.history_buffer(inputs.weather_entity) if inputs.weather_entity else None
+        cap_wh = inputs.cells_current * (inputs.cell_mah / 1000.0) * inputs.cell_v
+        store = result.store
+        model = self.data[ATTR_MODEL]
+        result.estimator.update(store)
+        load_w, solar_peak_w_raw = result.estimator.fit()
+        solar_peak_w = solar_peak_w_raw * float(model["solar_scale_24h"])
+        base = result.data[ATTR_FORECAST]
+
+        # Restart the projection on the forecast grid step at or before now.
+        start = min(max(0, bisect_right(result.step_t, now_utc.timestamp()) - 1), len(result.step_t) - 1)
+        if latest.ts > inputs.batt_rows[-1].ts:
+            soc_now = latest.value
+        else:
+            soc_now = base["scenarios"][str(inputs.cells_current)][start]
+        engine = result.scenario_engine.rebased(soc_now, start, load_w, solar_peak_w)
+        curves = engine.curves([int(c) for c in self.data[ATTR_FORECAST]["scenarios"]])
+
+        weather_now = base["weather_factor"][start]
+        last_weather = weather_buffer.rows[-1] if weather_buffer is not None and weather_buffer.rows else None
+        if last_weather is not None and last_weather["ts"] > inputs.now_utc:
+            weather_now = float(last_weather["factor"])
+        (elev_now,), _ = solar_positions([now_utc.timestamp()], inputs.lat, inputs.lon)
+        production_now_w = solar_peak_w * sun_proxy(elev_now) * weather_now
+        net_power_now_w = -load_w + production_now_w
+
+        full_charge_at: datetime | None = None
+        for t, y in zip(result.step_t[start:], curves["scenarios"].get(str(inputs.cells_current), []), strict=False):
+            if y >= 99.9:
+                full_charge_at = max(now_utc, dt_util.utc_from_timestamp(t))
+                break
+        remain_wh = max(0.0, min(100.0, soc_now)) / 100.0 * cap_wh
+        net_power_avg_24h_w = _net_power_avg_w(store, now_utc - timedelta(hours=24))
+
+        self._scenario_engine = engine
+        self._scenario_times = result.scenario_times[start:]
+        return {
+            **self.data,
+            ATTR_MODEL: {
+                **model,
+                "load_w": load_w,
+                "solar_peak_w": solar_peak_w,
+                "solar_peak_w_raw": solar_peak_w_raw,
+                "current_production_weather_w": production_now_w,
+            },
+            ATTR_FORECAST: {
+                **base,
+                **{key: base[key][start:] for key in ("times", "solar_proxy", "solar_elev", "weather_factor", "weather_factor_p20")},
+                "latest_soc": latest.value,
+                **curves,
+            },
+            ATTR_NO_SUN_RUNTIME_DAYS: round(remain_wh / load_w / 24.0, 3) if load_w > 0 else None,
+            ATTR_NET_POWER_NOW_W: round(net_power_now_w, 3),
+            ATTR_NET_POWER_AVG_24H_W: round(net_power_avg_24h_w, 3) if net_power_avg_24h_w is not None else None,
+            ATTR_CHARGE_POWER_NOW_W: round(max(0.0, net_power_now_w), 3),
+            ATTR_DISCHARGE_POWER_NOW_W: round(max(0.0, -net_power_now_w), 3),
+            ATTR_ENERGY_CHARGED_KWH_TOTAL: round(self._energy.charged_wh / 1000.0, 5),
+            ATTR_ENERGY_DISCHARGED_KWH_TOTAL: round(self._energy.discharged_wh / 1000.0, 5),
+            ATTR_FULL_CHARGE_ETA_HOURS: (
+                round((full_charge_at - now_utc).total_seconds() / 3600.0, 3) if full_charge_at is not None else None
+            ),
+            ATTR_FULL_CHARGE_AT: full_charge_at.isoformat() if full_charge_at is not None else None,
+            "native_value": round(latest.value, 2),
+        }
+
+    async def _async_query_states(
+        self,
+        entity_id: str,
+        start_utc: datetime,
+        include_start_time_state: bool,
+        parse: Callable[[list[Any]], list[T]],
+    ) -> list[T]:
+        return await self._history_broker.async_get(entity_id, start_utc, include_start_time_state, parse)
+
+    async def _async_ingest(
+        self,
+        buffer: HistoryBuffer[T],
+        entity_id: str,
+        start_utc: datetime,
+        parse: Callable[[list[Any]], list[T]],
+    ) -> None:
+        # Only query states newer than the last ingested one; a full window
+        # query is needed on first use or when the window start moved back.
+        # Query failures propagate so the fetch stage reports them instead of
+        # passing the buffered rows off as fresh.
+        if buffer.covers(start_utc):
+            since = buffer.last_ts or start_utc
+            rows: list[T] = []
+            try:
+                rows = await self._async_query_states(entity_id, since, False, parse)
+            finally:
+                # Keep the window current for the stage's buffered fallback too.
+                buffer.extend(rows)
+                buffer.trim(start_utc)
+        else:
+            rows = await self._async_query_states(entity_id, start_utc, True, parse)
+            buffer.replace(rows, start_utc)
+            # Batched queries may start earlier; keep the window and retime its start-time state.
+            buffer.trim(start_utc)
+
+    def _buffered_samples(self, entity_id: str | None, raw_start_utc: datetime) -> tuple[list[Sample], datetime | None]:
+        buffer = self._sample_buffers.get(entity_id) if entity_id else None
+        rows = list(buffer.rows) if buffer is not None else []
+        stats = self._stat_buffers.get(entity_id) if entity_id else None
+        if stats is not None and stats.rows and buffer is not None and buffer.start == raw_start_utc:
+            return [*stats.before(raw_start_utc.replace(minute=0, second=0, microsecond=0)), *rows], raw_start_utc
+        return rows, None
+
+    async def _async_fetch_stage(self, stage: str, fetch: Awaitable[T], timeout: float, fallback: Callable[[], T]) -> T:
+        t0 = time.perf_counter()
         try:
-            return await self.hass.async_add_executor_job(_query)
+            async with asyncio.timeout(timeout):
+                rows = await fetch
+        except TimeoutError:
+            _LOGGER.warning("%s: %s fetch timed out after %ss, falling back", self.name, stage, timeout)
+            self._fetch_status[stage] = "timeout"
+            return fallback()
         except Exception:
-            return []
+            _LOGGER.debug("%s: %s fetch failed, falling back", self.name, stage, exc_info=True)
+            self._fetch_status[stage] = "error"
+            return fallback()
+        finally:
+            self._fetch_ms[stage] = (time.perf_counter() - t0) * 1000.0
+        self._fetch_status[stage] = "ok"
+        return rows
+
+    @callback
+    def _record_refresh(self, kind: str, at: datetime, total_ms: float, **details: dict[str, Any] | None) -> None:
+        stats: dict[str, Any] = {"kind": kind, "at": at.isoformat(), "total_ms": round(total_ms, 1)}
+        for key, values in details.items():
+            if values is None:
+                continue
+            stats[key] = {k: round(v, 1) if isinstance(v, float) else v for k, v in values.items()}
+        self.refresh_stats.append(stats)
+        _LOGGER.debug(
+            "%s: %s refresh took %.0f ms; stages %s, rows %s, payload %s bytes",
+            self.name,
+            kind,
+            total_ms,
+            stats.get("stages_ms"),
+            stats.get("rows"),
+            sum(stats.get("payload_bytes", {}).values()),
+        )
+
+    async def _async_fetch_statistics(self, entity_id: str, start_utc: datetime, end_utc: datetime) -> list[Sample]:
+        buffer = self._stat_buffers.get(entity_id)
+        if buffer is None or not buffer.covers(start_utc):
+            buffer = self._stat_buffers[entity_id] = StatisticsBuffer()
+        since = buffer.next_hour() or start_utc
+        if since < end_utc:
+
+            def _query() -> list[Sample]:
+                from homeassistant.components.recorder.statistics import statistics_during_period
+
+                res = statistics_during_period(self.hass, since, end_utc, {entity_id}, "hour", None, {"mean"})
+                return _parse_statistics(res.get(entity_id, []) if isinstance(res, dict) else [])
+
+            from homeassistant.components.recorder import get_instance
+
+            buffer.update(await get_instance(self.hass).async_add_executor_job(_query), start_utc)
+        return buffer.before(end_utc)
 
-    async def _async_fetch_weather_history(self, entity_id: str, start_utc: datetime) -> list[dict[str, Any]]:
+    async def _async_fetch_tiered(
+        self, entity_id: str | None, start_utc: datetime, raw_start_utc: datetime
+    ) -> tuple[list[Sample], datetime | None]:
+        """Samples over the window and the time before which they are hourly statistic means.
+
+        Raw states are read from `raw_start_utc` on and long-term statistics
+        before it. Entities without statistics fall back to raw states for
+        the whole window and are asked again after NO_STATISTICS_RETRY_MINUTES,
+        as statistics may only start being compiled later.
+        """
+        if not entity_id:
+            return [], None
+        now = dt_util.utcnow()
+        checked = self._no_statistics.get(entity_id)
+        if raw_start_utc > start_utc and (checked is None or now - checked >= timedelta(minutes=NO_STATISTICS_RETRY_MINUTES)):
+            # Only hours that end before the raw part starts.
+            stats_end = raw_start_utc.replace(minute=0, second=0, microsecond=0)
+            # A failing query propagates to the fetch stage and is not taken
+            # as "no statistics"; only an empty answer is.
+            fetch_statistics = self._async_fetch_statistics(entity_id, start_utc, stats_end)
+            if checked is None:
+                coarse, raw = await asyncio.gather(fetch_statistics, self._async_fetch_history(entity_id, raw_start_utc))
+            else:
+                # Retrying: keep the raw buffer's whole window unless statistics showed up.
+                coarse = await fetch_statistics
+                raw = await self._async_fetch_history(entity_id, raw_start_utc) if coarse else []
+            if coarse:
+                self._no_statistics.pop(entity_id, None)
+                return [*coarse, *raw], raw_start_utc
+            if checked is None:
+                _LOGGER.info("%s: no long-term statistics for %s, reading raw history instead", self.name, entity_id)
+            self._no_statistics[entity_id] = now
+        return await self._async_fetch_history(entity_id, start_utc), None
+
+    async def _async_fetch_history(self, entity_id: str, start_utc: datetime) -> list[Sample]:
         if not entity_id:
             return []
+        buffer = self._sample_buffers.get(entity_id)
+        if buffer is None:
+            buffer = self._sample_buffers[entity_id] = HistoryBuffer(sample_ts, sample_with_ts)
+        await self._async_ingest(buffer, entity_id, start_utc, _parse_sample_states)
+        return list(buffer.rows)
 
-        def _query() -> list[dict[str, Any]]:
-            from homeassistant.components.recorder.history import get_significant_states
-
-            res = get_significant_states(
-                self.hass,
-                start_utc,
-                None,
-                [entity_id],
-                include_start_time_state=True,
-                significant_changes_only=False,
-                minimal_response=False,
-                no_attributes=False,
-            )
-            items = res.get(entity_id, []) if isinstance(res, dict) else []
-            out: list[dict[str, Any]] = []
-            for st in items:
-                t = getattr(st, "last_updated", None) or getattr(st, "last_changed", None)
-                t = _ensure_utc(t)
-                if t is None:
-                    continue
-                attrs = getattr(st, "attributes", {}) or {}
-                cond = (getattr(st, "state", "") or "").lower()
-                cloud = _parse_float(attrs.get("cloud_coverage"))
-                prob = _parse_float(attrs.get("precipitation_probability"))
-                out.append(
-                    {
-                        "ts": t,
-                        "condition": cond,
-                        "cloud_coverage": cloud,
-                        "precipitation_probability": prob,
-                        "factor": _weather_factor(cond, cloud, prob),
-                    }
-                )
-            out.sort(key=lambda x: x["ts"])
-            return out
+    def _weather_cache_ttl(self) -> float:
+        return float(self.cfg.get(CONF_WEATHER_CACHE_MINUTES, DEFAULT_WEATHER_CACHE_MINUTES)) * 60.0
 
-        try:
-            return await self.hass.async_add_executor_job(_query)
-        except Exception:
+    async def _async_fetch_weather_history(self, entity_id: str, start_utc: datetime) -> Sequence[dict[str, Any]]:
+        if not entity_id:
+            return []
+        # One buffer per weather entity is shared by all entries and ingested
+        # at most once per TTL, from the oldest start any entry needs. The
+        # cache holds the buffer's points as of that ingest.
+        cache = self._weather_cache
+        buffer = cache.history_buffer(entity_id)
+        key = ("history", entity_id)
+        oldest = cache.retain(self.entry.entry_id, entity_id, start_utc)
+        ttl = self._weather_cache_ttl()
+
+        async def _fetch() -> tuple[dict[str, Any], ...]:
+            await self._async_ingest(buffer, entity_id, oldest, _parse_weather_states)
+            return tuple(buffer.rows)
+
+        if not buffer.covers(start_utc):
+            cache.invalidate(key)
+        points = await cache.async_get(key, ttl, _fetch)
+        if not buffer.covers(start_utc):
+            # Joined a fetch that started from a later window start.
+            cache.invalidate(key)
+            points = await cache.async_get(key, ttl, _fetch)
+        # Entries starting at the oldest start share the cached points as they are.
+        if points and points[0]["ts"] >= start_utc:
+            return points
+        return buffer.since(start_utc)
+
+    async def _async_weather_forecast(self, weather_entity: str) -> list[dict[str, Any]]:
+        if not weather_entity:
             return []
+        return await self._weather_cache.async_get(
+            ("forecast", weather_entity), self._weather_cache_ttl(), lambda: self._async_weather_forecast_hourly(weather_entity)
+        )
 
     async def _async_weather_forecast_hourly(self, weather_entity: str) -> list[dict[str, Any]]:
         if not weather_entity:
             return []
-        try:
-            resp = await self.hass.services.async_call(
-                "weather",
-                "get_forecasts",
-                {"type": "hourly", "entity_id": weather_entity},
-                blocking=True,
-                return_response=True,
-            )
-        except Exception:
-            return []
+        # Failures propagate so the fetch stage falls back to the stale forecast.
+        resp = await self.hass.services.async_call(
+            "weather",
+            "get_forecasts",
+            {"type": "hourly", "entity_id": weather_entity},
+            blocking=True,
+            return_response=True,
+        )
 
         payload = resp or {}
         # HA return shape differs by version:
@@ -568,13 +1531,14 @@ class NodeEnergyCoordinator(DataUpdateCoordinator[dict[str, Any]]):
                     "condition": cond,
                     "cloud_coverage": cloud,
                     "precipitation_probability": prob,
-                    "factor": _weather_factor(cond, cloud, prob),
+                    "factor": weather_factor(cond, cloud, prob),
                 }
             )
         rows.sort(key=lambda r: r["ts"])
         return rows
 
     async def _async_update_data(self) -> dict[str, Any]:
+        t_start = time.perf_counter()
         cfg = self.cfg
 
         battery_entity = cfg.get(CONF_BATTERY_ENTITY)
@@ -619,362 +1583,150 @@ class NodeEnergyCoordinator(DataUpdateCoordinator[dict[str, Any]]):
         if start_utc is None:
             raise UpdateFailed("Invalid analysis start timestamp")
 
-        batt_rows = await self._async_fetch_history(battery_entity, start_utc)
-        volt_rows = await self._async_fetch_history(voltage_entity, start_utc) if voltage_entity else []
+        # Independent I/O stages run concurrently; a stage that fails or times
+        # out falls back to what is already buffered from earlier refreshes.
+        self._fetch_status = {}
+        self._fetch_ms = {}
+        raw_days = int(cfg.get(CONF_RAW_HISTORY_DAYS, DEFAULT_RAW_HISTORY_DAYS))
+        raw_start_utc = max(start_utc, dt_util.utcnow() - timedelta(days=raw_days)) if raw_days > 0 else start_utc
+        (batt_rows, coarse_until), (volt_rows, _), weather_hist_points, weather_forecast_points = await asyncio.gather(
+            self._async_fetch_stage(
+                "battery",
+                self._async_fetch_tiered(battery_entity, start_utc, raw_start_utc),
+                FETCH_TIMEOUT_HISTORY_SECONDS,
+                lambda: self._buffered_samples(battery_entity, raw_start_utc),
+            ),
+            self._async_fetch_stage(
+                "voltage",
+                self._async_fetch_tiered(voltage_entity, start_utc, raw_start_utc),
+                FETCH_TIMEOUT_HISTORY_SECONDS,
+                lambda: self._buffered_samples(voltage_entity, raw_start_utc),
+            ),
+            self._async_fetch_stage(
+                "weather_history",
+                self._async_fetch_weather_history(weather_entity, start_utc),
+                FETCH_TIMEOUT_HISTORY_SECONDS,
+                lambda: self._weather_cache.history_buffer(weather_entity).since(start_utc) if weather_entity else [],
+            ),
+            self._async_fetch_stage(
+                "weather_forecast",
+                self._async_weather_forecast(weather_entity),
+                FETCH_TIMEOUT_FORECAST_SECONDS,
+                lambda: self._weather_cache.stale(("forecast", weather_entity)) or [],
+            ),
+        )
 
         if len(batt_rows) < 2:
             raise UpdateFailed("Not enough battery history yet")
 
-        weather_hist_points = await self._async_fetch_weather_history(weather_entity, start_utc) if weather_entity else []
-
-        weather_forecast_points = await self._async_weather_forecast_hourly(weather_entity) if weather_entity else []
-
-        lat = float(self.hass.config.latitude)
-        lon = float(self.hass.config.longitude)
-
-        def nearest(samples: list[Sample], ts: datetime) -> float | None:
-            if not samples:
-                return None
-            return min(samples, key=lambda s: abs((s.ts - ts).total_seconds())).value
-
-        cap_wh_current = cells_current * (cell_mah / 1000.0) * cell_v
-        intervals: list[dict[str, Any]] = []
-
-        for i in range(1, len(batt_rows)):
-            p = batt_rows[i - 1]
-            c = batt_rows[i]
-            dt_h = (c.ts - p.ts).total_seconds() / 3600.0
-            if dt_h <= 0:
-                continue
-            mid = p.ts + (c.ts - p.ts) / 2
-            elev, az = _solar_position_utc(mid, lat, lon)
-            sun_proxy = max(0.0, math.sin(math.radians(max(elev, 0.0))))
-            w_hist, w_cond = _weather_factor_at(weather_hist_points, mid)
-            dsoc = c.value - p.value
-            net_obs = cap_wh_current * (dsoc / 100.0) / dt_h
-            intervals.append(
-                {
-                    "tm": mid.isoformat(),
-                    "dt_h": dt_h,
-                    "soc0": p.value,
-                    "soc1": c.value,
-                    "dsoc": dsoc,
-                    "sun_elev_deg": elev,
-                    "sun_az_deg": az,
-                    "sun_proxy": sun_proxy,
-                    "weather_factor_hist": w_hist,
-                    "weather_condition_hist": w_cond,
-                    "voltage": nearest(volt_rows, mid),
-                    "net_power_obs_w": net_obs,
-                }
+        # Nothing new since the last full refresh: keep its model and only move
+        # the projection to now. A failed fetch still publishes its status.
+        now_utc = _ensure_utc(dt_util.utcnow()) or datetime.now(UTC)
+        fingerprint = _input_fingerprint(cfg, batt_rows, volt_rows, weather_hist_points, weather_forecast_points)
+        if (
+            self._live is not None
+            and self.data is not None
+            and all(status == "ok" for status in self._fetch_status.values())
+            and fingerprint == self._fingerprint
+            and now_utc - self._live[0].now_utc < timedelta(minutes=UNCHANGED_INPUTS_MAX_AGE_MINUTES)
+        ):
+            t_project = time.perf_counter()
+            data = self._projected_data(now_utc)
+            t_end = time.perf_counter()
+            self._record_refresh(
+                "unchanged",
+                now_utc,
+                (t_end - t_start) * 1000.0,
+                stages_ms={"fetch": (t_project - t_start) * 1000.0, "project": (t_end - t_project) * 1000.0},
             )
-
-        if not intervals:
-            raise UpdateFailed("No valid intervals")
-
-        load_w, solar_peak_w_raw = _fit_load_and_solar(intervals, cap_wh_current)
-        backtest_24h = _compute_backtest_24h(intervals, cap_wh_current)
-        solar_scale_24h_raw = 1.0
-        if backtest_24h and int(backtest_24h.get("daylight_samples_test", 0)) >= 3:
-            solar_scale_24h_raw = _clamp(float(backtest_24h.get("solar_scale_raw", 1.0)), 0.5, 1.5)
-        bt_conf = 0.0
-        if backtest_24h:
-            bt_conf = _clamp(int(backtest_24h.get("daylight_samples_test", 0)) / 12.0, 0.0, 1.0)
-        solar_scale_24h = 1.0 + (solar_scale_24h_raw - 1.0) * bt_conf
-        solar_scale_24h = _clamp(solar_scale_24h, 0.5, 1.5)
-        solar_peak_w = solar_peak_w_raw * solar_scale_24h
-
-        empirical = _build_empirical_weather_quantiles_by_hour(
-            intervals,
-            load_w,
-            solar_peak_w_raw,
+            return data
+
+        # Everything below the fetch is pure computation over this snapshot
+        # and runs in the executor to keep the event loop free.
+        inputs = _ModelInputs(
+            cfg=MappingProxyType(dict(cfg)),
+            battery_entity=battery_entity,
+            voltage_entity=voltage_entity,
+            weather_entity=weather_entity,
+            start_hour=start_hour,
+            start_local=start_local,
+            start_utc=start_utc,
+            explicit_start=explicit_start,
+            cells_current=cells_current,
+            cell_mah=cell_mah,
+            cell_v=cell_v,
+            horizon_days=horizon_days,
+            now_utc=now_utc,
+            tz=dt_util.DEFAULT_TIME_ZONE,
+            lat=float(self.hass.config.latitude),
+            lon=float(self.hass.config.longitude),
+            batt_rows=tuple(batt_rows),
+            coarse_until=coarse_until,
+            volt_rows=tuple(volt_rows),
+            weather_hist_points=tuple(weather_hist_points),
+            weather_forecast_points=tuple(weather_forecast_points),
+            weather_sketch=self._weather_sketch.copy() if self._weather_sketch is not None else None,
+            estimator=self._estimator.copy() if self._estimator is not None else None,
+            backtest=self._backtest.copy(),
+            energy=replace(self._energy),
+            measure_payload=_LOGGER.isEnabledFor(logging.DEBUG),
         )
-
-        for it in intervals:
-            p_clear = solar_peak_w * it["sun_proxy"]
-            p_prod = p_clear * it["weather_factor_hist"]
-            it["production_clear_w"] = p_clear
-            it["production_w"] = p_prod
-            it["consumption_w"] = load_w
-            it["net_power_model_w"] = -load_w + p_prod
-
-        latest_soc = batt_rows[-1].value
-        latest_ts = _ensure_utc(batt_rows[-1].ts) or batt_rows[-1].ts
-        now_utc = _ensure_utc(dt_util.utcnow()) or datetime.now(UTC)
-
-        step_min = 10
-        step_delta = timedelta(minutes=step_min)
-        steps = int((max(1, min(14, horizon_days)) * 24 * 60) / step_min)
-
-        weather_all = sorted(
-            [*weather_hist_points, *weather_forecast_points],
-            key=lambda p: p.get("ts") or datetime.min.replace(tzinfo=UTC),
+        t_compute = time.perf_counter()
+        result = await self.hass.async_add_executor_job(self._compute_job, inputs, start_utc.timestamp())
+        t_publish = time.perf_counter()
+
+        self._scenario_engine = result.scenario_engine
+        self._scenario_times = result.scenario_times
+        self._series = result.series
+        self._model_state = result.model_state
+        self._weather_sketch = result.weather_sketch
+        self._estimator = result.estimator
+        self._backtest = result.backtest
+        if self._energy.last_t is not None and (result.energy.last_t is None or result.energy.last_t < self._energy.last_t):
+            # A live update folded in samples that arrived while the model was
+            # computing; going back to the result's totals would shrink the
+            # TOTAL_INCREASING sensors, which reads as a meter reset.
+            result.data[ATTR_ENERGY_CHARGED_KWH_TOTAL] = round(self._energy.charged_wh / 1000.0, 5)
+            result.data[ATTR_ENERGY_DISCHARGED_KWH_TOTAL] = round(self._energy.discharged_wh / 1000.0, 5)
+        else:
+            self._energy = result.energy
+        self._live = (inputs, result)
+        self._live_last = inputs.batt_rows[-1]
+        self._fingerprint = fingerprint
+        live_buffer = self._sample_buffers.get(battery_entity)
+        if live_buffer is not None and live_buffer.rows and live_buffer.rows[-1].ts > self._live_last.ts:
+            # Samples arrived while the model was computing.
+            self._live_debouncer.async_schedule_call()
+        self._snapshot_pending = True
+        self._store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY_SECONDS)
+
+        result.data[ATTR_META].update(
+            {
+                "solar_table": self._solar_table.stats(),
+                "fetch": dict(self._fetch_status),
+                "weather_cache": self._weather_cache.stats(),
+                "history_broker": self._history_broker.stats(),
+                "backtest": {"folds": len(self._backtest), "computed": self._backtest.computed},
+            }
         )
-        provider_forecast_end = weather_forecast_points[-1]["ts"] if weather_forecast_points else None
-        provider_forecast_start = weather_forecast_points[0]["ts"] if weather_forecast_points else None
-
-        emp_samples = int(empirical.get("samples", 0))
-        emp_conf = _clamp(emp_samples / 36.0, 0.0, 1.0)
-
-        def _weather_factors_for_future(ts: datetime) -> tuple[float, float]:
-            h = ts.astimezone(dt_util.DEFAULT_TIME_ZONE).hour
-            e50 = empirical["hourly_p50"][h] if 0 <= h < 24 else empirical["global_p50"]
-            e20 = empirical["hourly_p20"][h] if 0 <= h < 24 else empirical["global_p20"]
-
-            p = _weather_factor_interpolated(weather_forecast_points, ts)
-            if p is None and provider_forecast_start and ts < provider_forecast_start:
-                p = float(weather_forecast_points[0]["factor"])
-
-            if p is None:
-                # No provider point at this timestamp: use empirical directly.
-                return _clamp(e50, 0.05, 1.0), _clamp(min(e20, e50), 0.05, 1.0)
-
-            p = _clamp(float(p), 0.05, 1.0)
-            if provider_forecast_end and ts > provider_forecast_end:
-                hrs = (ts - provider_forecast_end).total_seconds() / 3600.0
-                # fade provider to empirical after forecast horizon
-                alpha = math.exp(-max(0.0, hrs) / 12.0)
-                provider_w = alpha
-            else:
-                provider_w = 1.0
-
-            # Even inside provider horizon, blend with empirical to avoid systemic bias.
-            # Empirical influence increases with sample count.
-            emp_w_base = 0.15 + 0.35 * emp_conf
-            provider_w *= (1.0 - emp_w_base)
-            empirical_w = 1.0 - provider_w
-            f50 = _clamp(provider_w * p + empirical_w * e50, 0.05, 1.0)
-            f20 = _clamp(provider_w * p + empirical_w * e20, 0.05, 1.0)
-            return f50, min(f20, f50)
-
-        def _simulate_soc_between(start_ts: datetime, end_ts: datetime, start_soc: float, use_weather: bool) -> float:
-            if end_ts <= start_ts:
-                return start_soc
-            cap_wh = cells_current * (cell_mah / 1000.0) * cell_v
-            soc = float(start_soc)
-            t = start_ts
-            while t < end_ts:
-                t_next = min(t + step_delta, end_ts)
-                dt_h = (t_next - t).total_seconds() / 3600.0
-                mid = t + (t_next - t) / 2
-                elev, _ = _solar_position_utc(mid, lat, lon)
-                sproxy = max(0.0, math.sin(math.radians(max(elev, 0.0))))
-                wf50, _ = _weather_factors_for_future(mid)
-                p_prod = solar_peak_w * sproxy * (wf50 if use_weather else 1.0)
-                p_net = -load_w + p_prod
-                soc += (p_net * dt_h / cap_wh) * 100.0
-                soc = max(0.0, min(100.0, soc))
-                t = t_next
-            return soc
-
-        soc_now = _simulate_soc_between(latest_ts, now_utc, latest_soc, True)
-
-        times: list[str] = []
-        solar_proxy: list[float] = []
-        solar_elev: list[float] = []
-        weather_factor: list[float] = []
-        weather_factor_p20: list[float] = []
-
-        for i in range(steps + 1):
-            t = now_utc + timedelta(minutes=i * step_min)
-            elev, _ = _solar_position_utc(t, lat, lon)
-            sproxy = max(0.0, math.sin(math.radians(max(elev, 0.0))))
-            wf50, wf20 = _weather_factors_for_future(t)
-            times.append(t.isoformat())
-            solar_proxy.append(sproxy)
-            solar_elev.append(elev)
-            weather_factor.append(wf50)
-            weather_factor_p20.append(wf20)
-
-        def simulate(cells: int, use_weather: bool, weather_arr: list[float] | None = None) -> list[float]:
-            cap_wh = cells * (cell_mah / 1000.0) * cell_v
-            soc = float(soc_now)
-            out = [soc]
-            dt_h = step_min / 60.0
-            for i in range(1, len(times)):
-                wf = weather_arr[i] if (use_weather and weather_arr is not None) else (weather_factor[i] if use_weather else 1.0)
-                p_prod = solar_peak_w * solar_proxy[i] * wf
-                p_net = -load_w + p_prod
-                soc += (p_net * dt_h / cap_wh) * 100.0
-                soc = max(0.0, min(100.0, soc))
-                out.append(soc)
-            return out
-
-        scenario_cells = sorted({cells_current, *range(1, 13)})
-
-        forecast = {
-            "times": times,
-            "solar_proxy": solar_proxy,
-            "solar_elev": solar_elev,
-            "weather_factor": weather_factor,
-            "weather_factor_p20": weather_factor_p20,
-            "latest_soc": latest_soc,
-            "scenarios": {str(c): simulate(c, True) for c in scenario_cells},
-            "scenarios_p20": {str(c): simulate(c, True, weather_factor_p20) for c in scenario_cells},
-            "scenarios_clear": {str(c): simulate(c, False) for c in scenario_cells},
-        }
-
-        payload_start_utc = start_utc if explicit_start else now_utc - timedelta(days=DEFAULT_PAYLOAD_WINDOW_DAYS)
-        batt_rows_payload = _clip_samples_after(batt_rows, payload_start_utc)
-        volt_rows_payload = _clip_samples_after(volt_rows, payload_start_utc)
-        weather_hist_points_payload = _clip_dict_rows_after(weather_hist_points, "ts", payload_start_utc)
-        intervals_payload = _clip_dict_rows_after(intervals, "tm", payload_start_utc)
-
-        soc_actual = [{"x": s.ts.isoformat(), "y": s.value} for s in batt_rows_payload]
-        soc_projection_weather = [{"x": t, "y": v} for t, v in zip(times, forecast["scenarios"].get(str(cells_current), []), strict=False)]
-        soc_projection_weather_p20 = [{"x": t, "y": v} for t, v in zip(times, forecast["scenarios_p20"].get(str(cells_current), []), strict=False)]
-        soc_projection_clear = [{"x": t, "y": v} for t, v in zip(times, forecast["scenarios_clear"].get(str(cells_current), []), strict=False)]
-        cap_wh_runtime = cells_current * (cell_mah / 1000.0) * cell_v
-        soc_projection_no_sun: list[dict[str, Any]] = []
-        soc_no_sun = float(soc_now)
-        dt_h_step = step_min / 60.0
-        for t in times:
-            soc_projection_no_sun.append({"x": t, "y": soc_no_sun})
-            if cap_wh_runtime > 0:
-                soc_no_sun += ((-load_w) * dt_h_step / cap_wh_runtime) * 100.0
-                soc_no_sun = max(0.0, min(100.0, soc_no_sun))
-
-        remain_wh_no_sun = max(0.0, min(100.0, soc_now)) / 100.0 * cap_wh_runtime
-        no_sun_runtime_days = (remain_wh_no_sun / load_w / 24.0) if load_w > 0 else None
-
-        full_charge_at: datetime | None = None
-        full_charge_eta_h: float | None = None
-        for p in soc_projection_weather:
-            y = float(p.get("y", 0.0))
-            if y >= 99.9:
-                t = dt_util.parse_datetime(str(p.get("x", "")))
-                if t is not None:
-                    full_charge_at = t
-                    full_charge_eta_h = max(0.0, (t - now_utc).total_seconds() / 3600.0)
-                break
-
-        charged_wh_total = cap_wh_current * sum(max(0.0, float(it.get("dsoc", 0.0))) / 100.0 for it in intervals)
-        discharged_wh_total = cap_wh_current * sum(max(0.0, -float(it.get("dsoc", 0.0))) / 100.0 for it in intervals)
-
-        now_window_start = now_utc - timedelta(hours=24)
-        energy_24h_wh = 0.0
-        dur_24h_h = 0.0
-        for it in intervals:
-            tm = dt_util.parse_datetime(it.get("tm", ""))
-            if tm is None or tm < now_window_start:
-                continue
-            dt_h = float(it.get("dt_h", 0.0))
-            p_w = float(it.get("net_power_obs_w", 0.0))
-            energy_24h_wh += p_w * dt_h
-            dur_24h_h += dt_h
-        net_power_avg_24h_w = (energy_24h_wh / dur_24h_h) if dur_24h_h > 0 else None
-
-        now_solar_proxy = solar_proxy[0] if solar_proxy else 0.0
-        now_weather_factor = weather_factor[0] if weather_factor else 1.0
-        current_prod_weather_w = solar_peak_w * now_solar_proxy * now_weather_factor
-        net_power_now_w = -load_w + current_prod_weather_w
-        charge_power_now_w = max(0.0, net_power_now_w)
-        discharge_power_now_w = max(0.0, -net_power_now_w)
-        sun_history: list[dict[str, Any]] = []
-        for it in intervals_payload:
-            tm = dt_util.parse_datetime(it["tm"])
-            if tm and tm < now_utc:
-                sun_history.append({"x": it["tm"], "y": it["sun_elev_deg"]})
-
-        last_sun_hist_ts = dt_util.parse_datetime(sun_history[-1]["x"]) if sun_history else None
-        if last_sun_hist_ts is None or last_sun_hist_ts < now_utc:
-            t_hist = (latest_ts if latest_ts > start_utc else start_utc)
-            while t_hist < now_utc:
-                elev, _ = _solar_position_utc(t_hist, lat, lon)
-                sun_history.append({"x": t_hist.isoformat(), "y": elev})
-                t_hist += step_delta
-        sun_forecast = [{"x": t, "y": e} for t, e in zip(times, solar_elev, strict=False)]
-        power_observed = [{"x": it["tm"], "y": it["net_power_obs_w"]} for it in intervals_payload]
-        power_modeled = [{"x": it["tm"], "y": it["net_power_model_w"]} for it in intervals_payload]
-        power_prod_weather = [{"x": it["tm"], "y": it["production_w"]} for it in intervals_payload]
-        power_prod_clear = [{"x": it["tm"], "y": it["production_clear_w"]} for it in intervals_payload]
-        power_consumption = [{"x": it["tm"], "y": it["consumption_w"]} for it in intervals_payload]
-
-        apex_series = {
-            "now": now_utc.isoformat(),
-            "soc_actual": soc_actual,
-            "soc_projection_weather": soc_projection_weather,
-            "soc_projection_weather_p20": soc_projection_weather_p20,
-            "soc_projection_clear": soc_projection_clear,
-            "soc_projection_no_sun": soc_projection_no_sun,
-            "sun_history": sun_history,
-            "sun_forecast": sun_forecast,
-            "power_observed": power_observed,
-            "power_modeled": power_modeled,
-            "power_production_weather": power_prod_weather,
-            "power_production_clear": power_prod_clear,
-            "power_consumption": power_consumption,
-        }
-
-        return {
-            ATTR_META: {
-                "name": cfg.get(CONF_NAME),
-                "battery_entity": battery_entity,
-                "voltage_entity": voltage_entity,
-                "weather_entity": weather_entity,
-                "start_hour": start_hour,
-                "start_date": start_local.date().isoformat(),
-                "analysis_mode": ("manual" if explicit_start else "rolling_default"),
-                "model_window_days": DEFAULT_MODEL_WINDOW_DAYS,
-                "payload_window_days": (None if explicit_start else DEFAULT_PAYLOAD_WINDOW_DAYS),
-                "cells_current": cells_current,
-                "cell_mah": cell_mah,
-                "cell_v": cell_v,
-                "horizon_days": horizon_days,
-                "latest_local": latest_ts.astimezone(dt_util.DEFAULT_TIME_ZONE).isoformat(),
-                "now_local": now_utc.astimezone(dt_util.DEFAULT_TIME_ZONE).isoformat(),
+        t_end = time.perf_counter()
+        compute_ms = result.stats["stages_ms"]
+        self._record_refresh(
+            "full",
+            inputs.now_utc,
+            (t_end - t_start) * 1000.0,
+            stages_ms={
+                "fetch": (t_compute - t_start) * 1000.0,
+                **compute_ms,
+                # Executor queueing and thread handoff around the compute job.
+                "executor_wait": max(0.0, (t_publish - t_compute) * 1000.0 - sum(compute_ms.values())),
+                "publish": (t_end - t_publish) * 1000.0,
             },
-            ATTR_MODEL: {
-                "load_w": load_w,
-                "solar_peak_w": solar_peak_w,
-                "solar_peak_w_raw": solar_peak_w_raw,
-                "avg_net_w_observed": _mean([float(it.get("net_power_obs_w", 0.0)) for it in intervals]),
-                "current_production_weather_w": current_prod_weather_w,
-                "solar_scale_24h": solar_scale_24h,
-                "solar_scale_24h_raw": solar_scale_24h_raw,
-                "calibration_confidence": bt_conf,
-                "weather_fallback_method": "empirical_quantile_blend",
-                "weather_fallback_quantile_p20": 0.2,
-                "weather_fallback_quantile_p50": 0.5,
-                "weather_empirical_samples": emp_samples,
-                "weather_empirical_confidence": emp_conf,
-                "weather_provider_horizon_hours": (
-                    round((provider_forecast_end - now_utc).total_seconds() / 3600.0, 2)
-                    if provider_forecast_end
-                    else None
-                ),
-                "backtest_24h_mae_soc": (round(float(backtest_24h["mae_soc"]), 3) if backtest_24h else None),
-                "backtest_24h_bias_soc": (round(float(backtest_24h["bias_soc"]), 3) if backtest_24h else None),
-                "backtest_24h_rmse_soc": (round(float(backtest_24h["rmse_soc"]), 3) if backtest_24h else None),
-                "backtest_24h_horizon_error_soc": (round(float(backtest_24h["horizon_error_soc"]), 3) if backtest_24h else None),
-                "backtest_24h_samples_train": (int(backtest_24h["samples_train"]) if backtest_24h else None),
-                "backtest_24h_samples_test": (int(backtest_24h["samples_test"]) if backtest_24h else None),
-            },
-            ATTR_HISTORY_SOC: [{"t": s.ts.isoformat(), "v": s.value} for s in batt_rows_payload],
-            ATTR_HISTORY_VOLTAGE: [{"t": s.ts.isoformat(), "v": s.value} for s in volt_rows_payload],
-            ATTR_HISTORY_WEATHER: [
-                {
-                    "t": p["ts"].isoformat(),
-                    "condition": p.get("condition", ""),
-                    "cloud_coverage": p.get("cloud_coverage"),
-                    "factor": p.get("factor", 1.0),
-                }
-                for p in weather_hist_points_payload
-            ],
-            ATTR_INTERVALS: intervals_payload,
-            ATTR_FORECAST: forecast,
-            ATTR_APEX_SERIES: apex_series,
-            ATTR_NO_SUN_RUNTIME_DAYS: round(no_sun_runtime_days, 3) if no_sun_runtime_days is not None else None,
-            ATTR_NET_POWER_NOW_W: round(net_power_now_w, 3),
-            ATTR_NET_POWER_AVG_24H_W: round(net_power_avg_24h_w, 3) if net_power_avg_24h_w is not None else None,
-            ATTR_CHARGE_POWER_NOW_W: round(charge_power_now_w, 3),
-            ATTR_DISCHARGE_POWER_NOW_W: round(discharge_power_now_w, 3),
-            ATTR_ENERGY_CHARGED_KWH_TOTAL: round(charged_wh_total / 1000.0, 5),
-            ATTR_ENERGY_DISCHARGED_KWH_TOTAL: round(discharged_wh_total / 1000.0, 5),
-            ATTR_FULL_CHARGE_ETA_HOURS: (round(full_charge_eta_h, 3) if full_charge_eta_h is not None else None),
-            ATTR_FULL_CHARGE_AT: (full_charge_at.isoformat() if full_charge_at is not None else None),
-            "native_value": round(latest_soc, 2),
-        }
+            fetch_ms=dict(self._fetch_ms),
+            rows=result.stats["rows"],
+            payload_bytes=result.stats.get("payload_bytes"),
+        )
+        return result.data
 
 
 import logging
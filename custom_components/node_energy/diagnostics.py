@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import ATTR_META, ATTR_MODEL, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    data = coordinator.data or {}
+    return {
+        "entry": {"title": entry.title, "data": dict(entry.data), "options": dict(entry.options)},
+        "meta": data.get(ATTR_META),
+        "model": data.get(ATTR_MODEL),
+        # Newest last: stage timings (ms), row counts and, with debug logging, serialized attribute sizes (bytes).
+        "refreshes": list(coordinator.refresh_stats),
+        # Current attributes and heavy series; building them is only worth it on request.
+        "payload_bytes": await hass.async_add_executor_job(coordinator.payload_sizes),
+    }
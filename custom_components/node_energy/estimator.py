@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .intervals import IntervalStore
+
+# Intervals with at most this weather-adjusted sun proxy count as night.
+NIGHT_SUN_PROXY = 0.01
+# Decay weights are rebased before their exponent exceeds this many half-lives (2 ** 1024 overflows).
+_REBASE_HALF_LIVES = 512.0
+
+
+def _common_prefix(pairs: list[tuple[array, array]]) -> int:
+    """Length of the longest prefix on which every (a, b) pair of equally long arrays agrees."""
+    lo, hi = 0, len(pairs[0][0])
+    if all(a == b for a, b in pairs):
+        return hi
+    # [0, lo) agrees, [0, hi) does not; compare only the new part of each probe.
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if all(a[lo:mid] == b[lo:mid] for a, b in pairs):
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+class LoadSolarEstimator:
+    """Online weighted least-squares fit of constant load and solar peak power.
+
+    Observed net power is modelled as `-load_w` at night and
+    `-load_w + solar_peak_w * x` by day, `x` being the weather-adjusted sun
+    proxy. The estimator keeps prefix sums of the sufficient statistics of
+    both partitions, so feeding an interval is O(1) and fitting on the first
+    `stop` intervals (or as of a time) needs no rescan.
+
+    It is meant to be kept across refreshes: `align` slides it onto a rebuilt
+    interval store, dropping intervals that left the window and any that were
+    revised, so `update` only feeds the rest. The store's first interval
+    starts at the retimed start-time sample and changes whenever the window
+    slides, so it is summed separately as the head.
+
+    With a half-life, interval weights grow by 2 ** ((t - t0) / half_life).
+    Every fit quantity is a ratio of sums, so this equals exponential
+    forgetting as of whatever time the fit is taken at. `t0` moves forward
+    (scaling all sums down) before the exponent can overflow. A half-life of
+    0 disables forgetting.
+    """
+
+    def __init__(self, half_life_s: float = 0.0) -> None:
+        self.half_life_s = half_life_s
+        self._reset()
+
+    def _reset(self) -> None:
+        # Inputs per interval, including those before `_start` that already left the window.
+        self.t = array("d")
+        self._proxy = array("d")
+        self._wf = array("d")
+        self._y = array("d")
+        self._weight = array("d")
+        self._start = 0
+        self._t0: float | None = None
+        # Inputs and statistics of a first interval that replaces the one before `_start`.
+        self._head: tuple[float, float, float, float, float] | None = None
+        self._head_sums: tuple[float, ...] | None = None
+        # Prefix sums; index i covers the first i intervals.
+        self._n_night = array("q", [0])
+        self._n_day = array("q", [0])
+        self._w = array("d", [0.0])
+        self._wy = array("d", [0.0])
+        self._w_night = array("d", [0.0])
+        self._wy_night = array("d", [0.0])
+        self._wx_day = array("d", [0.0])
+        self._wxx_day = array("d", [0.0])
+        self._wxy_day = array("d", [0.0])
+
+    def __len__(self) -> int:
+        return len(self.t) - self._start + (self._head is not None)
+
+    def copy(self) -> LoadSolarEstimator:
+        out = LoadSolarEstimator.__new__(LoadSolarEstimator)
+        out.__dict__ = {key: array(v.typecode, v) if isinstance(v, array) else v for key, v in self.__dict__.items()}
+        return out
+
+    def _stats(self, t: float, proxy: float, wf: float, y: float, w: float) -> tuple[float, ...]:
+        """(n_night, n_day, w, wy, w_night, wy_night, wx_day, wxx_day, wxy_day) of one interval."""
+        if self.half_life_s > 0:
+            if self._t0 is None:
+                self._t0 = t
+            elif t - self._t0 > _REBASE_HALF_LIVES * self.half_life_s:
+                self._rebase(t)
+            w *= 2.0 ** ((t - self._t0) / self.half_life_s)
+        x = proxy * wf
+        if x <= NIGHT_SUN_PROXY:
+            return 1, 0, w, w * y, w, w * y, 0.0, 0.0, 0.0
+        return 0, 1, w, w * y, 0.0, 0.0, w * x, w * x * x, w * x * y
+
+    def add(self, t: float, proxy: float, wf: float, y: float, w: float) -> None:
+        self.t.append(t)
+        self._proxy.append(proxy)
+        self._wf.append(wf)
+        self._y.append(y)
+        self._weight.append(w)
+        for col, v in zip(self._columns(), self._stats(t, proxy, wf, y, w), strict=True):
+            col.append(col[-1] + v)
+
+    def _columns(self) -> tuple[array, ...]:
+        return (
+            self._n_night,
+            self._n_day,
+            self._w,
+            self._wy,
+            self._w_night,
+            self._wy_night,
+            self._wx_day,
+            self._wxx_day,
+            self._wxy_day,
+        )
+
+    def _rebase(self, t0: float) -> None:
+        # Weights are only compared within a fit, so scaling every sum by the
+        # same factor leaves all fits unchanged; very old ones may underflow to 0.
+        scale = 2.0 ** (-(t0 - self._t0) / self.half_life_s)
+        for col in self._columns()[2:]:
+            for i in range(len(col)):
+                col[i] *= scale
+        if self._head_sums is not None:
+            self._head_sums = (*self._head_sums[:2], *(v * scale for v in self._head_sums[2:]))
+        self._t0 = t0
+
+    def _row(self, i: int) -> tuple[float, float, float, float, float]:
+        return self.t[i], self._proxy[i], self._wf[i], self._y[i], self._weight[i]
+
+    def align(self, store: IntervalStore) -> int:
+        """Slide onto `store`; returns how many of its leading intervals are kept.
+
+        Intervals before the store's first one leave the fit, and everything
+        from the first interval after the head that differs from `store`
+        (time or inputs) is dropped, so `update` then feeds only revised and
+        new intervals.
+        """
+        n = len(store)
+        j = bisect_left(self.t, store.t[1]) if n > 1 else len(self.t)
+        overlap = min(len(self.t) - j, n - 1)
+        keep = 0
+        if overlap:
+            end = j + overlap
+            keep = _common_prefix(
+                [
+                    (self.t[j:end], store.t[1 : 1 + overlap]),
+                    (self._proxy[j:end], store.sun_proxy[1 : 1 + overlap]),
+                    (self._wf[j:end], store.wf[1 : 1 + overlap]),
+                    (self._y[j:end], store.net_obs[1 : 1 + overlap]),
+                    (self._weight[j:end], store.weight[1 : 1 + overlap]),
+                ]
+            )
+        if not keep:
+            self._reset()
+            return 0
+        for col in (self.t, self._proxy, self._wf, self._y, self._weight):
+            del col[j + keep :]
+        for col in self._columns():
+            del col[j + keep + 1 :]
+        head = (store.t[0], store.sun_proxy[0], store.wf[0], store.net_obs[0], store.weight[0])
+        if j > 0 and self._row(j - 1) == head:
+            self._start = j - 1
+            self._head = self._head_sums = None
+        else:
+            self._start = j
+            self._head = head
+            self._head_sums = self._stats(*head)
+        if self._start > len(self.t) // 2:
+            self._compact()
+        return keep + 1
+
+    def _compact(self) -> None:
+        # Refeed the window so intervals that left it stop taking memory.
+        rows = [self._row(i) for i in range(self._start, len(self.t))]
+        if self._head is not None:
+            rows.insert(0, self._head)
+        self._reset()
+        for row in rows:
+            self.add(*row)
+
+    def update(self, store: IntervalStore) -> int:
+        """Feed the intervals of `store` this estimator has not seen yet."""
+        start = len(self)
+        for i in range(start, len(store)):
+            self.add(store.t[i], store.sun_proxy[i], store.wf[i], store.net_obs[i], store.weight[i])
+        return len(store) - start
+
+    def fit(self, stop: int | None = None) -> tuple[float, float]:
+        """(load_w, solar_peak_w) fitted on the first `stop` intervals (all by default)."""
+        i0 = self._start
+        head = self._head_sums if stop is None or stop > 0 else None
+        if stop is None:
+            i = len(self.t)
+        else:
+            i = max(i0, i0 + stop - (self._head is not None))
+        n_night, n_day, w, wy, w_night, wy_night, wx_day, wxx_day, wxy_day = (
+            col[i] - col[i0] + (head[k] if head is not None else 0) for k, col in enumerate(self._columns())
+        )
+        if not n_night and not n_day:
+            return 0.0, 0.0
+
+        mean_all = wy / w if w > 0 else 0.0
+        if n_night:
+            load_w = max(0.0, -(wy_night / w_night if w_night > 0 else 0.0))
+        else:
+            load_w = max(0.0, -mean_all)
+
+        if n_day:
+            num = wxy_day + load_w * wx_day
+            solar_peak_w = max(0.0, num / wxx_day) if wxx_day > 0 else 0.0
+        else:
+            solar_peak_w = max(0.0, mean_all + load_w)
+        return load_w, solar_peak_w
+
+    def fit_as_of(self, ts: float) -> tuple[float, float]:
+        """Fit on the intervals with midpoint at or before `ts`."""
+        if self._head is not None and ts < self._head[0]:
+            return self.fit(0)
+        return self.fit(bisect_right(self.t, ts, self._start) - self._start + (self._head is not None))
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class Sample:
+    ts: datetime
+    value: float
+
+
+def sample_ts(s: Sample) -> datetime:
+    return s.ts
+
+
+def sample_with_ts(s: Sample, ts: datetime) -> Sample:
+    return replace(s, ts=ts)
+
+
+def point_ts(p: dict[str, Any]) -> datetime:
+    return p["ts"]
+
+
+def point_with_ts(p: dict[str, Any], ts: datetime) -> dict[str, Any]:
+    return {**p, "ts": ts}
+
+
+class HistoryBuffer(Generic[T]):
+    """Time-ordered rows of one entity, filled incrementally from the recorder.
+
+    The buffer is complete from `start` onwards. Rows before `start` are
+    dropped except the newest one, which stands in for the start-time state the
+    recorder would return for a fresh query at `start`.
+    """
+
+    def __init__(self, ts_of: Callable[[T], datetime], with_ts: Callable[[T, datetime], T]) -> None:
+        self._ts_of = ts_of
+        self._with_ts = with_ts
+        self.rows: list[T] = []
+        self.start: datetime | None = None
+
+    @property
+    def last_ts(self) -> datetime | None:
+        return self._ts_of(self.rows[-1]) if self.rows else None
+
+    def covers(self, start_utc: datetime) -> bool:
+        return self.start is not None and self.start <= start_utc and bool(self.rows)
+
+    def replace(self, rows: list[T], start_utc: datetime) -> None:
+        self.rows = list(rows)
+        self.start = start_utc
+
+    def extend(self, rows: list[T]) -> int:
+        last = self.last_ts
+        added = 0
+        for row in rows:
+            ts = self._ts_of(row)
+            if last is not None and ts <= last:
+                continue
+            self.rows.append(row)
+            last = ts
+            added += 1
+        return added
+
+    def since(self, start_utc: datetime) -> list[T]:
+        """Rows from `start_utc` on, led by the start-time state; the buffer is left as is."""
+        idx = bisect_right(self.rows, start_utc, key=self._ts_of)
+        if idx == 0:
+            return list(self.rows)
+        head = self.rows[idx - 1]
+        if self._ts_of(head) < start_utc:
+            head = self._with_ts(head, start_utc)
+        return [head, *self.rows[idx:]]
+
+    def trim(self, start_utc: datetime) -> None:
+        self.rows = self.since(start_utc)
+        self.start = start_utc
+
+
+class StatisticsBuffer:
+    """Hourly long-term statistic means of one entity, as samples at the hour centres.
+
+    Closed hours never change, so only hours after the newest cached one are
+    queried again. The buffer is complete from `start` onwards.
+    """
+
+    def __init__(self) -> None:
+        self.rows: list[Sample] = []
+        self.start: datetime | None = None
+
+    def covers(self, start_utc: datetime) -> bool:
+        return self.start is not None and self.start <= start_utc and bool(self.rows)
+
+    def next_hour(self) -> datetime | None:
+        return self.rows[-1].ts + timedelta(minutes=30) if self.rows else None
+
+    def update(self, rows: list[Sample], start_utc: datetime) -> None:
+        last = self.rows[-1].ts if self.rows else None
+        self.rows.extend(r for r in rows if last is None or r.ts > last)
+        del self.rows[: bisect_left(self.rows, start_utc, key=sample_ts)]
+        self.start = start_utc
+
+    def before(self, end_utc: datetime) -> list[Sample]:
+        return self.rows[: bisect_left(self.rows, end_utc, key=sample_ts)]
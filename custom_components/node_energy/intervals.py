@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+import math
+from typing import Any
+
+
+def iso_utc(ts: float) -> str:
+    return datetime.fromtimestamp(ts, UTC).isoformat()
+
+
+class IntervalStore:
+    """Columnar table of battery intervals, ordered by midpoint time.
+
+    One row per pair of consecutive battery samples. Times are UTC epoch
+    seconds; ISO strings are only produced by `to_rows` at the serialization
+    boundary. A missing voltage is stored as NaN. `weight` is 1 for intervals
+    between raw states and proportionally larger for coarse intervals built
+    from hourly statistics.
+    """
+
+    def __init__(self) -> None:
+        self.t = array("d")
+        self.dt_h = array("d")
+        self.soc0 = array("d")
+        self.soc1 = array("d")
+        self.dsoc = array("d")
+        self.sun_elev = array("d")
+        self.sun_az = array("d")
+        self.sun_proxy = array("d")
+        self.wf = array("d")
+        self.voltage = array("d")
+        self.net_obs = array("d")
+        self.local_hour = array("b")
+        self.weight = array("d")
+        self.condition: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.t)
+
+    def append(
+        self,
+        t: float,
+        dt_h: float,
+        soc0: float,
+        soc1: float,
+        sun_elev: float,
+        sun_az: float,
+        sun_proxy: float,
+        wf: float,
+        condition: str,
+        voltage: float | None,
+        cap_wh: float,
+        local_hour: int,
+        weight: float = 1.0,
+    ) -> None:
+        dsoc = soc1 - soc0
+        self.t.append(t)
+        self.dt_h.append(dt_h)
+        self.soc0.append(soc0)
+        self.soc1.append(soc1)
+        self.dsoc.append(dsoc)
+        self.sun_elev.append(sun_elev)
+        self.sun_az.append(sun_az)
+        self.sun_proxy.append(sun_proxy)
+        self.wf.append(wf)
+        self.condition.append(condition)
+        self.voltage.append(math.nan if voltage is None else voltage)
+        self.net_obs.append(cap_wh * (dsoc / 100.0) / dt_h)
+        self.local_hour.append(local_hour)
+        self.weight.append(weight)
+
+    def index_at_or_after(self, ts: float) -> int:
+        return bisect_left(self.t, ts)
+
+    def index_after(self, ts: float) -> int:
+        return bisect_right(self.t, ts)
+
+    def to_rows(
+        self,
+        start: int = 0,
+        end: int | None = None,
+        extra: dict[str, Sequence[float]] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Serialize rows `start:end` as dicts; `extra` columns are aligned to `start`."""
+        extra = extra or {}
+        out: list[dict[str, Any]] = []
+        for k, i in enumerate(range(start, len(self) if end is None else end)):
+            v = self.voltage[i]
+            row: dict[str, Any] = {
+                "tm": iso_utc(self.t[i]),
+                "dt_h": self.dt_h[i],
+                "soc0": self.soc0[i],
+                "soc1": self.soc1[i],
+                "dsoc": self.dsoc[i],
+                "sun_elev_deg": self.sun_elev[i],
+                "sun_az_deg": self.sun_az[i],
+                "sun_proxy": self.sun_proxy[i],
+                "weather_factor_hist": self.wf[i],
+                "weather_condition_hist": self.condition[i],
+                "voltage": None if math.isnan(v) else v,
+                "net_power_obs_w": self.net_obs[i],
+            }
+            for key, col in extra.items():
+                row[key] = col[k]
+            out.append(row)
+        return out
+
+
+@dataclass
+class EnergyTotals:
+    """Charged and discharged energy accumulated over all intervals ever seen.
+
+    Only intervals with a midpoint after `last_t` are added, so the totals
+    never shrink when old intervals leave the model window and a refresh
+    costs O(new intervals).
+    """
+
+    charged_wh: float = 0.0
+    discharged_wh: float = 0.0
+    last_t: float | None = None
+
+    def update(self, store: IntervalStore, cap_wh: float) -> int:
+        start = 0 if self.last_t is None else store.index_after(self.last_t)
+        if start >= len(store):
+            return 0
+        dsoc = store.dsoc[start:]
+        self.charged_wh += cap_wh * sum(max(0.0, d) / 100.0 for d in dsoc)
+        self.discharged_wh += cap_wh * sum(max(0.0, -d) / 100.0 for d in dsoc)
+        self.last_t = store.t[-1]
+        return len(dsoc)
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with Home Assistant core
+    np = None
+
+
+def net_power(load_w: float, solar_peak_w: float, solar_proxy: Sequence[float], weather: Sequence[float] | None) -> list[float]:
+    """Per-step net battery power in W; `weather` None means clear sky."""
+    if weather is None:
+        return [-load_w + solar_peak_w * p for p in solar_proxy]
+    return [-load_w + solar_peak_w * p * wf for p, wf in zip(solar_proxy, weather, strict=True)]
+
+
+def simulate_soc(soc0: float, net_w: Sequence[Sequence[float]], caps_wh: Sequence[float], dt_h: float) -> list[list[float]]:
+    """Advance several SoC curves at once, clamped to 0..100 %.
+
+    Curve k integrates `net_w[k]` on a battery of `caps_wh[k]`; step i uses
+    `net_w[k][i]` (index 0 is the starting point). Per-element arithmetic
+    matches a scalar loop exactly, so the numpy path is a drop-in.
+    """
+    if not caps_wh:
+        return []
+    n = len(net_w[0])
+    if np is None:
+        out: list[list[float]] = []
+        for net, cap_wh in zip(net_w, caps_wh, strict=True):
+            soc = float(soc0)
+            curve = [soc]
+            for i in range(1, n):
+                soc += (net[i] * dt_h / cap_wh) * 100.0
+                soc = max(0.0, min(100.0, soc))
+                curve.append(soc)
+            out.append(curve)
+        return out
+
+    delta = (np.asarray(net_w, dtype=float).T * dt_h / np.asarray(caps_wh, dtype=float)) * 100.0
+    socs = np.empty((n, len(caps_wh)))
+    soc = np.full(len(caps_wh), float(soc0))
+    socs[0] = soc
+    for i in range(1, n):
+        soc += delta[i]
+        np.clip(soc, 0.0, 100.0, out=soc)
+        socs[i] = soc
+    return socs.T.tolist()
+
+
+SCENARIO_VARIANTS = ("scenarios", "scenarios_p20", "scenarios_clear")
+
+
+class ScenarioEngine:
+    """SoC scenario curves of one refresh, simulated on demand.
+
+    Holds the shared forecast inputs; a (variant, cells) curve is computed
+    the first time it is asked for and memoized until the next refresh
+    replaces the engine. Missing curves of one request are batched.
+    """
+
+    def __init__(
+        self,
+        soc0: float,
+        load_w: float,
+        solar_peak_w: float,
+        solar_proxy: Sequence[float],
+        weather_factor: Sequence[float],
+        weather_factor_p20: Sequence[float],
+        cell_mah: float,
+        cell_v: float,
+        dt_h: float,
+    ) -> None:
+        self.soc0 = soc0
+        self.load_w = load_w
+        self.solar_peak_w = solar_peak_w
+        self.solar_proxy = solar_proxy
+        self.cell_mah = cell_mah
+        self.cell_v = cell_v
+        self.dt_h = dt_h
+        self._weather: dict[str, Sequence[float] | None] = {
+            "scenarios": weather_factor,
+            "scenarios_p20": weather_factor_p20,
+            "scenarios_clear": None,
+        }
+        self._net: dict[str, list[float]] = {}
+        self._curves: dict[tuple[str, int], list[float]] = {}
+
+    def _net_power(self, variant: str) -> list[float]:
+        if variant not in self._net:
+            self._net[variant] = net_power(self.load_w, self.solar_peak_w, self.solar_proxy, self._weather[variant])
+        return self._net[variant]
+
+    def curves(self, cells: Iterable[int], variants: Iterable[str] = SCENARIO_VARIANTS) -> dict[str, dict[str, list[float]]]:
+        """`{variant: {str(cells): curve}}`; unknown variants raise KeyError."""
+        cells = [int(c) for c in cells]
+        keys = [(variant, c) for variant in variants for c in cells]
+        missing = [key for key in dict.fromkeys(keys) if key not in self._curves]
+        if missing:
+            curves = simulate_soc(
+                self.soc0,
+                [self._net_power(variant) for variant, _ in missing],
+                [c * (self.cell_mah / 1000.0) * self.cell_v for _, c in missing],
+                self.dt_h,
+            )
+            self._curves.update(zip(missing, curves, strict=True))
+        out: dict[str, dict[str, list[float]]] = {}
+        for variant, c in keys:
+            out.setdefault(variant, {})[str(c)] = self._curves[(variant, c)]
+        return out
+
+    def rebased(
+        self, soc0: float, start: int, load_w: float | None = None, solar_peak_w: float | None = None
+    ) -> ScenarioEngine:
+        """A fresh engine on the forecast grid from step `start` on, starting at `soc0`.
+
+        `load_w` / `solar_peak_w` replace the fitted model when given.
+        """
+        return ScenarioEngine(
+            soc0,
+            self.load_w if load_w is None else load_w,
+            self.solar_peak_w if solar_peak_w is None else solar_peak_w,
+            self.solar_proxy[start:],
+            self._weather["scenarios"][start:],
+            self._weather["scenarios_p20"][start:],
+            self.cell_mah,
+            self.cell_v,
+            self.dt_h,
+        )
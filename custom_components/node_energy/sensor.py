@@ -3,29 +3,27 @@ from __future__ import annotations
 from homeassistant.util import dt as dt_util
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
-    ATTR_APEX_SERIES,
     ATTR_CHARGE_POWER_NOW_W,
     ATTR_DISCHARGE_POWER_NOW_W,
     ATTR_ENERGY_CHARGED_KWH_TOTAL,
     ATTR_ENERGY_DISCHARGED_KWH_TOTAL,
-    ATTR_FORECAST,
     ATTR_FULL_CHARGE_AT,
     ATTR_FULL_CHARGE_ETA_HOURS,
-    ATTR_HISTORY_SOC,
-    ATTR_HISTORY_VOLTAGE,
-    ATTR_HISTORY_WEATHER,
-    ATTR_INTERVALS,
     ATTR_META,
     ATTR_MODEL,
     ATTR_NET_POWER_AVG_24H_W,
     ATTR_NET_POWER_NOW_W,
     ATTR_NO_SUN_RUNTIME_DAYS,
+    CONF_SERIES_ATTRIBUTES,
+    DEFAULT_SERIES_ATTRIBUTES,
     DOMAIN,
+    SERIES_KEYS,
 )
 
 
@@ -66,6 +64,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_e
             NodeEnergyTimestampSensor(
                 coordinator, entry, "full_charge_at", "Full charge at", ATTR_FULL_CHARGE_AT, icon="mdi:clock-check-outline",
             ),
+            NodeEnergyRefreshTimeSensor(coordinator, entry),
         ],
         True,
     )
@@ -75,6 +74,8 @@ class NodeEnergySensor(CoordinatorEntity, SensorEntity):
     _attr_has_entity_name = True
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = "%"
+    # Only published with the legacy series_attributes option; never worth recording.
+    _unrecorded_attributes = frozenset(SERIES_KEYS)
 
     def __init__(self, coordinator, entry: ConfigEntry) -> None:
         super().__init__(coordinator)
@@ -90,16 +91,15 @@ class NodeEnergySensor(CoordinatorEntity, SensorEntity):
     @property
     def extra_state_attributes(self):
         d = self.coordinator.data or {}
-        return {
+        attrs = {
             ATTR_META: d.get(ATTR_META),
             ATTR_MODEL: d.get(ATTR_MODEL),
-            ATTR_HISTORY_SOC: d.get(ATTR_HISTORY_SOC),
-            ATTR_HISTORY_VOLTAGE: d.get(ATTR_HISTORY_VOLTAGE),
-            ATTR_HISTORY_WEATHER: d.get(ATTR_HISTORY_WEATHER),
-            ATTR_INTERVALS: d.get(ATTR_INTERVALS),
-            ATTR_FORECAST: d.get(ATTR_FORECAST),
-            ATTR_APEX_SERIES: d.get(ATTR_APEX_SERIES),
         }
+        # Heavy series are served by the node_energy/series websocket command;
+        # with the legacy option they were built in the executor after the refresh.
+        if self.coordinator.cfg.get(CONF_SERIES_ATTRIBUTES, DEFAULT_SERIES_ATTRIBUTES):
+            attrs.update({key: self.coordinator.get_series(key, build=False)[1] for key in SERIES_KEYS})
+        return attrs
 
 
 class NodeEnergyNoSunRuntimeSensor(CoordinatorEntity, SensorEntity):
@@ -177,3 +177,37 @@ class NodeEnergyTimestampSensor(CoordinatorEntity, SensorEntity):
         if not raw:
             return None
         return dt_util.parse_datetime(str(raw))
+
+
+class NodeEnergyRefreshTimeSensor(CoordinatorEntity, SensorEntity):
+    _attr_has_entity_name = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = "ms"
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(self, coordinator, entry: ConfigEntry) -> None:
+        super().__init__(coordinator)
+        self._attr_unique_id = f"{entry.entry_id}_refresh_time"
+        self._attr_name = f"{entry.title} Refresh time"
+
+    def _last_full(self) -> dict | None:
+        return next((s for s in reversed(self.coordinator.refresh_stats) if s["kind"] == "full"), None)
+
+    @property
+    def native_value(self):
+        last = self._last_full()
+        return last["total_ms"] if last else None
+
+    @property
+    def extra_state_attributes(self):
+        last = self._last_full()
+        if not last:
+            return None
+        attrs = {"stages_ms": last["stages_ms"], "rows": last["rows"]}
+        # Payload sizes are only measured while debug logging is on.
+        if "payload_bytes" in last:
+            attrs["payload_bytes"] = sum(last["payload_bytes"].values())
+        return attrs
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Sequence
+
+
+class HistogramSketch:
+    """Weighted histogram with fixed-width bins over a bounded domain.
+
+    Bin-wise sums make it mergeable and let values be removed again, which
+    tree or compactor sketches cannot do exactly. Quantiles interpolate
+    linearly inside a bin, so their error is at most one bin width.
+    """
+
+    def __init__(self, lo: float, hi: float, bins: int) -> None:
+        self.lo = lo
+        self.hi = hi
+        self.bins = bins
+        self.width = (hi - lo) / bins
+        self.counts = [0.0] * bins
+        self.total = 0.0
+        self.n = 0
+
+    def bin_of(self, v: float) -> int:
+        return min(self.bins - 1, max(0, int((v - self.lo) / self.width)))
+
+    def add_bin(self, b: int, w: float) -> None:
+        self.counts[b] += w
+        self.total += w
+        self.n += 1
+
+    def remove_bin(self, b: int, w: float) -> None:
+        # Snap float residue to zero so an emptied bin does not linger.
+        c = self.counts[b] - w
+        self.counts[b] = c if c > 1e-9 else 0.0
+        self.n -= 1
+        self.total = self.total - w if self.n else 0.0
+
+    def merge(self, other: HistogramSketch) -> None:
+        for b, c in enumerate(other.counts):
+            self.counts[b] += c
+        self.total += other.total
+        self.n += other.n
+
+    def quantile(self, q: float) -> float | None:
+        if self.total <= 0:
+            return None
+        target = max(0.0, min(1.0, q)) * self.total
+        acc = 0.0
+        last = self.bins - 1
+        for b, c in enumerate(self.counts):
+            if c > 0:
+                if acc + c >= target:
+                    return self.lo + (b + (target - acc) / c) * self.width
+                last = b
+            acc += c
+        # Rounding left the bin sums just short of `total`: top of the last filled bin.
+        return self.lo + (last + 1) * self.width
+
+
+class WeatherSketch:
+    """Empirical weather factors per local hour and overall, over a sliding interval window.
+
+    Holds one (t, code, weight) entry per interval seen, in time order, where
+    code is `hour * bins + bin`, or -1 for an interval without a value, so
+    intervals leaving the window are removed exactly. Values depend on the
+    load/solar fit they were derived from, kept in `load_w` and
+    `solar_peak_w_raw` so callers can rebuild once the fit has drifted.
+    """
+
+    LO = 0.05
+    HI = 1.0
+    BINS = 380
+
+    def __init__(self, load_w: float, solar_peak_w_raw: float) -> None:
+        self.load_w = load_w
+        self.solar_peak_w_raw = solar_peak_w_raw
+        self.hourly = [HistogramSketch(self.LO, self.HI, self.BINS) for _ in range(24)]
+        self.overall = HistogramSketch(self.LO, self.HI, self.BINS)
+        self.entries: deque[tuple[float, int, float]] = deque()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def samples(self) -> int:
+        return self.overall.n
+
+    def drifted(self, load_w: float, solar_peak_w_raw: float, tolerance: float) -> bool:
+        return abs(load_w - self.load_w) > tolerance * max(abs(self.load_w), 1e-3) or abs(
+            solar_peak_w_raw - self.solar_peak_w_raw
+        ) > tolerance * max(abs(self.solar_peak_w_raw), 1e-3)
+
+    def add(self, t: float, hour: int, value: float | None, w: float, front: bool = False) -> None:
+        self.add_entry(t, -1 if value is None else hour * self.BINS + self.overall.bin_of(value), w, front)
+
+    def add_entry(self, t: float, code: int, w: float, front: bool = False) -> None:
+        if code >= 0:
+            hour, b = divmod(code, self.BINS)
+            self.hourly[hour].add_bin(b, w)
+            self.overall.add_bin(b, w)
+        if front:
+            self.entries.appendleft((t, code, w))
+        else:
+            self.entries.append((t, code, w))
+
+    def _discard(self, code: int, w: float) -> None:
+        if code >= 0:
+            hour, b = divmod(code, self.BINS)
+            self.hourly[hour].remove_bin(b, w)
+            self.overall.remove_bin(b, w)
+
+    def align(self, ts: Sequence[float]) -> tuple[int, int] | None:
+        """Slide onto the ascending interval times `ts`; returns the covered `ts[start:end]`.
+
+        Entries before `ts[0]` are removed. None means the entries no longer
+        match `ts` (intervals were revised) and the sketch must be rebuilt.
+        """
+        if not ts:
+            return None
+        while self.entries and self.entries[0][0] < ts[0]:
+            _, code, w = self.entries.popleft()
+            self._discard(code, w)
+        if not self.entries:
+            return 0, 0
+        start = bisect_left(ts, self.entries[0][0])
+        end = start + len(self.entries)
+        if end > len(ts) or ts[start] != self.entries[0][0] or ts[end - 1] != self.entries[-1][0]:
+            return None
+        return start, end
+
+    def quantile(self, q: float, hour: int | None = None) -> float | None:
+        return (self.overall if hour is None else self.hourly[hour]).quantile(q)
+
+    def copy(self) -> WeatherSketch:
+        out = WeatherSketch(self.load_w, self.solar_peak_w_raw)
+        for src, dst in zip([*self.hourly, self.overall], [*out.hourly, out.overall], strict=True):
+            dst.merge(src)
+        out.entries = deque(self.entries)
+        return out
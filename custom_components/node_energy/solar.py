@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Sequence
+import math
+import threading
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with Home Assistant core
+    np = None
+
+_UNIX_EPOCH_JD = 2440587.5
+_J2000_JD = 2451545.0
+
+SLOT_SECONDS = 600
+
+
+# NOAA-style approximation; same model as the standalone script.
+def _equatorial_at_jd(jd: float, lon_deg: float) -> tuple[float, float]:
+    """(declination, local hour angle) in radians; neither depends on latitude."""
+    t = (jd - _J2000_JD) / 36525.0
+
+    l0 = (280.46646 + t * (36000.76983 + t * 0.0003032)) % 360.0
+    m_sun = 357.52911 + t * (35999.05029 - 0.0001537 * t)
+    m_rad = math.radians(m_sun % 360.0)
+    c = (
+        math.sin(m_rad) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + math.sin(2 * m_rad) * (0.019993 - 0.000101 * t)
+        + math.sin(3 * m_rad) * 0.000289
+    )
+    true_long = l0 + c
+    omega = 125.04 - 1934.136 * t
+    lam = true_long - 0.00569 - 0.00478 * math.sin(math.radians(omega))
+    eps0 = 23.0 + (26.0 + ((21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0)) / 60.0
+    eps = eps0 + 0.00256 * math.cos(math.radians(omega))
+
+    lam_r = math.radians(lam)
+    eps_r = math.radians(eps)
+    decl = math.asin(math.sin(eps_r) * math.sin(lam_r))
+    ra = math.atan2(math.cos(eps_r) * math.sin(lam_r), math.cos(lam_r))
+
+    gmst = (
+        280.46061837
+        + 360.98564736629 * (jd - _J2000_JD)
+        + 0.000387933 * t * t
+        - (t * t * t) / 38710000.0
+    ) % 360.0
+    lst = math.radians((gmst + lon_deg) % 360.0)
+    ha = (lst - ra + math.pi) % (2 * math.pi) - math.pi
+    return decl, ha
+
+
+def _horizontal(decl: float, ha: float, lat_deg: float) -> tuple[float, float]:
+    """(elevation, azimuth) in degrees."""
+    lat_r = math.radians(lat_deg)
+    elev = math.asin(math.sin(lat_r) * math.sin(decl) + math.cos(lat_r) * math.cos(decl) * math.cos(ha))
+    az = math.atan2(
+        math.sin(ha),
+        math.cos(ha) * math.sin(lat_r) - math.tan(decl) * math.cos(lat_r),
+    )
+    return math.degrees(elev), (math.degrees(az) + 180.0) % 360.0
+
+
+def _equatorial_np(epochs: Any, lon_deg: float) -> tuple[Any, Any]:
+    jd = np.asarray(epochs, dtype=float) / 86400.0 + _UNIX_EPOCH_JD
+    t = (jd - _J2000_JD) / 36525.0
+
+    l0 = np.mod(280.46646 + t * (36000.76983 + t * 0.0003032), 360.0)
+    m_sun = 357.52911 + t * (35999.05029 - 0.0001537 * t)
+    m_rad = np.radians(np.mod(m_sun, 360.0))
+    c = (
+        np.sin(m_rad) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + np.sin(2 * m_rad) * (0.019993 - 0.000101 * t)
+        + np.sin(3 * m_rad) * 0.000289
+    )
+    true_long = l0 + c
+    omega = 125.04 - 1934.136 * t
+    lam = true_long - 0.00569 - 0.00478 * np.sin(np.radians(omega))
+    eps0 = 23.0 + (26.0 + ((21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0)) / 60.0
+    eps = eps0 + 0.00256 * np.cos(np.radians(omega))
+
+    lam_r = np.radians(lam)
+    eps_r = np.radians(eps)
+    decl = np.arcsin(np.sin(eps_r) * np.sin(lam_r))
+    ra = np.arctan2(np.cos(eps_r) * np.sin(lam_r), np.cos(lam_r))
+
+    gmst = np.mod(
+        280.46061837
+        + 360.98564736629 * (jd - _J2000_JD)
+        + 0.000387933 * t * t
+        - (t * t * t) / 38710000.0,
+        360.0,
+    )
+    lst = np.radians(np.mod(gmst + lon_deg, 360.0))
+    ha = np.mod(lst - ra + math.pi, 2 * math.pi) - math.pi
+    return decl, ha
+
+
+def _horizontal_np(decl: Any, ha: Any, lat_deg: float) -> tuple[Any, Any]:
+    lat_r = math.radians(lat_deg)
+    elev = np.arcsin(math.sin(lat_r) * np.sin(decl) + math.cos(lat_r) * np.cos(decl) * np.cos(ha))
+    az = np.arctan2(
+        np.sin(ha),
+        np.cos(ha) * math.sin(lat_r) - np.tan(decl) * math.cos(lat_r),
+    )
+    return np.degrees(elev), np.mod(np.degrees(az) + 180.0, 360.0)
+
+
+def solar_positions(epochs: Sequence[float], lat_deg: float, lon_deg: float) -> tuple[list[float], list[float]]:
+    """Return (elevation, azimuth) lists in degrees for UTC epoch seconds.
+
+    Evaluated in one vectorized pass when numpy is available.
+    """
+    if not epochs:
+        return [], []
+    if np is None:
+        elevs: list[float] = []
+        azs: list[float] = []
+        for ts in epochs:
+            elev, az = _horizontal(*_equatorial_at_jd(ts / 86400.0 + _UNIX_EPOCH_JD, lon_deg), lat_deg)
+            elevs.append(elev)
+            azs.append(az)
+        return elevs, azs
+    elev, az = _horizontal_np(*_equatorial_np(epochs, lon_deg), lat_deg)
+    return elev.tolist(), az.tolist()
+
+
+def sun_proxy(elev_deg: float) -> float:
+    return max(0.0, math.sin(math.radians(max(elev_deg, 0.0))))
+
+
+class _SolarGrid:
+    """Contiguous run of slots [base, base + len) for one longitude."""
+
+    def __init__(self) -> None:
+        self.base = 0
+        self.decl = array("d")
+        self.ha = array("d")
+
+    def __len__(self) -> int:
+        return len(self.decl)
+
+    def _compute(self, first: int, last: int, lon: float) -> tuple[array, array]:
+        epochs = [float(s * SLOT_SECONDS) for s in range(first, last + 1)]
+        if np is None:
+            decls: list[float] = []
+            has: list[float] = []
+            for ts in epochs:
+                decl, ha = _equatorial_at_jd(ts / 86400.0 + _UNIX_EPOCH_JD, lon)
+                decls.append(decl)
+                has.append(ha)
+            return array("d", decls), array("d", has)
+        decl, ha = _equatorial_np(epochs, lon)
+        return array("d", decl.tolist()), array("d", ha.tolist())
+
+    def ensure(self, first: int, last: int, lon: float) -> int:
+        """Extend the run to cover [first, last]; return the number of slots computed."""
+        if not len(self):
+            self.base = first
+            self.decl, self.ha = self._compute(first, last, lon)
+            return last - first + 1
+        computed = 0
+        if first < self.base:
+            d, h = self._compute(first, self.base - 1, lon)
+            self.decl = d + self.decl
+            self.ha = h + self.ha
+            computed += self.base - first
+            self.base = first
+        end = self.base + len(self) - 1
+        if last > end:
+            d, h = self._compute(end + 1, last, lon)
+            self.decl.extend(d)
+            self.ha.extend(h)
+            computed += last - end
+        return computed
+
+    def evict_before(self, slot: int) -> None:
+        drop = min(len(self), slot - self.base)
+        if drop > 0:
+            del self.decl[:drop]
+            del self.ha[:drop]
+            self.base += drop
+
+
+class SolarTable:
+    """Sun elevation/azimuth/proxy from a fixed slot grid, shared by all entries.
+
+    Slots hold declination and hour angle, computed once per longitude and
+    extended as time moves forward. Arbitrary timestamps interpolate both
+    linearly between the two enclosing slots (both are nearly linear in time)
+    and convert to elevation and azimuth exactly, so the elevation error stays
+    below 1e-5 deg at any latitude, including a sun passing near the zenith.
+    """
+
+    def __init__(self) -> None:
+        self._grids: dict[float, _SolarGrid] = {}
+        self._retain: dict[str, float] = {}
+        # Refreshes compute in the executor, so several entries can hit the grids at once.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def positions(self, epochs: Sequence[float], lat: float, lon: float) -> tuple[list[float], list[float], list[float]]:
+        """Return (elevation, azimuth, sun_proxy) lists for sorted or unsorted epochs."""
+        with self._lock:
+            if not epochs:
+                return [], [], []
+            grid = self._grids.setdefault(round(lon, 4), _SolarGrid())
+            first = math.floor(min(epochs) / SLOT_SECONDS)
+            last = math.floor(max(epochs) / SLOT_SECONDS) + 1
+            computed = grid.ensure(first, last, lon)
+            self.misses += computed
+            self.hits += (last - first + 1) - computed
+
+            if np is not None:
+                pos = np.asarray(epochs, dtype=float) / SLOT_SECONDS
+                lo = np.floor(pos)
+                frac = pos - lo
+                idx = lo.astype(np.int64) - grid.base
+                decl_arr = np.frombuffer(grid.decl, dtype=float)
+                ha_arr = np.frombuffer(grid.ha, dtype=float)
+                d0 = decl_arr[idx]
+                decl = d0 + (decl_arr[idx + 1] - d0) * frac
+                h0 = ha_arr[idx]
+                ha = h0 + (np.mod(ha_arr[idx + 1] - h0 + math.pi, 2 * math.pi) - math.pi) * frac
+                elev, az = _horizontal_np(decl, ha, lat)
+                proxy = np.sin(np.radians(np.maximum(elev, 0.0)))
+                return elev.tolist(), az.tolist(), proxy.tolist()
+
+            elevs: list[float] = []
+            azs: list[float] = []
+            proxies: list[float] = []
+            for ts in epochs:
+                pos = ts / SLOT_SECONDS
+                lo = math.floor(pos)
+                frac = pos - lo
+                i = lo - grid.base
+                d0 = grid.decl[i]
+                h0 = grid.ha[i]
+                d_ha = (grid.ha[i + 1] - h0 + math.pi) % (2 * math.pi) - math.pi
+                elev, az = _horizontal(d0 + (grid.decl[i + 1] - d0) * frac, h0 + d_ha * frac, lat)
+                elevs.append(elev)
+                azs.append(az)
+                proxies.append(sun_proxy(elev))
+            return elevs, azs, proxies
+
+    def retain(self, owner: str, start_epoch: float) -> None:
+        """Record the oldest time `owner` still needs and evict slots nobody needs."""
+        with self._lock:
+            self._retain[owner] = start_epoch
+            self._evict()
+
+    def release(self, owner: str) -> None:
+        with self._lock:
+            self._retain.pop(owner, None)
+            if not self._retain:
+                self._grids.clear()
+                return
+            self._evict()
+
+    def _evict(self) -> None:
+        if not self._retain:
+            return
+        oldest = math.floor(min(self._retain.values()) / SLOT_SECONDS)
+        for grid in self._grids.values():
+            grid.evict_before(oldest)
+
+    def stats(self) -> dict[str, Any]:
+        # Read without the lock (called on the event loop); counters may be one batch apart.
+        hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "slots": sum(len(g) for g in list(self._grids.values())),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import math
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DATA_SNAPSHOT_STORES, DOMAIN, STORAGE_VERSION
+from .intervals import EnergyTotals, IntervalStore
+from .sketch import WeatherSketch
+
+
+class SnapshotStore(Store[dict[str, Any]]):
+    # The snapshot is a cache of data the recorder still has, so older
+    # formats are dropped instead of migrated. Only the energy totals, which
+    # the recorder cannot rebuild, are carried over.
+    async def _async_migrate_func(self, old_major_version: int, old_minor_version: int, old_data: dict[str, Any]) -> dict[str, Any]:
+        return {"energy": old_data.get("energy")} if isinstance(old_data, dict) else {}
+
+
+def snapshot_store(hass: HomeAssistant, entry_id: str) -> SnapshotStore:
+    """The entry's snapshot store; one instance per entry, so removal also cancels its pending delayed save."""
+    stores: dict[str, SnapshotStore] = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_SNAPSHOT_STORES, {})
+    store = stores.get(entry_id)
+    if store is None:
+        store = stores[entry_id] = SnapshotStore(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+    return store
+
+
+async def async_remove_snapshot(hass: HomeAssistant, entry_id: str) -> None:
+    await snapshot_store(hass, entry_id).async_remove()
+    hass.data[DOMAIN][DATA_SNAPSHOT_STORES].pop(entry_id, None)
+
+
+# Interval columns persisted in the snapshot and the decimals they are rounded
+# to (None keeps the sensor value as is). The snapshot only serves the
+# intervals until the first refresh rebuilds them, so derived columns are
+# kept at display precision. Times are stored as millisecond steps, durations
+# in seconds, and dsoc and net_obs are derived again on load.
+_INTERVAL_COLUMNS: dict[str, int | None] = {
+    "soc0": None,
+    "soc1": None,
+    "sun_elev": 4,
+    "sun_az": 4,
+    "sun_proxy": 6,
+    "wf": 4,
+    "voltage": None,
+    "local_hour": None,
+    "weight": 4,
+}
+
+
+def dump_interval_store(store: IntervalStore, start: int, end: int, cap_wh: float) -> dict[str, Any]:
+    """Compact columns of rows `start:end`; conditions are indices into the list of distinct ones."""
+    t_ms = [round(t * 1000.0) for t in store.t[start:end]]
+    conditions = list(dict.fromkeys(store.condition[start:end]))
+    code = {c: i for i, c in enumerate(conditions)}
+    columns: dict[str, list[Any]] = {}
+    for name, decimals in _INTERVAL_COLUMNS.items():
+        values = getattr(store, name)[start:end].tolist()
+        columns[name] = values if decimals is None else [round(v, decimals) for v in values]
+    columns["voltage"] = [None if math.isnan(v) else v for v in columns["voltage"]]
+    return {
+        "cap_wh": cap_wh,
+        "t0_ms": t_ms[0] if t_ms else 0,
+        "t_step_ms": [b - a for a, b in zip(t_ms, t_ms[1:])],
+        "dt_s": [round(dt_h * 3600.0, 3) for dt_h in store.dt_h[start:end]],
+        **columns,
+        "conditions": conditions,
+        "condition": [code[c] for c in store.condition[start:end]],
+    }
+
+
+def load_interval_store(raw: dict[str, Any] | None) -> IntervalStore | None:
+    if not raw:
+        return None
+    store = IntervalStore()
+    try:
+        cap_wh = float(raw["cap_wh"])
+        conditions = raw["conditions"]
+        t_ms = int(raw["t0_ms"])
+        steps = [0, *raw["t_step_ms"]]
+        for step, dt_s, soc0, soc1, elev, az, proxy, wf, volt, hour, weight, cond in zip(
+            steps, raw["dt_s"], *(raw[name] for name in _INTERVAL_COLUMNS), raw["condition"], strict=True
+        ):
+            t_ms += int(step)
+            store.append(
+                t_ms / 1000.0, dt_s / 3600.0, soc0, soc1, elev, az, proxy, wf, conditions[cond], volt, cap_wh, hour, weight
+            )
+    except (KeyError, TypeError, ValueError, IndexError, ZeroDivisionError):
+        return None
+    return store
+
+
+def dump_weather_sketch(sketch: WeatherSketch) -> dict[str, Any]:
+    """Fit, non-zero bin counts and window entries.
+
+    Entry times are microsecond steps, which give back the interval times
+    exactly, so the first refresh can slide the sketch instead of rebuilding it.
+    """
+    t_us = [round(t * 1e6) for t, _, _ in sketch.entries]
+    return {
+        "bins": sketch.BINS,
+        "load_w": sketch.load_w,
+        "solar_peak_w_raw": sketch.solar_peak_w_raw,
+        # One [bin, count] list per hour, then the overall histogram.
+        "counts": [[[b, c] for b, c in enumerate(h.counts) if c] for h in [*sketch.hourly, sketch.overall]],
+        "t0_us": t_us[0] if t_us else 0,
+        "t_step_us": [b - a for a, b in zip(t_us, t_us[1:])],
+        "code": [code for _, code, _ in sketch.entries],
+        # Almost every interval has weight 1; only the others are listed, as [index, weight].
+        "weights": [[i, w] for i, (_, _, w) in enumerate(sketch.entries) if w != 1.0],
+    }
+
+
+def load_weather_sketch(raw: dict[str, Any] | None) -> WeatherSketch | None:
+    if not raw or raw.get("bins") != WeatherSketch.BINS:
+        return None
+    try:
+        sketch = WeatherSketch(float(raw["load_w"]), float(raw["solar_peak_w_raw"]))
+        histograms = [*sketch.hourly, sketch.overall]
+        for hist, counts in zip(histograms, raw["counts"], strict=True):
+            for b, c in counts:
+                hist.counts[int(b)] = float(c)
+            hist.total = sum(hist.counts)
+        # Counts are restored as saved rather than summed again from the
+        # entries, so later removals leave the same float residue.
+        codes = raw["code"]
+        weights = [1.0] * len(codes)
+        for i, w in raw["weights"]:
+            weights[int(i)] = float(w)
+        t_us = int(raw["t0_us"])
+        for step, code, w in zip([0, *raw["t_step_us"]], codes, weights, strict=True):
+            t_us += int(step)
+            code = int(code)
+            if code >= 0:
+                hour, _ = divmod(code, WeatherSketch.BINS)
+                histograms[hour].n += 1
+                sketch.overall.n += 1
+            sketch.entries.append((t_us / 1e6, code, w))
+    except (KeyError, TypeError, ValueError, IndexError):
+        return None
+    return sketch
+
+
+def dump_energy_totals(totals: EnergyTotals) -> dict[str, Any]:
+    return {"charged_wh": totals.charged_wh, "discharged_wh": totals.discharged_wh, "last_t": totals.last_t}
+
+
+def load_energy_totals(raw: dict[str, Any] | None) -> EnergyTotals | None:
+    if not raw:
+        return None
+    try:
+        last_t = raw.get("last_t")
+        return EnergyTotals(
+            float(raw["charged_wh"]), float(raw["discharged_wh"]), float(last_t) if last_t is not None else None
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
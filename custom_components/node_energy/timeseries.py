@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Literal
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with Home Assistant core
+    np = None
+
+from .intervals import iso_utc
+
+AlignMode = Literal["nearest", "previous", "linear"]
+
+
+def align_asof(
+    targets: Sequence[float],
+    sample_ts: Sequence[float],
+    sample_values: Sequence[float],
+    mode: AlignMode = "nearest",
+    max_gap_s: float | None = None,
+) -> list[float | None]:
+    """Align a sample stream onto target timestamps in one merge pass.
+
+    Both `targets` and `sample_ts` must be sorted ascending (epoch seconds).
+    `nearest` prefers the earlier sample on ties, `previous` is a classic
+    as-of join and `linear` interpolates between the enclosing samples
+    (None outside the sampled range). With `max_gap_s`, a sample farther
+    than that from the target is treated as missing.
+    """
+    out: list[float | None] = []
+    n = len(sample_ts)
+    if not n:
+        return [None] * len(targets)
+
+    j = 0  # first sample strictly after the current target
+    for t in targets:
+        while j < n and sample_ts[j] <= t:
+            j += 1
+        prev_ok = j > 0 and (max_gap_s is None or t - sample_ts[j - 1] <= max_gap_s)
+        next_ok = j < n and (max_gap_s is None or sample_ts[j] - t <= max_gap_s)
+
+        if mode == "previous":
+            out.append(sample_values[j - 1] if prev_ok else None)
+        elif mode == "linear":
+            if prev_ok and sample_ts[j - 1] == t:
+                out.append(sample_values[j - 1])
+            elif prev_ok and next_ok:
+                t0 = sample_ts[j - 1]
+                k = (t - t0) / (sample_ts[j] - t0)
+                v0 = sample_values[j - 1]
+                out.append(v0 + (sample_values[j] - v0) * k)
+            else:
+                out.append(None)
+        elif prev_ok and next_ok:
+            before = t - sample_ts[j - 1]
+            after = sample_ts[j] - t
+            out.append(sample_values[j - 1] if before <= after else sample_values[j])
+        elif prev_ok:
+            out.append(sample_values[j - 1])
+        elif next_ok:
+            out.append(sample_values[j])
+        else:
+            out.append(None)
+    return out
+
+
+def lttb_indices(xs: Sequence[float], columns: Sequence[Sequence[float]], threshold: int) -> list[int]:
+    """Largest-Triangle-Three-Buckets downsampling of one or more series on a shared x axis.
+
+    Returns the indices of at most `threshold` points that keep the visual
+    shape of the series; the first and last point are always kept. With
+    several columns each bucket keeps the point whose triangle is largest
+    in any column, areas being scaled by the column's value range. A
+    threshold below 3 or at least `len(xs)` keeps every point.
+    """
+    n = len(xs)
+    if threshold < 3 or n <= threshold or not columns:
+        return list(range(n))
+
+    scales = []
+    for col in columns:
+        span = max(col) - min(col)
+        scales.append(1.0 / span if span > 0 else 1.0)
+
+    every = (n - 2) / (threshold - 2)
+    out = [0]
+    a = 0
+    if np is not None:
+        x_arr = np.asarray(xs, dtype=float)
+        y_arrs = [np.asarray(col, dtype=float) for col in columns]
+    for b in range(threshold - 2):
+        start = int(b * every) + 1
+        end = int((b + 1) * every) + 1
+        nxt_end = min(int((b + 2) * every) + 1, n)
+        ax = xs[a]
+        if np is not None:
+            avg_x = float(x_arr[end:nxt_end].mean())
+            dx = ax - x_arr[start:end]
+            best = None
+            for y_arr, scale in zip(y_arrs, scales, strict=True):
+                ay = y_arr[a]
+                avg_y = float(y_arr[end:nxt_end].mean())
+                areas = np.abs((ax - avg_x) * (y_arr[start:end] - ay) - dx * (avg_y - ay)) * scale
+                best = areas if best is None else np.maximum(best, areas)
+            a = start + int(best.argmax())
+        else:
+            span = nxt_end - end
+            avg_x = sum(xs[end:nxt_end]) / span
+            best_area = -1.0
+            best_i = start
+            for ys, scale in zip(columns, scales, strict=True):
+                ay = ys[a]
+                avg_y = sum(ys[end:nxt_end]) / span
+                for j in range(start, end):
+                    area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay)) * scale
+                    if area > best_area:
+                        best_area = area
+                        best_i = j
+            a = best_i
+        out.append(a)
+    out.append(n - 1)
+    return out
+
+
+@dataclass
+class ChartGroup:
+    """Chart series sharing one ascending time axis (epoch seconds)."""
+
+    xs: Sequence[float]
+    columns: dict[str, Sequence[float]]
+
+    def select(self, budget: int, t_min: float | None = None, t_max: float | None = None) -> list[int]:
+        """Indices inside [t_min, t_max], downsampled to `budget` (0 keeps all)."""
+        lo = bisect_left(self.xs, t_min) if t_min is not None else 0
+        hi = bisect_right(self.xs, t_max) if t_max is not None else len(self.xs)
+        cols = [col[lo:hi] for col in self.columns.values()]
+        return [lo + i for i in lttb_indices(self.xs[lo:hi], cols, budget)]
+
+    def compact(self, idx: Sequence[int], precision: int) -> dict[str, Any]:
+        """`{"t": [epoch ms], "series": {name: [values]}}` for the selected indices."""
+        return {
+            "t": [round(self.xs[i] * 1000) for i in idx],
+            "series": {name: [round(col[i], precision) for i in idx] for name, col in self.columns.items()},
+        }
+
+    def points(self, idx: Sequence[int]) -> dict[str, list[dict[str, Any]]]:
+        """Legacy `{"x": iso, "y": value}` points per series for the selected indices."""
+        labels = [iso_utc(self.xs[i]) for i in idx]
+        return {name: [{"x": label, "y": col[i]} for label, i in zip(labels, idx, strict=True)] for name, col in self.columns.items()}
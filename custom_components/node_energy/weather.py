@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from datetime import datetime
+import time
+from typing import Any, TypeVar
+
+from .history import HistoryBuffer, point_ts, point_with_ts
+
+T = TypeVar("T")
+
+
+def condition_weight(condition: str) -> float:
+    c = (condition or "").lower()
+    table = {
+        "sunny": 1.00,
+        "clear-night": 0.95,
+        "partlycloudy": 0.82,
+        "cloudy": 0.62,
+        "fog": 0.58,
+        "rainy": 0.50,
+        "pouring": 0.42,
+        "snowy": 0.48,
+        "snowy-rainy": 0.44,
+        "hail": 0.35,
+        "lightning": 0.32,
+        "lightning-rainy": 0.28,
+        "windy": 0.78,
+        "windy-variant": 0.72,
+    }
+    return table.get(c, 0.70)
+
+
+def weather_factor(condition: str, cloud_coverage: float | None, precip_probability: float | None) -> float:
+    if cloud_coverage is None:
+        cloud_factor = condition_weight(condition)
+    else:
+        cloud_frac = max(0.0, min(1.0, cloud_coverage / 100.0))
+        cloud_factor = 1.0 - 0.75 * cloud_frac
+    if precip_probability is None:
+        precip_factor = 1.0
+    else:
+        precip_factor = 1.0 - 0.25 * max(0.0, min(100.0, precip_probability)) / 100.0
+    return max(0.05, min(1.0, cloud_factor * condition_weight(condition) * precip_factor))
+
+
+class WeatherTimeline:
+    """Sorted weather factor points indexed for bisect lookups.
+
+    Built once per refresh from the parsed points. Outside the covered range
+    `factors_at` falls back to the mean factor of the same UTC hour, which is
+    precomputed here instead of per lookup.
+    """
+
+    def __init__(self, points: list[dict[str, Any]]) -> None:
+        self.ts = [p["ts"].timestamp() for p in points]
+        self.factor = [float(p["factor"]) for p in points]
+        self.condition = [p.get("condition", "") for p in points]
+
+        sums = [0.0] * 24
+        counts = [0] * 24
+        last_cond: list[str | None] = [None] * 24
+        for t, f, cond in zip(self.ts, self.factor, self.condition, strict=True):
+            h = int(t // 3600) % 24
+            sums[h] += f
+            counts[h] += 1
+            last_cond[h] = cond
+        overall = sum(self.factor) / len(self.factor) if self.factor else 1.0
+        overall_cond = self.condition[-1] if self.condition else ""
+        self._hour_fallback = [
+            (sums[h] / counts[h], last_cond[h] or "") if counts[h] else (overall, overall_cond)
+            for h in range(24)
+        ]
+
+    def __bool__(self) -> bool:
+        return bool(self.ts)
+
+    def _segment(self, t: float, lo: int) -> int:
+        # First index i >= 1 with ts[i - 1] <= t <= ts[i]; t must be inside the range.
+        return bisect_left(self.ts, t, max(1, lo))
+
+    def factors_at(self, epochs: Sequence[float]) -> tuple[list[float], list[str]]:
+        """Factor and condition per epoch; `epochs` must be sorted ascending."""
+        if not self.ts:
+            return [1.0] * len(epochs), [""] * len(epochs)
+        first = self.ts[0]
+        last = self.ts[-1]
+        factors: list[float] = []
+        conditions: list[str] = []
+        lo = 1
+        for t in epochs:
+            if t <= first or t >= last:
+                f, cond = self._hour_fallback[int(t // 3600) % 24]
+                factors.append(f)
+                conditions.append(cond)
+                continue
+            i = lo = self._segment(t, lo)
+            ta = self.ts[i - 1]
+            span = self.ts[i] - ta
+            if span <= 0:
+                factors.append(self.factor[i - 1])
+                conditions.append(self.condition[i - 1])
+                continue
+            k = (t - ta) / span
+            fa = self.factor[i - 1]
+            factors.append(fa + (self.factor[i] - fa) * k)
+            conditions.append(self.condition[i - 1] if k < 0.5 else self.condition[i])
+        return factors, conditions
+
+    def interpolated(self, epochs: Sequence[float]) -> list[float | None]:
+        """Linearly interpolated factor per epoch, None outside the covered range.
+
+        `epochs` must be sorted ascending.
+        """
+        if not self.ts:
+            return [None] * len(epochs)
+        first = self.ts[0]
+        last = self.ts[-1]
+        out: list[float | None] = []
+        lo = 1
+        for t in epochs:
+            if t < first or t > last:
+                out.append(None)
+            elif t == first:
+                out.append(self.factor[0])
+            elif t == last:
+                out.append(self.factor[-1])
+            else:
+                i = lo = self._segment(t, lo)
+                ta = self.ts[i - 1]
+                span = self.ts[i] - ta
+                if span <= 0:
+                    out.append(self.factor[i - 1])
+                    continue
+                fa = self.factor[i - 1]
+                out.append(fa + (self.factor[i] - fa) * ((t - ta) / span))
+        return out
+
+
+class WeatherCache:
+    """Weather data shared by all entries, kept in hass.data[DOMAIN].
+
+    `async_get` returns a value fetched less than `ttl` seconds ago or runs
+    `fetch`; concurrent callers for the same key await one in-flight fetch.
+    Empty results are not cached; `stale` keeps serving the last value when
+    a refetch fails. Cached values (parsed factor points) are shared between
+    coordinators and must be treated as read-only.
+
+    Weather history lives in one HistoryBuffer per weather entity, trimmed
+    to the oldest start any entry still retains.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[Hashable, tuple[float, Any]] = {}
+        self._inflight: dict[Hashable, asyncio.Future[Any]] = {}
+        self._history: dict[str, HistoryBuffer[dict[str, Any]]] = {}
+        self._retain: dict[str, tuple[str, datetime]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    async def async_get(self, key: Hashable, ttl: float, fetch: Callable[[], Awaitable[T]]) -> T:
+        cached = self._values.get(key)
+        if cached is not None and time.monotonic() - cached[0] < ttl:
+            self.hits += 1
+            return cached[1]
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._inflight[key] = asyncio.ensure_future(self._async_fetch(key, fetch))
+        else:
+            self.hits += 1
+        # A caller timing out must not cancel the fetch other entries wait for.
+        return await asyncio.shield(task)
+
+    async def _async_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await fetch()
+            if value:
+                self._values[key] = (time.monotonic(), value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def stale(self, key: Hashable) -> Any | None:
+        """Last value fetched for `key` regardless of its age, None if there is none."""
+        cached = self._values.get(key)
+        return cached[1] if cached is not None else None
+
+    def invalidate(self, key: Hashable) -> None:
+        self._values.pop(key, None)
+
+    def history_buffer(self, entity_id: str) -> HistoryBuffer[dict[str, Any]]:
+        buffer = self._history.get(entity_id)
+        if buffer is None:
+            buffer = self._history[entity_id] = HistoryBuffer(point_ts, point_with_ts)
+        return buffer
+
+    def retain(self, owner: str, entity_id: str, start_utc: datetime) -> datetime:
+        """Record the window start `owner` needs; return the oldest start kept for the entity."""
+        self._retain[owner] = (entity_id, start_utc)
+        return min(start for ent, start in self._retain.values() if ent == entity_id)
+
+    def release(self, owner: str) -> None:
+        self._retain.pop(owner, None)
+        in_use = {ent for ent, _ in self._retain.values()}
+        for entity_id in [e for e in self._history if e not in in_use]:
+            del self._history[entity_id]
+        for key in [k for k in self._values if isinstance(k, tuple) and k[-1] not in in_use]:
+            del self._values[key]
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+
+from .const import DOMAIN, MAX_CELLS, SERIES_KEYS
+from .scenarios import SCENARIO_VARIANTS
+
+if TYPE_CHECKING:
+    from .coordinator import NodeEnergyCoordinator
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, ws_get_series)
+    websocket_api.async_register_command(hass, ws_get_scenarios)
+
+
+def _coordinator(hass: HomeAssistant, msg: dict[str, Any]) -> NodeEnergyCoordinator | None:
+    """Coordinator addressed by `entry_id`, or by one of the entry's entities."""
+    from .coordinator import NodeEnergyCoordinator
+
+    entry_id = msg.get("entry_id")
+    if entry_id is None and "entity_id" in msg:
+        entity = er.async_get(hass).async_get(msg["entity_id"])
+        entry_id = entity.config_entry_id if entity is not None else None
+    coordinator = hass.data.get(DOMAIN, {}).get(entry_id)
+    return coordinator if isinstance(coordinator, NodeEnergyCoordinator) else None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/series",
+        vol.Exclusive("entry_id", "target"): str,
+        vol.Exclusive("entity_id", "target"): str,
+        vol.Optional("series"): [str],
+    }
+)
+@websocket_api.async_response
+async def ws_get_series(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Return heavy chart/forecast series of one entry.
+
+    The entry is given as `entry_id` or as `entity_id` of one of its
+    entities, so dashboards can address it by their sensor. `series`
+    selects top-level keys (e.g. `forecast`) or single chart series as
+    `apex_series.<name>`; without it every heavy series is returned.
+    Series not built since the last refresh are built in the executor.
+    """
+    coordinator = _coordinator(hass, msg)
+    if coordinator is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Unknown entry_id or entity_id")
+        return
+
+    selectors = msg.get("series") or list(SERIES_KEYS)
+    unknown = [selector for selector in selectors if selector.partition(".")[0] not in SERIES_KEYS]
+    if unknown:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, f"Unknown series: {unknown[0]}")
+        return
+    result: dict[str, Any] = {}
+    for selector in selectors:
+        found, value = await coordinator.async_get_series(selector)
+        if not found:
+            connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, f"Unknown series: {selector}")
+            return
+        result[selector] = value
+    connection.send_result(msg["id"], {"entry_id": coordinator.entry.entry_id, "series": result})
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/scenarios",
+        vol.Required("entry_id"): str,
+        vol.Required("cells"): vol.All([vol.All(int, vol.Range(min=1, max=MAX_CELLS))], vol.Length(min=1, max=MAX_CELLS)),
+        vol.Optional("variants", default=list(SCENARIO_VARIANTS)): [vol.In(SCENARIO_VARIANTS)],
+    }
+)
+@callback
+def ws_get_scenarios(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]) -> None:
+    """Return SoC scenario curves of one entry, simulated on demand."""
+    from .coordinator import NodeEnergyCoordinator
+
+    coordinator = hass.data.get(DOMAIN, {}).get(msg["entry_id"])
+    if not isinstance(coordinator, NodeEnergyCoordinator):
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Unknown entry_id")
+        return
+
+    result = coordinator.get_scenarios(msg["cells"], msg["variants"])
+    if result is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "No forecast computed yet")
+        return
+    connection.send_result(msg["id"], {"entry_id": msg["entry_id"], **result})
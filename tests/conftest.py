@@ -0,0 +1,17 @@
+"""Run the integration's modules against the benchmark's Home Assistant stand-ins."""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import hass_stub  # noqa: E402
+
+clock = hass_stub.Clock(datetime(2026, 6, 20, 12, 7, 13, tzinfo=UTC))
+recorder = hass_stub.Recorder(clock)
+hass_stub.install(clock, recorder)
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import math
+import random
+
+from custom_components.node_energy.backtest import RollingBacktest, run_fold
+from custom_components.node_energy.estimator import LoadSolarEstimator
+from custom_components.node_energy.intervals import IntervalStore
+
+STEP_S = 600.0
+CAP_WH = 25.9
+HORIZONS_H = (6, 24)
+
+
+def _store(first: int, last: int, skip: frozenset[int] = frozenset()) -> IntervalStore:
+    """Intervals `first..last` of a synthetic node; interval k is the same in every store."""
+    store = IntervalStore()
+    for k in range(first, last):
+        if k in skip:
+            continue
+        rnd = random.Random(k)
+        t = k * STEP_S
+        proxy = max(0.0, math.sin((t % 86400.0) / 86400.0 * 2 * math.pi - math.pi / 2))
+        wf = rnd.uniform(0.2, 1.0)
+        dsoc = (-0.45 + 1.6 * proxy * wf) * (STEP_S / 3600.0) / CAP_WH * 100.0 + rnd.gauss(0.0, 0.02)
+        store.append(t, STEP_S / 3600.0, 50.0, 50.0 + dsoc, 0.0, 0.0, proxy, wf, "", None, CAP_WH, 0)
+    return store
+
+
+def _estimator(store: IntervalStore) -> LoadSolarEstimator:
+    estimator = LoadSolarEstimator()
+    estimator.update(store)
+    return estimator
+
+
+def _run(backtest: RollingBacktest, store: IntervalStore) -> dict:
+    return backtest.update(store, _estimator(store), CAP_WH)
+
+
+def test_folds_match_direct_holdouts() -> None:
+    store = _store(0, 4 * 144)
+    backtest = RollingBacktest(6, 3, HORIZONS_H)
+    out = _run(backtest, store)
+    assert backtest.computed == len(backtest) > 0
+    estimator = _estimator(store)
+    for (anchor, h), fold in backtest._folds.items():
+        assert fold == run_fold(store, estimator, CAP_WH, anchor, anchor + h * 3600.0)
+    assert {h for h in out} == set(HORIZONS_H)
+    assert all(agg["folds"] > 0 for agg in out.values())
+
+
+def test_only_new_anchors_are_computed_as_time_moves_on() -> None:
+    backtest = RollingBacktest(6, 3, HORIZONS_H)
+    last = 4 * 144
+    _run(backtest, _store(0, last))
+    for _ in range(6):
+        before = dict(backtest._folds)
+        last += 36  # six hours later
+        store = _store(0, last)
+        out = _run(backtest, store)
+        new_keys = [key for key in backtest._folds if key not in before]
+        retried = [key for key, fold in before.items() if fold is None and key in backtest._folds]
+        assert len(new_keys) == len(HORIZONS_H)
+        assert backtest.computed == len(new_keys) + len(retried)
+        assert all(backtest._folds[key] is fold for key, fold in before.items() if fold is not None and key in backtest._folds)
+        # Anchors that slid out of the window are dropped.
+        assert min(anchor for anchor, _ in backtest._folds) >= store.t[-1] - 3 * 86400.0
+        assert out == _run(RollingBacktest(6, 3, HORIZONS_H), store)
+
+
+def test_changed_test_intervals_invalidate_their_folds() -> None:
+    backtest = RollingBacktest(6, 3, HORIZONS_H)
+    _run(backtest, _store(0, 4 * 144))
+    before = backtest.copy()
+    snapshot = dict(backtest._folds)
+
+    # Interval 450 drops out (a sample was removed), which shifts later test windows.
+    gone = 450
+    store = _store(0, 4 * 144, skip=frozenset({gone}))
+    _run(backtest, store)
+    t_gone = gone * STEP_S
+    for key, fold in before._folds.items():
+        anchor, h = key
+        if fold is None:
+            continue
+        reused = backtest._folds[key] is fold
+        assert reused == (not (anchor < t_gone <= anchor + h * 3600.0)), key
+    assert backtest.computed == sum(
+        1 for (anchor, h), fold in before._folds.items() if fold is None or anchor < t_gone <= anchor + h * 3600.0
+    )
+    # The copy taken before the update kept its own folds.
+    assert before._folds.keys() == snapshot.keys()
+    assert all(before._folds[key] is fold for key, fold in snapshot.items())
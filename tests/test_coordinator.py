@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from conftest import clock, recorder
+import hass_stub
+import synthetic
+
+from custom_components.node_energy.const import (
+    ATTR_CHART,
+    ATTR_ENERGY_CHARGED_KWH_TOTAL,
+    ATTR_ENERGY_DISCHARGED_KWH_TOTAL,
+    ATTR_FORECAST,
+    ATTR_META,
+    SERIES_KEYS,
+)
+from custom_components.node_energy import coordinator as coordinator_module
+from custom_components.node_energy.coordinator import NodeEnergyCoordinator, _input_fingerprint
+from custom_components.node_energy.history import Sample
+
+WEATHER_ENTITY = "weather.test"
+NODE = synthetic.Node("sensor.test_battery", "sensor.test_voltage")
+
+
+@pytest.fixture(autouse=True)
+def _restore_clock(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Tests move the shared stub clock on; monkeypatch puts it back afterwards.
+    monkeypatch.setattr(clock, "now", clock.now)
+
+
+def _coordinator(days: int = 4, **options) -> tuple[hass_stub.HomeAssistant, NodeEnergyCoordinator]:
+    start = clock.now - timedelta(days=days)
+    end = clock.now + timedelta(hours=2)
+    weather = synthetic.weather_states(WEATHER_ENTITY, start, end, 1)
+    battery, voltage = synthetic.node_states(NODE, weather, start, end, 300.0, 1)
+    recorder.states.clear()
+    recorder.add(WEATHER_ENTITY, weather)
+    recorder.add(NODE.battery_entity, battery)
+    recorder.add(NODE.voltage_entity, voltage)
+    hass = hass_stub.HomeAssistant()
+    hass.services.forecasts[WEATHER_ENTITY] = synthetic.hourly_forecast(clock.now, 1)
+    data = {
+        "name": "Test",
+        "battery_entity": NODE.battery_entity,
+        "voltage_entity": NODE.voltage_entity,
+        "weather_entity": WEATHER_ENTITY,
+        "cells_current": 2,
+        "cell_mah": 3500,
+        "cell_v": 3.7,
+    }
+    return hass, NodeEnergyCoordinator(hass, hass_stub.ConfigEntry("entry_test", data, options))
+
+
+def _feed(coordinator: NodeEnergyCoordinator, since: datetime, until: datetime) -> int:
+    """Send the recorded battery states in (since, until] as state-change events."""
+    rows = [s for s in recorder.states[NODE.battery_entity] if since < s.last_updated <= until]
+    for state in rows:
+        coordinator._async_on_state_change(types.SimpleNamespace(data={"entity_id": NODE.battery_entity, "new_state": state}))
+    return len(rows)
+
+
+def test_failed_forecast_falls_back_to_stale_forecast() -> None:
+    async def run() -> None:
+        hass, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        fresh = coordinator.refresh_stats[-1]["rows"]["weather_forecast_points"]
+        assert fresh > 0
+
+        async def unavailable(*args, **kwargs):
+            raise hass_stub.HomeAssistantError("weather integration unavailable")
+
+        hass.services.async_call = unavailable
+        coordinator._weather_cache_ttl = lambda: 0.0  # the cached forecast is stale now
+        clock.now += timedelta(minutes=30)
+        await coordinator.async_refresh()
+        assert coordinator.data[ATTR_META]["fetch"]["weather_forecast"] == "error"
+        assert coordinator.refresh_stats[-1]["rows"]["weather_forecast_points"] == fresh
+
+    asyncio.run(run())
+
+
+def test_missing_statistics_are_asked_again(monkeypatch: pytest.MonkeyPatch) -> None:
+    stats_module = sys.modules["homeassistant.components.recorder.statistics"]
+    answer = {"mode": "error"}
+    calls = []
+
+    def statistics_during_period(hass, start, end, ids, *args):
+        calls.append(start)
+        if answer["mode"] == "error":
+            raise hass_stub.HomeAssistantError("database busy")
+        if answer["mode"] == "empty":
+            return {}
+        return recorder.statistics_during_period(hass, start, end, ids, *args)
+
+    monkeypatch.setattr(stats_module, "statistics_during_period", statistics_during_period)
+
+    async def run() -> None:
+        _, coordinator = _coordinator(raw_history_days=1)
+        battery = NODE.battery_entity
+        # A failed query is no evidence of missing statistics.
+        with pytest.raises(hass_stub.UpdateFailed):
+            await coordinator.async_refresh()
+        assert battery not in coordinator._no_statistics
+
+        answer["mode"] = "empty"
+        await coordinator.async_refresh()
+        assert battery in coordinator._no_statistics
+        raw_rows = coordinator.refresh_stats[-1]["rows"]["battery_states"]
+
+        answer["mode"] = "ok"
+        asked = len(calls)
+        clock.now += timedelta(minutes=30)
+        await coordinator.async_refresh()
+        assert len(calls) == asked
+        assert battery in coordinator._no_statistics
+
+        clock.now += timedelta(minutes=31)
+        await coordinator.async_refresh()
+        assert len(calls) > asked
+        assert battery not in coordinator._no_statistics
+        assert coordinator.refresh_stats[-1]["rows"]["battery_states"] < raw_rows / 2
+
+    asyncio.run(run())
+
+
+def test_live_update_does_not_wait_for_the_solar_table() -> None:
+    async def run() -> None:
+        _, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        refreshed_at = clock.now
+        clock.now += timedelta(minutes=20)
+        assert _feed(coordinator, refreshed_at, clock.now)
+
+        # Another entry's executor refresh holding the table for a long batch.
+        held, done = threading.Event(), threading.Event()
+
+        def hold() -> None:
+            with coordinator._solar_table._lock:
+                held.set()
+                done.wait(2.0)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        held.wait()
+        t0 = time.perf_counter()
+        try:
+            await coordinator._async_live_update()
+        finally:
+            done.set()
+            holder.join()
+        assert time.perf_counter() - t0 < 1.0
+        assert coordinator.refresh_stats[-1]["kind"] == "live"
+        assert coordinator.refresh_stats[-1]["rows"]["new_intervals"] > 0
+
+    asyncio.run(run())
+
+
+def test_live_update_during_compute_keeps_energy_totals() -> None:
+    async def run() -> None:
+        hass, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        published = []
+
+        def publish() -> None:
+            data = coordinator.data
+            published.append((data[ATTR_ENERGY_CHARGED_KWH_TOTAL], data[ATTR_ENERGY_DISCHARGED_KWH_TOTAL]))
+
+        publish()
+        fetched_at = clock.now = clock.now + timedelta(minutes=30)
+        executor_job = hass.async_add_executor_job
+
+        async def job_with_live_update(func, *args):
+            if func == coordinator._compute_job:
+                # Samples arrive and are folded in while the model computes.
+                clock.now = fetched_at + timedelta(minutes=40)
+                assert _feed(coordinator, fetched_at, clock.now)
+                await coordinator._async_live_update()
+                publish()
+            return await executor_job(func, *args)
+
+        hass.async_add_executor_job = job_with_live_update
+        await coordinator.async_refresh()
+        publish()
+        assert coordinator.refresh_stats[-1]["kind"] == "full"
+        await coordinator._async_live_update()
+        publish()
+
+        for before, after in zip(published, published[1:]):
+            assert after[0] >= before[0] and after[1] >= before[1]
+        assert published[1] != published[0]
+        assert published[-1] == published[1]  # nothing counted twice or lost
+
+    asyncio.run(run())
+
+
+def test_series_are_built_in_the_executor() -> None:
+    async def run() -> None:
+        _, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        series = coordinator._series
+        build, built_in = series._build, []
+
+        def recorded_build(key):
+            built_in.append(threading.current_thread())
+            return build(key)
+
+        series._build = recorded_build
+        assert coordinator.get_series(ATTR_CHART, build=False) == (True, None)
+
+        # Concurrent requests share one build, which runs off the event loop.
+        answers = await asyncio.gather(*(coordinator.async_get_series(ATTR_CHART) for _ in range(3)))
+        assert len(built_in) == 1 and built_in[0] is not threading.current_thread()
+        assert answers[0][1] is not None and all(answer == answers[0] for answer in answers)
+        assert await coordinator.async_get_series(f"{ATTR_CHART}.views") == (True, answers[0][1]["views"])
+        assert coordinator.get_series(ATTR_CHART, build=False) == answers[0]
+        assert len(built_in) == 1
+
+    asyncio.run(run())
+
+
+def test_series_attributes_are_built_with_the_refresh() -> None:
+    async def run() -> None:
+        _, coordinator = _coordinator(series_attributes=True)
+        await coordinator.async_refresh()
+        assert all(coordinator._series.built(key) for key in SERIES_KEYS if key != ATTR_FORECAST)
+
+    asyncio.run(run())
+
+
+def test_snapshot_restores_the_weather_sketch(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def run() -> None:
+        hass, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        raw = json.loads(json.dumps(coordinator._snapshot_data()))
+
+        async def load():
+            return raw
+
+        restored = NodeEnergyCoordinator(hass, coordinator.entry)
+        monkeypatch.setattr(restored._store, "async_load", load)
+        assert await restored.async_restore_snapshot()
+        sketch = restored._weather_sketch
+        assert sketch is not None and list(sketch.entries) == list(coordinator._weather_sketch.entries)
+        assert sketch.quantile(0.5) == coordinator._weather_sketch.quantile(0.5)
+
+        # The first refresh slides the restored sketch instead of building a new one.
+        rebuilt = []
+
+        class RecordedSketch(coordinator_module.WeatherSketch):
+            def __init__(self, *args) -> None:
+                rebuilt.append(args)
+                super().__init__(*args)
+
+        monkeypatch.setattr(coordinator_module, "WeatherSketch", RecordedSketch)
+        clock.now += timedelta(minutes=10)
+        await restored.async_refresh()
+        assert rebuilt == []
+        assert restored._weather_sketch.entries[-1][0] >= sketch.entries[-1][0]
+
+    asyncio.run(run())
+
+
+def test_live_update_reuses_the_weather_timeline(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def run() -> None:
+        _, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        refreshed_at = clock.now
+        clock.now += timedelta(minutes=20)
+        assert _feed(coordinator, refreshed_at, clock.now)
+        built = []
+
+        class RecordedTimeline(coordinator_module.WeatherTimeline):
+            def __init__(self, points) -> None:
+                built.append(len(points))
+                super().__init__(points)
+
+        monkeypatch.setattr(coordinator_module, "WeatherTimeline", RecordedTimeline)
+        store = coordinator._live[1].store
+        first_new = len(store)
+        await coordinator._async_live_update()
+        assert built == [] and len(store) > first_new
+        expected = coordinator._live[1].weather_timeline.factors_at(store.t[first_new:].tolist())
+        assert (store.wf[first_new:].tolist(), store.condition[first_new:]) == expected
+
+    asyncio.run(run())
+
+
+def test_unchanged_inputs_skip_the_recompute(monkeypatch: pytest.MonkeyPatch) -> None:
+    computed = []
+    compute_model = coordinator_module._compute_model
+
+    def recorded_compute(inputs, solar_table):
+        computed.append(inputs.now_utc)
+        return compute_model(inputs, solar_table)
+
+    monkeypatch.setattr(coordinator_module, "_compute_model", recorded_compute)
+
+    async def run() -> None:
+        _, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        assert len(computed) == 1
+        data = coordinator.data
+
+        # Same inputs at the same time: nothing to recompute and nothing for the entities to write.
+        await coordinator.async_refresh()
+        assert len(computed) == 1
+        assert coordinator.refresh_stats[-1]["kind"] == "unchanged"
+        assert coordinator.data == data
+
+        # A new battery sample changes the inputs.
+        clock.now += timedelta(minutes=10)
+        await coordinator.async_refresh()
+        assert len(computed) == 2 and coordinator.refresh_stats[-1]["kind"] == "full"
+
+        # So does a config change, without any new sample.
+        await coordinator.async_refresh()
+        assert len(computed) == 2
+        coordinator.entry.options = {**coordinator.entry.options, "model_half_life_days": 3}
+        await coordinator.async_refresh()
+        assert len(computed) == 3 and coordinator.refresh_stats[-1]["kind"] == "full"
+
+    asyncio.run(run())
+
+
+def test_input_fingerprint() -> None:
+    t0 = clock.now
+    batt = [Sample(t0 + timedelta(minutes=5 * k), 50.0 + k) for k in range(10)]
+    volt = [Sample(t0 + timedelta(minutes=5 * k), 3.9) for k in range(10)]
+    hist = [{"ts": t0 + timedelta(hours=k), "condition": "sunny", "factor": 1.0} for k in range(3)]
+    forecast = [{"ts": t0 + timedelta(hours=k), "condition": "cloudy", "cloud_coverage": 80.0} for k in range(1, 4)]
+    cfg = {"battery_entity": NODE.battery_entity, "cells_current": 2}
+    base = _input_fingerprint(cfg, batt, volt, hist, forecast)
+
+    # Equal inputs built anew, in another key order, give the same fingerprint.
+    assert _input_fingerprint(dict(reversed(cfg.items())), list(batt), list(volt), list(hist), [dict(p) for p in forecast]) == base
+    changed = [
+        ({**cfg, "cells_current": 3}, batt, volt, hist, forecast),
+        (cfg, [*batt, Sample(t0 + timedelta(hours=1), 60.0)], volt, hist, forecast),
+        (cfg, batt, volt[:-1], hist, forecast),
+        (cfg, batt, volt, hist[:-1], forecast),
+        (cfg, batt, volt, hist, [*forecast[:-1], {**forecast[-1], "cloud_coverage": 10.0}]),
+        (cfg, batt, volt, hist, []),
+    ]
+    for args in changed:
+        assert _input_fingerprint(*args) != base
+
+
+def test_weather_history_points_are_shared_with_the_cache() -> None:
+    async def run() -> None:
+        _, coordinator = _coordinator()
+        await coordinator.async_refresh()
+        points = coordinator._weather_cache.stale(("history", WEATHER_ENTITY))
+        assert isinstance(points, tuple) and points
+        assert coordinator._live[0].weather_hist_points is points
+
+    asyncio.run(run())
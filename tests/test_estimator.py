@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from custom_components.node_energy.estimator import NIGHT_SUN_PROXY, LoadSolarEstimator
+from custom_components.node_energy.intervals import IntervalStore
+
+STEP_S = 600.0
+CAP_WH = 25.9
+
+
+def _store(first: int, last: int, seed: int = 1, wf_tail: float | None = None, head_s: float = 0.0) -> IntervalStore:
+    """Intervals `first..last` of a synthetic node; interval k is the same in every store.
+
+    `head_s` moves the first interval's midpoint like a retimed start-time sample does.
+    """
+    store = IntervalStore()
+    for k in range(first, last):
+        rnd = random.Random(f"{seed}:{k}")
+        t = k * STEP_S + (head_s if k == first else 0.0)
+        proxy = max(0.0, math.sin((t % 86400.0) / 86400.0 * 2 * math.pi - math.pi / 2))
+        wf = rnd.uniform(0.2, 1.0) if wf_tail is None or k < last - 3 else wf_tail
+        dsoc = (-0.45 + 1.6 * proxy * wf) * (STEP_S / 3600.0) / CAP_WH * 100.0 + rnd.gauss(0.0, 0.02)
+        store.append(t, STEP_S / 3600.0, 50.0, 50.0 + dsoc, 0.0, 0.0, proxy, wf, "", None, CAP_WH, 0)
+    return store
+
+
+def _reference(store: IntervalStore, half_life_s: float) -> tuple[float, float]:
+    """Direct weighted fit, weights relative to the newest interval."""
+    t_end = store.t[-1]
+    rows = []
+    for i in range(len(store)):
+        w = store.weight[i] * (2.0 ** ((store.t[i] - t_end) / half_life_s) if half_life_s > 0 else 1.0)
+        rows.append((store.sun_proxy[i] * store.wf[i], store.net_obs[i], w))
+    night = [(y, w) for x, y, w in rows if x <= NIGHT_SUN_PROXY]
+    day = [(x, y, w) for x, y, w in rows if x > NIGHT_SUN_PROXY]
+    load_w = max(0.0, -sum(w * y for y, w in night) / sum(w for _, w in night))
+    num = sum(w * x * y for x, y, w in day) + load_w * sum(w * x for x, _, w in day)
+    return load_w, max(0.0, num / sum(w * x * x for x, _, w in day))
+
+
+@pytest.mark.parametrize("half_life_days", [0.0, 2.0])
+def test_kept_estimator_matches_fresh_fit(half_life_days: float) -> None:
+    half_life_s = half_life_days * 86400.0
+    kept = LoadSolarEstimator(half_life_s)
+    first, last = 0, 2000
+    kept.align(_store(first, last))
+    kept.update(_store(first, last))
+    for step in range(40):
+        # The window slides, new intervals arrive and the newest ones are revised.
+        first += 37
+        last += 41
+        store = _store(first, last, wf_tail=0.5 if step % 2 else None, head_s=(step % 3) * 60.0)
+        kept.align(store)
+        fed = kept.update(store)
+        assert fed < 200
+        assert len(kept) == len(store)
+        fresh = LoadSolarEstimator(half_life_s)
+        fresh.update(store)
+        assert kept.fit() == pytest.approx(fresh.fit(), rel=1e-9)
+        assert kept.fit(len(store) // 2) == pytest.approx(fresh.fit(len(store) // 2), rel=1e-9)
+        assert kept.fit_as_of(store.t[100]) == pytest.approx(fresh.fit_as_of(store.t[100]), rel=1e-9)
+    assert kept.fit() == pytest.approx(_reference(store, half_life_s), rel=1e-9)
+
+
+def test_revised_history_is_refed() -> None:
+    kept = LoadSolarEstimator()
+    kept.update(_store(0, 500))
+    store = _store(0, 500, seed=2)
+    assert kept.align(store) == 0
+    assert kept.update(store) == 500
+    assert kept.fit() == pytest.approx(_reference(store, 0.0), rel=1e-9)
+
+
+def test_short_half_life_over_long_span_stays_finite() -> None:
+    # 3000 half-lives would overflow 2 ** exponent without rebasing.
+    store = _store(0, 6000)
+    half_life_s = 2 * STEP_S
+    estimator = LoadSolarEstimator(half_life_s)
+    estimator.update(store)
+    load_w, solar_peak_w = estimator.fit()
+    assert math.isfinite(load_w) and math.isfinite(solar_peak_w)
+    assert (load_w, solar_peak_w) == pytest.approx(_reference(store, half_life_s), rel=1e-9)
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from custom_components.node_energy.history import HistoryBuffer, Sample, sample_ts, sample_with_ts
+
+T0 = datetime(2026, 6, 1, tzinfo=UTC)
+
+
+def _samples(first: int, last: int) -> list[Sample]:
+    """Samples every 5 minutes, `first..last` steps after T0."""
+    return [Sample(T0 + timedelta(minutes=5 * k), float(k)) for k in range(first, last)]
+
+
+def _buffer(rows: list[Sample], start: datetime = T0) -> HistoryBuffer[Sample]:
+    buffer = HistoryBuffer(sample_ts, sample_with_ts)
+    buffer.replace(rows, start)
+    return buffer
+
+
+def test_incremental_extend_matches_a_full_query() -> None:
+    buffer = _buffer(_samples(0, 10))
+    assert buffer.covers(T0) and not buffer.covers(T0 - timedelta(seconds=1))
+    for first in range(10, 40, 7):
+        assert buffer.extend(_samples(first, first + 7)) == 7
+        assert buffer.last_ts == T0 + timedelta(minutes=5 * (first + 6))
+    assert buffer.rows == _samples(0, 45)
+
+
+def test_rows_at_the_seam_are_not_added_twice() -> None:
+    buffer = _buffer(_samples(0, 10))
+    # An incremental query from last_ts returns the newest buffered row again.
+    assert buffer.extend(_samples(9, 15)) == 5
+    assert buffer.extend([*_samples(3, 5), *_samples(14, 16)]) == 1
+    assert buffer.extend([]) == 0
+    assert buffer.rows == _samples(0, 16)
+    assert [s.ts for s in buffer.rows] == sorted({s.ts for s in buffer.rows})
+
+
+def test_trim_keeps_the_start_time_state() -> None:
+    buffer = _buffer(_samples(0, 20))
+    start = T0 + timedelta(minutes=5 * 7 + 2)
+    assert buffer.since(start) == [Sample(start, 7.0), *_samples(8, 20)]
+    assert len(buffer.rows) == 20  # since() leaves the buffer as is
+
+    buffer.trim(start)
+    assert buffer.start == start and buffer.covers(start) and not buffer.covers(T0)
+    assert buffer.rows == [Sample(start, 7.0), *_samples(8, 20)]
+    # Trimming exactly on a row keeps it without a retimed copy.
+    on_row = T0 + timedelta(minutes=5 * 12)
+    buffer.trim(on_row)
+    assert buffer.rows == _samples(12, 20)
+
+    # A start before every row keeps them all.
+    early = _buffer(_samples(5, 8), T0)
+    assert early.since(T0) == _samples(5, 8)
+    assert _buffer([], T0).since(T0) == [] and not _buffer([], T0).covers(T0)
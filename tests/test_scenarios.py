@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from custom_components.node_energy import scenarios
+from custom_components.node_energy.scenarios import SCENARIO_VARIANTS, ScenarioEngine
+
+CELL_MAH = 3400.0
+CELL_V = 3.7
+DT_H = 15 / 60.0
+CELLS = [1, 2, 3, 5, 8, 12]
+
+
+def _baseline_simulate(
+    soc_now: float,
+    cells: int,
+    use_weather: bool,
+    weather_arr: list[float] | None,
+    load_w: float,
+    solar_peak_w: float,
+    solar_proxy: list[float],
+    weather_factor: list[float],
+) -> list[float]:
+    """The original per-scenario loop, ported as is."""
+    cap_wh = cells * (CELL_MAH / 1000.0) * CELL_V
+    soc = float(soc_now)
+    out = [soc]
+    for i in range(1, len(solar_proxy)):
+        wf = weather_arr[i] if (use_weather and weather_arr is not None) else (weather_factor[i] if use_weather else 1.0)
+        p_prod = solar_peak_w * solar_proxy[i] * wf
+        p_net = -load_w + p_prod
+        soc += (p_net * DT_H / cap_wh) * 100.0
+        soc = max(0.0, min(100.0, soc))
+        out.append(soc)
+    return out
+
+
+def _baseline_curves(soc_now: float, load_w: float, solar_peak_w: float, proxy: list[float], wf: list[float], wf20: list[float]) -> dict:
+    args = (load_w, solar_peak_w, proxy, wf)
+    return {
+        "scenarios": {str(c): _baseline_simulate(soc_now, c, True, None, *args) for c in CELLS},
+        "scenarios_p20": {str(c): _baseline_simulate(soc_now, c, True, wf20, *args) for c in CELLS},
+        "scenarios_clear": {str(c): _baseline_simulate(soc_now, c, False, None, *args) for c in CELLS},
+    }
+
+
+def _inputs(seed: int, steps: int = 7 * 96) -> tuple[list[float], list[float], list[float]]:
+    rnd = random.Random(seed)
+    proxy = [max(0.0, math.sin(2 * math.pi * (i % 96) / 96 - math.pi / 2)) for i in range(steps + 1)]
+    wf = [rnd.uniform(0.05, 1.0) for _ in range(steps + 1)]
+    wf20 = [w * rnd.uniform(0.3, 1.0) for w in wf]
+    return proxy, wf, wf20
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+@pytest.mark.parametrize(("soc0", "load_w", "solar_peak_w"), [(55.0, 1.2, 9.0), (8.0, 3.5, 2.0), (97.0, 0.4, 30.0)])
+def test_engine_matches_baseline_loop(
+    monkeypatch: pytest.MonkeyPatch, soc0: float, load_w: float, solar_peak_w: float, with_numpy: bool
+) -> None:
+    if not with_numpy:
+        monkeypatch.setattr(scenarios, "np", None)
+    proxy, wf, wf20 = _inputs(int(soc0))
+    engine = ScenarioEngine(soc0, load_w, solar_peak_w, proxy, wf, wf20, CELL_MAH, CELL_V, DT_H)
+    assert engine.curves(CELLS, SCENARIO_VARIANTS) == _baseline_curves(soc0, load_w, solar_peak_w, proxy, wf, wf20)
+
+    rebased = engine.rebased(42.5, 130, load_w=load_w * 2.0)
+    expected = _baseline_curves(42.5, load_w * 2.0, solar_peak_w, proxy[130:], wf[130:], wf20[130:])
+    assert rebased.curves(CELLS, SCENARIO_VARIANTS) == expected
+
+
+def test_baseline_cases_clip_at_both_ends() -> None:
+    proxy, wf, wf20 = _inputs(8)
+    low = _baseline_curves(8.0, 3.5, 2.0, proxy, wf, wf20)["scenarios"]["1"]
+    high = _baseline_curves(97.0, 0.4, 30.0, proxy, wf, wf20)["scenarios_clear"]["12"]
+    assert low.count(0.0) > 10
+    assert high.count(100.0) > 10
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from custom_components.node_energy.const import WEATHER_SKETCH_DRIFT
+from custom_components.node_energy.coordinator import _empirical_weather_factor, _sync_weather_sketch
+from custom_components.node_energy.intervals import IntervalStore
+from custom_components.node_energy.sketch import WeatherSketch
+
+WIDTH = (WeatherSketch.HI - WeatherSketch.LO) / WeatherSketch.BINS
+STEP_S = 600.0
+CAP_WH = 25.9
+QUANTILES = (0.0, 0.05, 0.2, 0.5, 0.8, 0.95, 1.0)
+
+
+def _exact_quantile(values: list[tuple[float, float]], q: float) -> float:
+    """Smallest value whose cumulative weight reaches q of the total."""
+    ordered = sorted(values)
+    target = q * sum(w for _, w in ordered)
+    acc = 0.0
+    for v, w in ordered:
+        acc += w
+        if acc >= target:
+            return v
+    return ordered[-1][0]
+
+
+def _assert_sketch_equal(a: WeatherSketch, b: WeatherSketch) -> None:
+    assert list(a.entries) == list(b.entries)
+    for ha, hb in zip([*a.hourly, a.overall], [*b.hourly, b.overall], strict=True):
+        assert ha.n == hb.n
+        assert ha.counts == pytest.approx(hb.counts, abs=1e-9)
+    for q in QUANTILES:
+        for hour in (None, 12):
+            qa, qb = a.quantile(q, hour), b.quantile(q, hour)
+            assert qa == qb or qa == pytest.approx(qb, abs=1e-9)
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_quantiles_within_one_bin_of_exact(weighted: bool) -> None:
+    rnd = random.Random(5)
+    sketch = WeatherSketch(0.4, 1.6)
+    values: dict[int | None, list[tuple[float, float]]] = {None: []}
+    for k in range(5000):
+        hour = k % 24
+        v = min(1.0, max(WeatherSketch.LO, rnd.betavariate(2.0, 1.2)))
+        w = rnd.uniform(0.1, 1.0) if weighted else 1.0
+        sketch.add(k * STEP_S, hour, v, w)
+        values[None].append((v, w))
+        values.setdefault(hour, []).append((v, w))
+    sketch.add(5000 * STEP_S, 0, None, 1.0)  # no value: kept as an entry, not counted
+    assert len(sketch) == 5001 and sketch.samples == 5000
+    for hour in (None, 0, 13):
+        for q in QUANTILES:
+            assert abs(sketch.quantile(q, hour) - _exact_quantile(values[hour], q)) <= WIDTH + 1e-12
+
+
+def test_entries_expire_as_the_window_slides() -> None:
+    rnd = random.Random(6)
+    points = [(k * STEP_S, k % 24, None if k % 7 == 0 else rnd.uniform(0.05, 1.0), rnd.uniform(0.5, 1.0)) for k in range(600)]
+    sketch = WeatherSketch(0.4, 1.6)
+    for t, hour, v, w in points:
+        sketch.add(t, hour, v, w)
+    ts = [t for t, _, _, _ in points]
+
+    for cut in (0, 1, 150, 430):
+        # The window moved past `cut`; 20 newer intervals arrived meanwhile.
+        assert sketch.align([*ts[cut:], ts[-1] + STEP_S * 20]) == (0, len(ts) - cut)
+        fresh = WeatherSketch(0.4, 1.6)
+        for t, hour, v, w in points[cut:]:
+            fresh.add(t, hour, v, w)
+        _assert_sketch_equal(sketch, fresh)
+
+    assert sketch.align([ts[-1] + 1.0]) == (0, 0)
+    assert len(sketch) == 0 and sketch.samples == 0
+    assert sketch.overall.total == 0.0 and sketch.quantile(0.5) is None
+
+
+def test_align_reports_revised_intervals() -> None:
+    sketch = WeatherSketch(0.4, 1.6)
+    ts = [k * STEP_S for k in range(50)]
+    for t in ts:
+        sketch.add(t, 10, 0.5, 1.0)
+    assert sketch.align([-STEP_S, *ts]) == (1, 51)
+    revised = list(ts)
+    revised[-1] += 1.0
+    assert sketch.align(revised) is None
+    assert sketch.align(ts[:30]) is None
+
+
+def _store(first: int, last: int, load_w: float = 0.45, solar_peak_w: float = 1.6) -> IntervalStore:
+    store = IntervalStore()
+    for k in range(first, last):
+        rnd = random.Random(k)
+        t = k * STEP_S
+        proxy = max(0.0, math.sin((t % 86400.0) / 86400.0 * 2 * math.pi - math.pi / 2))
+        wf = rnd.uniform(0.2, 1.0)
+        dsoc = (-load_w + solar_peak_w * proxy * wf) * (STEP_S / 3600.0) / CAP_WH * 100.0
+        store.append(t, STEP_S / 3600.0, 50.0, 50.0 + dsoc, 0.0, 0.0, proxy, wf, "", None, CAP_WH, int(t // 3600) % 24)
+    return store
+
+
+def _built(store: IntervalStore, load_w: float, solar_peak_w: float) -> WeatherSketch:
+    sketch = WeatherSketch(load_w, solar_peak_w)
+    for i in range(len(store)):
+        sketch.add(store.t[i], store.local_hour[i], _empirical_weather_factor(store, i, load_w, solar_peak_w), store.weight[i])
+    return sketch
+
+
+def test_sync_slides_or_rebuilds_on_drift() -> None:
+    sketch = _sync_weather_sketch(None, _store(0, 700), 0.45, 1.6)
+    _assert_sketch_equal(sketch, _built(_store(0, 700), 0.45, 1.6))
+
+    # A fit within tolerance keeps the sketch and its original fit, sliding it by new intervals.
+    slid = _sync_weather_sketch(sketch, _store(100, 760), 0.45 * (1 + WEATHER_SKETCH_DRIFT / 2), 1.6)
+    assert slid is sketch
+    _assert_sketch_equal(slid, _built(_store(100, 760), 0.45, 1.6))
+
+    assert sketch.drifted(0.45 * (1 + 2 * WEATHER_SKETCH_DRIFT), 1.6, WEATHER_SKETCH_DRIFT)
+    assert sketch.drifted(0.45, 1.6 * (1 - 2 * WEATHER_SKETCH_DRIFT), WEATHER_SKETCH_DRIFT)
+    rebuilt = _sync_weather_sketch(sketch, _store(110, 770), 0.6, 1.6)
+    assert rebuilt is not sketch
+    assert (rebuilt.load_w, rebuilt.solar_peak_w_raw) == (0.6, 1.6)
+    _assert_sketch_equal(rebuilt, _built(_store(110, 770), 0.6, 1.6))
+
+    # Earlier intervals extended backwards are added at the front.
+    grown = _sync_weather_sketch(_sync_weather_sketch(None, _store(200, 400), 0.45, 1.6), _store(150, 420), 0.45, 1.6)
+    _assert_sketch_equal(grown, _built(_store(150, 420), 0.45, 1.6))
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+import math
+import random
+
+import pytest
+
+from custom_components.node_energy import solar
+from custom_components.node_energy.solar import SolarTable, solar_positions
+
+LATITUDES = (-66.0, -35.0, -20.0, 0.0, 10.0, 23.0, 45.0, 59.9, 78.0)
+DAYS = ((3, 20), (6, 21), (9, 23), (12, 21), (2, 5), (8, 10))
+
+
+# Baseline scalar formula, kept verbatim as a reference for the vectorized path.
+def _baseline_position(ts_utc: datetime, lat_deg: float, lon_deg: float) -> tuple[float, float]:
+    ts_utc = ts_utc.astimezone(UTC)
+    y = ts_utc.year
+    m = ts_utc.month
+    d = ts_utc.day
+    hr = ts_utc.hour + ts_utc.minute / 60.0 + ts_utc.second / 3600.0
+
+    if m <= 2:
+        y -= 1
+        m += 12
+    a = math.floor(y / 100)
+    b = 2 - a + math.floor(a / 4)
+    jd = math.floor(365.25 * (y + 4716)) + math.floor(30.6001 * (m + 1)) + d + b - 1524.5 + hr / 24.0
+    t = (jd - 2451545.0) / 36525.0
+
+    l0 = (280.46646 + t * (36000.76983 + t * 0.0003032)) % 360.0
+    m_sun = 357.52911 + t * (35999.05029 - 0.0001537 * t)
+    m_rad = math.radians(m_sun % 360.0)
+    c = (
+        math.sin(m_rad) * (1.914602 - t * (0.004817 + 0.000014 * t))
+        + math.sin(2 * m_rad) * (0.019993 - 0.000101 * t)
+        + math.sin(3 * m_rad) * 0.000289
+    )
+    true_long = l0 + c
+    omega = 125.04 - 1934.136 * t
+    lam = true_long - 0.00569 - 0.00478 * math.sin(math.radians(omega))
+    eps0 = 23.0 + (26.0 + ((21.448 - t * (46.815 + t * (0.00059 - t * 0.001813))) / 60.0)) / 60.0
+    eps = eps0 + 0.00256 * math.cos(math.radians(omega))
+
+    lam_r = math.radians(lam)
+    eps_r = math.radians(eps)
+    decl = math.asin(math.sin(eps_r) * math.sin(lam_r))
+    ra = math.atan2(math.cos(eps_r) * math.sin(lam_r), math.cos(lam_r))
+
+    gmst = (
+        280.46061837
+        + 360.98564736629 * (jd - 2451545.0)
+        + 0.000387933 * t * t
+        - (t * t * t) / 38710000.0
+    ) % 360.0
+    lst = math.radians((gmst + lon_deg) % 360.0)
+    ha = (lst - ra + math.pi) % (2 * math.pi) - math.pi
+
+    lat_r = math.radians(lat_deg)
+    elev = math.asin(math.sin(lat_r) * math.sin(decl) + math.cos(lat_r) * math.cos(decl) * math.cos(ha))
+    az = math.atan2(
+        math.sin(ha),
+        math.cos(ha) * math.sin(lat_r) - math.tan(decl) * math.cos(lat_r),
+    )
+    return math.degrees(elev), (math.degrees(az) + 180.0) % 360.0
+
+
+# The baseline drops sub-second time (the sun moves 0.25 deg/min), which alone
+# accounts for the ~0.004 deg worst case. Azimuth is compared as arc along the
+# horizon, since near the zenith/nadir any tiny error swings it freely.
+BASELINE_TOL_DEG = 0.005
+
+
+def _az_arc(a: float, b: float, elev: float) -> float:
+    return abs((a - b + 180.0) % 360.0 - 180.0) * math.cos(math.radians(elev))
+
+
+def _epochs(month: int, day: int, seed: int) -> list[float]:
+    rnd = random.Random(seed)
+    t0 = datetime(2026, month, day, tzinfo=UTC).timestamp()
+    return [t0 + rnd.uniform(0.0, 86400.0) for _ in range(2000)]
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+@pytest.mark.parametrize("lat", LATITUDES)
+def test_table_matches_direct_positions(monkeypatch: pytest.MonkeyPatch, lat: float, with_numpy: bool) -> None:
+    if not with_numpy:
+        monkeypatch.setattr(solar, "np", None)
+    table = SolarTable()
+    worst_elev = worst_az = 0.0
+    for k, (month, day) in enumerate(DAYS):
+        epochs = _epochs(month, day, k)
+        elev, az, proxy = table.positions(epochs, lat, 10.75)
+        ref_elev, ref_az = solar_positions(epochs, lat, 10.75)
+        for e, a, p, re, ra in zip(elev, az, proxy, ref_elev, ref_az, strict=True):
+            worst_elev = max(worst_elev, abs(e - re))
+            if re < 89.0:
+                worst_az = max(worst_az, abs((a - ra + 180.0) % 360.0 - 180.0))
+            assert p == pytest.approx(solar.sun_proxy(re), abs=1e-5)
+    assert worst_elev < 1e-5
+    assert worst_az < 1e-3
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+@pytest.mark.parametrize("lat", LATITUDES)
+def test_positions_match_baseline_formula(monkeypatch: pytest.MonkeyPatch, lat: float, with_numpy: bool) -> None:
+    if not with_numpy:
+        monkeypatch.setattr(solar, "np", None)
+    table = SolarTable()
+    for k, (month, day) in enumerate(DAYS):
+        epochs = _epochs(month, day, 100 + k)[:300]
+        elev, az = solar_positions(epochs, lat, 10.75)
+        t_elev, t_az, _ = table.positions(epochs, lat, 10.75)
+        for ts, e, a, te, ta in zip(epochs, elev, az, t_elev, t_az, strict=True):
+            ref_elev, ref_az = _baseline_position(datetime.fromtimestamp(ts, UTC), lat, 10.75)
+            assert e == pytest.approx(ref_elev, abs=BASELINE_TOL_DEG)
+            assert te == pytest.approx(ref_elev, abs=BASELINE_TOL_DEG)
+            assert _az_arc(a, ref_az, ref_elev) < BASELINE_TOL_DEG
+            assert _az_arc(ta, ref_az, ref_elev) < BASELINE_TOL_DEG
+
+
+def test_slots_are_shared_across_latitudes() -> None:
+    table = SolarTable()
+    epochs = _epochs(6, 21, 0)
+    table.positions(epochs, 45.0, 10.75)
+    misses = table.misses
+    table.positions(epochs, -20.0, 10.75)
+    assert table.misses == misses
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import json
+import math
+import random
+
+import pytest
+
+from custom_components.node_energy.intervals import IntervalStore
+from custom_components.node_energy.sketch import WeatherSketch
+from custom_components.node_energy.storage import dump_interval_store, dump_weather_sketch, load_interval_store, load_weather_sketch
+
+CAP_WH = 25.9
+
+
+def _store(n: int) -> IntervalStore:
+    rnd = random.Random(3)
+    store = IntervalStore()
+    t = 1_780_000_000.123456
+    soc = 60.0
+    for k in range(n):
+        dt_s = rnd.uniform(50.0, 400.0)
+        t += dt_s
+        soc1 = round(soc + rnd.uniform(-0.3, 0.3), 2)
+        volt = None if k % 7 == 0 else round(rnd.uniform(3.6, 4.1), 3)
+        cond = rnd.choice(("sunny", "cloudy", ""))
+        weight = 1.0 if k > 10 else dt_s / 300.0
+        elev, az, proxy, wf = rnd.uniform(-20, 60), rnd.uniform(0, 360), rnd.random(), rnd.random()
+        store.append(t, dt_s / 3600.0, soc, soc1, elev, az, proxy, wf, cond, volt, CAP_WH, k % 24, weight)
+        soc = soc1
+    return store
+
+
+def test_interval_store_round_trip() -> None:
+    store = _store(500)
+    raw = json.loads(json.dumps(dump_interval_store(store, 100, 400, CAP_WH)))
+    loaded = load_interval_store(raw)
+    assert loaded is not None and len(loaded) == 300
+    for k, i in enumerate(range(100, 400)):
+        assert loaded.t[k] == pytest.approx(store.t[i], abs=1e-3)
+        assert loaded.dt_h[k] == pytest.approx(store.dt_h[i], abs=1e-3 / 3600.0)
+        # Sensor values are kept exactly, derived columns at display precision.
+        assert (loaded.soc0[k], loaded.soc1[k], loaded.local_hour[k]) == (store.soc0[i], store.soc1[i], store.local_hour[i])
+        assert loaded.condition[k] == store.condition[i]
+        assert math.isnan(loaded.voltage[k]) if math.isnan(store.voltage[i]) else loaded.voltage[k] == store.voltage[i]
+        assert loaded.sun_elev[k] == pytest.approx(store.sun_elev[i], abs=1e-4)
+        assert loaded.sun_proxy[k] == pytest.approx(store.sun_proxy[i], abs=1e-6)
+        assert loaded.wf[k] == pytest.approx(store.wf[i], abs=1e-4)
+        assert loaded.net_obs[k] == pytest.approx(store.net_obs[i], rel=1e-5)
+
+
+def test_unreadable_intervals_are_dropped() -> None:
+    raw = dump_interval_store(_store(20), 0, 20, CAP_WH)
+    raw["soc0"] = raw["soc0"][:-1]
+    assert load_interval_store(raw) is None
+    assert load_interval_store({}) is None
+
+
+def _sketch() -> tuple[WeatherSketch, list[float]]:
+    rnd = random.Random(4)
+    sketch = WeatherSketch(0.45, 1.6)
+    ts = []
+    t_us = 1_780_000_000_000_000
+    for k in range(900):
+        # Interval times are datetime timestamps, whole microseconds.
+        t_us += rnd.choice((299_500_000, 300_000_000, 300_000_125, 600_250_017))
+        t = t_us / 10**6
+        ts.append(t)
+        value = None if k % 9 == 0 else rnd.uniform(0.05, 1.0)
+        sketch.add(t, k % 24, value, 1.0 if k % 5 else rnd.uniform(0.2, 1.0))
+    sketch.align(ts[200:])  # removals leave float residue in the counts
+    return sketch, ts
+
+
+def test_weather_sketch_round_trip() -> None:
+    sketch, ts = _sketch()
+    loaded = load_weather_sketch(json.loads(json.dumps(dump_weather_sketch(sketch))))
+    assert loaded is not None
+    assert (loaded.load_w, loaded.solar_peak_w_raw) == (sketch.load_w, sketch.solar_peak_w_raw)
+    # Entry times come back exactly, so the restored sketch still slides onto the intervals.
+    assert list(loaded.entries) == list(sketch.entries)
+    for a, b in zip([*loaded.hourly, loaded.overall], [*sketch.hourly, sketch.overall], strict=True):
+        assert (a.counts, a.n) == (b.counts, b.n)
+        assert a.total == pytest.approx(b.total, abs=1e-9)
+    assert loaded.align(ts[500:]) == sketch.align(ts[500:]) == (0, 400)
+    assert [loaded.quantile(q, 7) for q in (0.1, 0.5, 0.9)] == [sketch.quantile(q, 7) for q in (0.1, 0.5, 0.9)]
+
+
+def test_unreadable_weather_sketch_is_dropped() -> None:
+    raw = dump_weather_sketch(_sketch()[0])
+    assert load_weather_sketch({**raw, "bins": WeatherSketch.BINS + 1}) is None
+    assert load_weather_sketch({**raw, "code": raw["code"][:-1]}) is None
+    assert load_weather_sketch({**raw, "counts": raw["counts"][:-1]}) is None
+    assert load_weather_sketch(None) is None
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import math
+import random
+
+import pytest
+
+from custom_components.node_energy import timeseries
+from custom_components.node_energy.timeseries import ChartGroup, align_asof, lttb_indices
+
+SAMPLE_TS = [100.0, 200.0, 400.0]
+SAMPLE_VALUES = [1.0, 2.0, 4.0]
+
+
+@pytest.mark.parametrize(
+    ("mode", "expected"),
+    [
+        ("nearest", [1.0, 1.0, 1.0, 2.0, 2.0, 4.0, 4.0, 4.0]),
+        ("previous", [None, 1.0, 1.0, 2.0, 2.0, 2.0, 4.0, 4.0]),
+        ("linear", [None, 1.0, 1.5, 2.0, 3.0, 3.5, 4.0, None]),
+    ],
+)
+def test_align_asof_modes(mode: str, expected: list[float | None]) -> None:
+    # 150 and 300 are ties: nearest keeps the earlier sample.
+    targets = [50.0, 100.0, 150.0, 200.0, 300.0, 350.0, 400.0, 900.0]
+    assert align_asof(targets, SAMPLE_TS, SAMPLE_VALUES, mode) == expected
+
+
+@pytest.mark.parametrize(
+    ("mode", "expected"),
+    [
+        ("nearest", [None, 1.0, 1.0, 2.0, None, 4.0, 4.0, None]),
+        ("previous", [None, 1.0, 1.0, 2.0, None, None, 4.0, None]),
+        ("linear", [None, 1.0, 1.5, 2.0, None, None, 4.0, None]),
+    ],
+)
+def test_align_asof_max_gap(mode: str, expected: list[float | None]) -> None:
+    targets = [40.0, 100.0, 150.0, 200.0, 300.0, 350.0, 400.0, 451.0]
+    assert align_asof(targets, SAMPLE_TS, SAMPLE_VALUES, mode, max_gap_s=50.0) == expected
+
+
+def test_align_asof_without_samples() -> None:
+    assert align_asof([1.0, 2.0], [], [], "linear") == [None, None]
+
+
+def _reference_lttb(xs: list[float], ys: list[float], threshold: int) -> list[int]:
+    """Textbook single-series LTTB."""
+    n = len(xs)
+    every = (n - 2) / (threshold - 2)
+    out = [0]
+    a = 0
+    for b in range(threshold - 2):
+        start = int(b * every) + 1
+        end = int((b + 1) * every) + 1
+        nxt_end = min(int((b + 2) * every) + 1, n)
+        avg_x = sum(xs[end:nxt_end]) / (nxt_end - end)
+        avg_y = sum(ys[end:nxt_end]) / (nxt_end - end)
+        areas = [abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a])) for j in range(start, end)]
+        a = start + areas.index(max(areas))
+        out.append(a)
+    out.append(n - 1)
+    return out
+
+
+def _wave(n: int, seed: int) -> tuple[list[float], list[float]]:
+    rnd = random.Random(seed)
+    xs = [1_780_000_000.0 + 300.0 * k + rnd.uniform(0.0, 60.0) for k in range(n)]
+    ys = [50.0 + 40.0 * math.sin(k / 40.0) + rnd.gauss(0.0, 3.0) for k in range(n)]
+    return xs, ys
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+@pytest.mark.parametrize("threshold", [3, 10, 97, 500])
+def test_lttb_budget_and_endpoints(monkeypatch: pytest.MonkeyPatch, threshold: int, with_numpy: bool) -> None:
+    if not with_numpy:
+        monkeypatch.setattr(timeseries, "np", None)
+    xs, ys = _wave(2000, threshold)
+    idx = lttb_indices(xs, [ys], threshold)
+    assert len(idx) == threshold
+    assert idx[0] == 0 and idx[-1] == len(xs) - 1
+    assert idx == sorted(set(idx))
+    assert idx == _reference_lttb(xs, ys, threshold)
+
+
+@pytest.mark.parametrize("threshold", [0, 2, 50, 80])
+def test_lttb_keeps_everything_below_budget(threshold: int) -> None:
+    xs, ys = _wave(50, 1)
+    assert lttb_indices(xs, [ys], threshold) == list(range(50))
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+def test_lttb_columns_are_scaled(monkeypatch: pytest.MonkeyPatch, with_numpy: bool) -> None:
+    if not with_numpy:
+        monkeypatch.setattr(timeseries, "np", None)
+    xs, ys = _wave(600, 2)
+    flat = [0.0] * 600
+    flat[311] = 1.0  # a lone spike in a column with a tiny range
+    big = [y * 1000.0 for y in ys]
+    idx = lttb_indices(xs, [big, flat], 40)
+    assert 311 in idx
+    assert len(idx) == 40
+
+
+def test_chart_group_window_and_budget() -> None:
+    xs, ys = _wave(1000, 3)
+    group = ChartGroup(xs, {"soc": ys, "volt": [y / 10.0 for y in ys]})
+    t_min, t_max = xs[200] - 1.0, xs[699] + 1.0
+    idx = group.select(50, t_min, t_max)
+    assert len(idx) == 50
+    assert idx[0] == 200 and idx[-1] == 699
+    assert group.select(0, t_min, t_max) == list(range(200, 700))
+    assert group.select(2000) == list(range(1000))
+
+    compact = group.compact(idx[:3], 1)
+    assert compact["t"] == [round(xs[i] * 1000) for i in idx[:3]]
+    assert compact["series"]["soc"] == [round(ys[i], 1) for i in idx[:3]]
+    points = group.points(idx[:2])
+    assert [p["y"] for p in points["volt"]] == [ys[i] / 10.0 for i in idx[:2]]
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+import random
+import types
+from typing import Any
+
+import pytest
+
+from custom_components.node_energy import weather
+from custom_components.node_energy.weather import WeatherCache, WeatherTimeline
+
+T0 = datetime(2026, 6, 1, 0, 7, 13, tzinfo=UTC)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def monotonic(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(weather, "time", types.SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def _fetcher(values: list) -> tuple[list[int], object]:
+    """A fetch returning `values` in turn, and the list its calls are counted in."""
+    calls: list[int] = []
+
+    async def fetch():
+        calls.append(len(calls))
+        await asyncio.sleep(0)
+        value = values[len(calls) - 1]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    return calls, fetch
+
+
+def test_values_expire_after_ttl(monotonic: _Clock) -> None:
+    async def run() -> None:
+        cache = WeatherCache()
+        calls, fetch = _fetcher([["a"], ["b"]])
+        assert await cache.async_get("k", 60.0, fetch) == ["a"]
+        monotonic.now += 59.9
+        assert await cache.async_get("k", 60.0, fetch) == ["a"]
+        assert len(calls) == 1
+        monotonic.now += 0.1
+        assert await cache.async_get("k", 60.0, fetch) == ["b"]
+        assert len(calls) == 2
+        assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 0.3333}
+
+    asyncio.run(run())
+
+
+def test_concurrent_requests_share_one_fetch(monotonic: _Clock) -> None:
+    async def run() -> None:
+        cache = WeatherCache()
+        calls, fetch = _fetcher([["a"], ["b"]])
+        results = await asyncio.gather(*(cache.async_get("k", 60.0, fetch) for _ in range(4)))
+        assert results == [["a"]] * 4 and len(calls) == 1
+        assert cache.stats()["misses"] == 1 and cache.stats()["hits"] == 3
+
+        # A caller that gives up does not cancel the fetch the others await.
+        cache.invalidate("k")
+        waiter = asyncio.ensure_future(cache.async_get("k", 60.0, fetch))
+        other = asyncio.ensure_future(cache.async_get("k", 60.0, fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        assert await other == ["b"] and len(calls) == 2
+
+    asyncio.run(run())
+
+
+def test_zero_ttl_fetches_every_time_but_merges_concurrent_requests(monotonic: _Clock) -> None:
+    async def run() -> None:
+        cache = WeatherCache()
+        calls, fetch = _fetcher([["a"], ["b"], RuntimeError("unavailable")])
+        assert await cache.async_get("k", 0.0, fetch) == ["a"]
+        assert await asyncio.gather(cache.async_get("k", 0.0, fetch), cache.async_get("k", 0.0, fetch)) == [["b"], ["b"]]
+        assert len(calls) == 2
+        # Nothing is served from the cache, but the last value is still there for a failed refetch.
+        with pytest.raises(RuntimeError):
+            await cache.async_get("k", 0.0, fetch)
+        assert cache.stale("k") == ["b"]
+
+    asyncio.run(run())
+
+
+def test_empty_results_are_not_cached(monotonic: _Clock) -> None:
+    async def run() -> None:
+        cache = WeatherCache()
+        calls, fetch = _fetcher([[], ["a"]])
+        assert await cache.async_get("k", 60.0, fetch) == []
+        assert cache.stale("k") is None
+        assert await cache.async_get("k", 60.0, fetch) == ["a"]
+        assert len(calls) == 2
+
+    asyncio.run(run())
+
+
+def _baseline_weather_factor_at(points: list[dict[str, Any]], ts: datetime) -> tuple[float, str]:
+    """The original per-interval lookup, ported as is."""
+    if not points:
+        return 1.0, ""
+
+    def _mean(xs: list[float]) -> float:
+        return sum(xs) / len(xs) if xs else 0.0
+
+    def by_hour_fallback(target_ts: datetime) -> tuple[float, str]:
+        buckets: dict[int, list[dict[str, Any]]] = {}
+        for p in points:
+            h = p["ts"].astimezone(target_ts.tzinfo or UTC).hour
+            buckets.setdefault(h, []).append(p)
+        h = target_ts.astimezone(target_ts.tzinfo or UTC).hour
+        if h in buckets and buckets[h]:
+            vals = buckets[h]
+            return _mean([float(v["factor"]) for v in vals]), vals[-1].get("condition", "")
+        return _mean([float(p["factor"]) for p in points]), points[-1].get("condition", "")
+
+    if ts <= points[0]["ts"] or ts >= points[-1]["ts"]:
+        return by_hour_fallback(ts)
+
+    for i in range(1, len(points)):
+        a = points[i - 1]
+        b = points[i]
+        if a["ts"] <= ts <= b["ts"]:
+            span = (b["ts"] - a["ts"]).total_seconds()
+            if span <= 0:
+                return float(a["factor"]), a.get("condition", "")
+            k = (ts - a["ts"]).total_seconds() / span
+            fac = float(a["factor"]) + (float(b["factor"]) - float(a["factor"])) * k
+            return fac, (a.get("condition", "") if k < 0.5 else b.get("condition", ""))
+
+    return by_hour_fallback(ts)
+
+
+def _points(seed: int, n: int) -> list[dict[str, Any]]:
+    """Weather states at irregular times, with repeated timestamps and a gap of several hours."""
+    rnd = random.Random(seed)
+    points = []
+    ts = T0
+    for k in range(n):
+        if k == n // 2:
+            ts += timedelta(hours=9)
+        elif k % 11 != 5:
+            ts += timedelta(seconds=rnd.uniform(300.0, 5400.0))
+        cond = rnd.choice(("sunny", "partlycloudy", "cloudy", "rainy"))
+        points.append({"ts": ts, "condition": cond, "factor": rnd.uniform(0.05, 1.0)})
+    return points
+
+
+@pytest.mark.parametrize(("seed", "n"), [(1, 0), (2, 1), (3, 2), (4, 40), (5, 150)])
+def test_factors_match_baseline_lookup(seed: int, n: int) -> None:
+    points = _points(seed, n)
+    end = points[-1]["ts"] if points else T0
+    rnd = random.Random(seed)
+    # Targets before, between, exactly on and after the points, over hours the points do not cover.
+    targets = sorted(
+        [T0 - timedelta(hours=30), *(T0 + (end - T0) * rnd.random() for _ in range(300)), *(p["ts"] for p in points)]
+        + [end + timedelta(hours=h, minutes=13) for h in range(0, 30, 5)]
+    )
+    factors, conditions = WeatherTimeline(points).factors_at([t.timestamp() for t in targets])
+    for t, f, cond in zip(targets, factors, conditions, strict=True):
+        expected_f, expected_cond = _baseline_weather_factor_at(points, t)
+        # Epoch floats resolve about 2e-7 s, timedeltas exactly: a few 1e-10 apart at most.
+        assert f == pytest.approx(expected_f, abs=1e-9), t
+        assert cond == expected_cond, t